@@ -0,0 +1,4 @@
+import time
+
+# Beginn des App-Imports; Bezugspunkt für den Startzeitbericht in ``app.startup``.
+IMPORT_STARTED = time.perf_counter()
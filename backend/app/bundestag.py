@@ -1,21 +1,152 @@
 from __future__ import annotations
 
-from typing import Any, Dict, List, Set, Tuple
+import asyncio
+import importlib.util
+import json
+import logging
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, AsyncGenerator, Dict, List, Protocol, Sequence, Set, Tuple
 
 import httpx
 
 from datetime import datetime, timedelta
 
-from .config import load_settings
+from .cache import CacheEntry, ResponseCache, SingleFlight, make_cache_key
+from . import metrics
+from .config import DATA_DIR, BundestagSettings, load_settings, write_atomic
+from .facets import FACET_DATASETS, FacetIndex, drucksache_facets, vorgang_facets
+from .leader import is_leader, worker_count
+from .mirror import MirrorStore, UnsupportedMirrorQuery, is_mirror_cursor
+from .person_index import PersonIndex
+from .ratelimit import CircuitBreaker, TokenBucket, backoff_delay, retry_after_seconds
+from .search_index import INDEXED_DATASETS, SearchIndex
+
+
+logger = logging.getLogger(__name__)
+
+
+_HTTP_CLIENT: httpx.AsyncClient | None = None
+_RESPONSE_CACHE: ResponseCache | None = None
+_FACET_INDEX: FacetIndex | None = None
+_SEARCH_INDEX: SearchIndex | None = None
+_MIRROR_STORE: MirrorStore | None = None
+_IN_FLIGHT = SingleFlight()
+_RATE_LIMITER: Tuple[Tuple[float, int], TokenBucket] | None = None
+_BREAKER: Tuple[Tuple[int, float], CircuitBreaker] | None = None
+_RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+# Suchsitzung (Datensatz + Filter ohne Cursor) -> laufende Vorab-Abfrage der Folgeseiten.
+_PREFETCH: "OrderedDict[str, asyncio.Task[None]]" = OrderedDict()
+_PREFETCH_STATS = {"started": 0, "cancelled": 0, "pages": 0}
+_EXPORT_LIMITER: Tuple[float, TokenBucket] | None = None
+
+
+class DIPUnavailable(httpx.TransportError):
+    """Der Circuit-Breaker ist offen; der DIP wird vorübergehend nicht angefragt."""
+
+
+class InvalidCursor(ValueError):
+    """Der übergebene Cursor ist beschädigt oder gehört zu keiner bekannten Suche."""
+
+
+def _build_http_client(settings: BundestagSettings) -> httpx.AsyncClient:
+    limits = httpx.Limits(
+        max_connections=settings.max_connections,
+        max_keepalive_connections=settings.max_keepalive_connections,
+        keepalive_expiry=settings.keepalive_expiry,
+    )
+    timeout = httpx.Timeout(settings.timeout, connect=settings.connect_timeout)
+    # HTTP/2 benötigt das optionale Paket "h2"; ohne es bleibt es bei HTTP/1.1 mit Keep-Alive.
+    http2 = settings.http2 and importlib.util.find_spec("h2") is not None
+    return httpx.AsyncClient(limits=limits, timeout=timeout, http2=http2)
+
+
+def get_http_client() -> httpx.AsyncClient:
+    global _HTTP_CLIENT
+    if _HTTP_CLIENT is None or _HTTP_CLIENT.is_closed:
+        _HTTP_CLIENT = _build_http_client(load_settings().bundestag)
+    return _HTTP_CLIENT
+
+
+async def close_http_client() -> None:
+    global _HTTP_CLIENT
+    client, _HTTP_CLIENT = _HTTP_CLIENT, None
+    if client is not None and not client.is_closed:
+        await client.aclose()
+
+
+def get_response_cache() -> ResponseCache:
+    global _RESPONSE_CACHE
+    settings = load_settings().bundestag
+    # Mehrere Worker teilen sich die DIP-Antworten über die SQLite-Datei.
+    persist = settings.cache_persist or worker_count() > 1
+    if _RESPONSE_CACHE is None or (persist and not _RESPONSE_CACHE.persistent):
+        db_path = DATA_DIR / "dip_cache.sqlite3" if persist else None
+        _RESPONSE_CACHE = ResponseCache(max_bytes=settings.cache_max_bytes, db_path=db_path)
+    return _RESPONSE_CACHE
+
+
+def get_search_index() -> SearchIndex:
+    global _SEARCH_INDEX
+    if _SEARCH_INDEX is None:
+        _SEARCH_INDEX = SearchIndex(DATA_DIR / "search_index.sqlite3")
+    return _SEARCH_INDEX
+
+
+def _index_payload(endpoint: str, payload: Dict[str, Any]) -> None:
+    dataset = endpoint.strip("/").split("/", 1)[0]
+    if dataset not in INDEXED_DATASETS:
+        return
+    documents = payload.get("documents") if "documents" in payload else [payload]
+    if documents:
+        _spawn_background(asyncio.to_thread(get_search_index().add, dataset, documents))
+
+
+def _rate_limiter(settings: BundestagSettings) -> TokenBucket:
+    global _RATE_LIMITER
+    # Das Limit gilt für den ganzen Host; jeder Worker bekommt seinen Anteil.
+    workers = worker_count()
+    config = (settings.requests_per_second / workers, max(1, settings.burst // workers))
+    if _RATE_LIMITER is None or _RATE_LIMITER[0] != config:
+        _RATE_LIMITER = (config, TokenBucket(*config))
+    return _RATE_LIMITER[1]
+
+
+def _circuit_breaker(settings: BundestagSettings) -> CircuitBreaker:
+    global _BREAKER
+    config = (settings.breaker_failure_threshold, settings.breaker_reset_seconds)
+    if _BREAKER is None or _BREAKER[0] != config:
+        _BREAKER = (config, CircuitBreaker(*config))
+    return _BREAKER[1]
+
+
+def upstream_stats() -> Dict[str, Any]:
+    settings = load_settings().bundestag
+    return {
+        "rate_limiter": _rate_limiter(settings).stats(),
+        "circuit_breaker": _circuit_breaker(settings).stats(),
+        "prefetch": prefetch_stats(),
+    }
+
+
+def _cache_ttl(settings: BundestagSettings, endpoint: str) -> float:
+    dataset = endpoint.strip("/").split("/", 1)[0]
+    ttls = settings.cache_ttl_seconds
+    return float(ttls.get(dataset, ttls.get("default", 300)))
 
 
 class BundestagClient:
-    def __init__(self) -> None:
+    def __init__(self, http_client: httpx.AsyncClient | None = None) -> None:
         settings = load_settings().bundestag
         self.base_url = settings.base_url.rstrip("/")
         self.api_key = settings.api_key
+        self._http = http_client or get_http_client()
+        self._settings = settings
 
-    async def _request(self, endpoint: str, params: Dict[str, Any] | None = None) -> Dict[str, Any]:
+    async def _request(
+        self, endpoint: str, params: Dict[str, Any] | None = None, *, use_cache: bool = True
+    ) -> Dict[str, Any]:
         query_params: Dict[str, Any] = {"format": "json"}
         if params:
             query_params.update({k: v for k, v in params.items() if v not in (None, "")})
@@ -24,31 +155,468 @@ class BundestagClient:
         if self.api_key:
             headers["Authorization"] = f"ApiKey {self.api_key}"
 
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.get(f"{self.base_url}/{endpoint.lstrip('/')}", params=query_params, headers=headers)
-            response.raise_for_status()
-            return response.json()
+        cache = get_response_cache() if use_cache and self._settings.cache_enabled else None
+        key = make_cache_key(endpoint, query_params)
+        entry = await cache.aget(key) if cache else None
+        if cache and entry is not None and entry.fresh:
+            cache.record_hit()
+            return entry.value
+
+        try:
+            return await _IN_FLIGHT.run(
+                key, lambda: self._fetch(endpoint, query_params, headers, key, cache, entry)
+            )
+        except (httpx.TransportError, httpx.HTTPStatusError) as exc:
+            upstream_failed = isinstance(exc, httpx.TransportError) or exc.response.status_code in _RETRYABLE_STATUS
+            if entry is None or not upstream_failed:
+                raise
+            # DIP gestört: lieber veraltete Daten als ein Fehler.
+            logger.info("DIP nicht verfügbar (%s), liefere veraltete Daten für %s", exc, endpoint)
+            return entry.value
+
+    async def _get(self, dataset: str, url: str, query_params: Dict[str, Any], headers: Dict[str, str]) -> httpx.Response:
+        started = time.perf_counter()
+        status = "error"
+        try:
+            with metrics.UPSTREAM_IN_FLIGHT.track(upstream="dip"):
+                response = await self._http.get(url, params=query_params, headers=headers)
+            status = str(response.status_code)
+            return response
+        finally:
+            elapsed = time.perf_counter() - started
+            metrics.DIP_REQUESTS.inc(dataset=dataset, status=status)
+            metrics.DIP_DURATION.observe(elapsed, dataset=dataset)
+            metrics.record_timing("dip", elapsed)
+
+    async def _send(
+        self, dataset: str, url: str, query_params: Dict[str, Any], headers: Dict[str, str]
+    ) -> httpx.Response:
+        """Gedrosselt senden; 429/5xx und Netzwerkfehler werden mit Backoff wiederholt, Retry-After hat Vorrang."""
+        settings = self._settings
+        limiter = _rate_limiter(settings)
+        breaker = _circuit_breaker(settings)
+        attempt = 0
+        while True:
+            if not breaker.allow():
+                raise DIPUnavailable("DIP ist vorübergehend nicht erreichbar (Circuit-Breaker offen)")
+            await limiter.acquire()
+            try:
+                response = await self._get(dataset, url, query_params, headers)
+            except httpx.TransportError:
+                breaker.record_failure()
+                if attempt >= settings.max_retries:
+                    raise
+                await asyncio.sleep(backoff_delay(attempt, settings.retry_base_delay, settings.retry_max_delay))
+                attempt += 1
+                continue
+
+            if response.status_code not in _RETRYABLE_STATUS:
+                breaker.record_success()
+                return response
+            retry_after = retry_after_seconds(response.headers.get("Retry-After"))
+            if response.status_code == 429:
+                # Drosselung ist kein Ausfall: alle Aufrufer pausieren gemeinsam.
+                limiter.pause(retry_after or backoff_delay(attempt, settings.retry_base_delay, settings.retry_max_delay))
+            else:
+                breaker.record_failure()
+            if attempt >= settings.max_retries:
+                return response
+            delay = retry_after if retry_after is not None else backoff_delay(
+                attempt, settings.retry_base_delay, settings.retry_max_delay
+            )
+            await asyncio.sleep(min(delay, settings.retry_max_delay))
+            attempt += 1
 
-    async def list_documents(self, dataset: str, params: Dict[str, Any]) -> Dict[str, Any]:
-        return await self._request(dataset, params)
+    async def _fetch(
+        self,
+        endpoint: str,
+        query_params: Dict[str, Any],
+        headers: Dict[str, str],
+        key: str,
+        cache: ResponseCache | None,
+        entry: CacheEntry | None,
+    ) -> Dict[str, Any]:
+        if entry is not None:
+            if entry.etag:
+                headers["If-None-Match"] = entry.etag
+            if entry.last_modified:
+                headers["If-Modified-Since"] = entry.last_modified
+
+        dataset = endpoint.strip("/").split("/", 1)[0]
+        response = await self._send(dataset, f"{self.base_url}/{endpoint.lstrip('/')}", query_params, headers)
+        ttl = _cache_ttl(self._settings, endpoint)
+        if cache and entry is not None and response.status_code == 304:
+            cache.record_hit()
+            cache.touch(key, ttl=ttl)
+            return entry.value
+        response.raise_for_status()
+        payload = response.json()
+        if self._settings.search_index_enabled:
+            _index_payload(endpoint, payload)
+        if cache:
+            cache.record_miss()
+            await cache.aset(
+                key,
+                payload,
+                ttl=ttl,
+                body=response.content,
+                etag=response.headers.get("ETag"),
+                last_modified=response.headers.get("Last-Modified"),
+            )
+        return payload
+
+    async def list_documents(
+        self, dataset: str, params: Dict[str, Any], *, use_cache: bool = True
+    ) -> Dict[str, Any]:
+        return await self._request(dataset, params, use_cache=use_cache)
 
     async def get_document(self, dataset: str, document_id: str, params: Dict[str, Any] | None = None) -> Dict[str, Any]:
         endpoint = f"{dataset}/{document_id}"
         return await self._request(endpoint, params)
 
 
-async def fetch_dataset(dataset: str, params: Dict[str, Any]) -> Dict[str, Any]:
+async def _prefetch_pages(dataset: str, params: Dict[str, Any], cursor: str, pages: int) -> None:
     client = BundestagClient()
-    return await client.list_documents(dataset, params)
+    for _ in range(pages):
+        data = await client.list_documents(dataset, {**params, "cursor": cursor})
+        _PREFETCH_STATS["pages"] += 1
+        next_cursor = data.get("cursor")
+        if not data.get("documents") or not next_cursor or next_cursor == cursor:
+            return
+        cursor = next_cursor
+
+
+def _schedule_prefetch(dataset: str, params: Dict[str, Any], data: Dict[str, Any], pages: int) -> None:
+    """Lädt die nächsten Seiten spekulativ in den Response-Cache.
+
+    Pro Suchsitzung läuft höchstens eine Kette; blättert der Client weiter, ersetzt die
+    neue Kette die alte. Bereits laufende Abrufe gehen dabei nicht verloren, da
+    die neue Kette sich über den Single-Flight an sie anhängt.
+    """
+    settings = load_settings().bundestag
+    cursor = data.get("cursor")
+    if pages <= 0 or not settings.cache_enabled or not data.get("documents"):
+        return
+    if not cursor or cursor == params.get("cursor"):
+        return
+    if is_mirror_cursor(cursor):
+        # Seiten aus dem Spiegel sind lokal schnell; den Cursor kennt das DIP ohnehin nicht.
+        return
+    base_params = {key: value for key, value in params.items() if key != "cursor"}
+    session = make_cache_key(dataset, base_params)
+    previous = _PREFETCH.pop(session, None)
+    if previous is not None:
+        previous.cancel()
+        _PREFETCH_STATS["cancelled"] += 1
+    while len(_PREFETCH) >= max(settings.prefetch_max_sessions, 1):
+        _, oldest = _PREFETCH.popitem(last=False)
+        oldest.cancel()
+        _PREFETCH_STATS["cancelled"] += 1
+    task = _spawn_background(_prefetch_quietly(dataset, base_params, cursor, pages))
+    _PREFETCH[session] = task
+    _PREFETCH_STATS["started"] += 1
+
+    def _done(done: "asyncio.Task[None]") -> None:
+        if _PREFETCH.get(session) is done:
+            del _PREFETCH[session]
+
+    task.add_done_callback(_done)
+
+
+async def _prefetch_quietly(dataset: str, params: Dict[str, Any], cursor: str, pages: int) -> None:
+    try:
+        await _prefetch_pages(dataset, params, cursor, pages)
+    except httpx.HTTPError:
+        # Spekulative Arbeit: Fehler zeigen sich spätestens beim echten Abruf.
+        logger.debug("Vorab-Abruf für %s abgebrochen", dataset, exc_info=True)
+
+
+def prefetch_stats() -> Dict[str, int]:
+    return {**_PREFETCH_STATS, "active": len(_PREFETCH)}
+
+
+def _project(value: Any, paths: List[List[str]]) -> Any:
+    if isinstance(value, list):
+        return [_project(item, paths) for item in value]
+    if not isinstance(value, dict):
+        return value
+    grouped: Dict[str, List[List[str]]] = {}
+    for path in paths:
+        grouped.setdefault(path[0], []).append(path[1:])
+    return {
+        key: value[key] if any(not rest for rest in rests) else _project(value[key], rests)
+        for key, rests in grouped.items()
+        if key in value
+    }
+
+
+def project_documents(data: Dict[str, Any], fields: Sequence[str]) -> Dict[str, Any]:
+    """Reduziert die Dokumente einer Ergebnisseite auf die angefragten Felder (Punktnotation für Verschachteltes)."""
+    paths = [field.split(".") for field in {"id", *fields} if field]
+    return {**data, "documents": [_project(document, paths) for document in data.get("documents", [])]}
+
+
+async def fetch_dataset(
+    dataset: str,
+    params: Dict[str, Any],
+    *,
+    prefetch: int | None = None,
+    fields: Sequence[str] | None = None,
+) -> Dict[str, Any]:
+    """Liefert eine Ergebnisseite; ``prefetch`` Folgeseiten werden im Hintergrund vorgeladen."""
+    if prefetch is None:
+        prefetch = load_settings().bundestag.prefetch_pages
+    data = await _fetch_dataset_page(dataset, params)
+    _schedule_prefetch(dataset, params, data, prefetch)
+    # Der Cache hält die vollständige Seite; projiziert wird erst für die Antwort.
+    return project_documents(data, fields) if fields else data
+
+
+async def _fetch_dataset_page(dataset: str, params: Dict[str, Any]) -> Dict[str, Any]:
+    mirror = _mirror_for(dataset)
+    if mirror is not None and load_settings().bundestag.serve_from_mirror:
+        try:
+            if await asyncio.to_thread(mirror.is_seeded, dataset):
+                return await asyncio.to_thread(mirror.query, dataset, params)
+        except UnsupportedMirrorQuery:
+            pass
+    client = BundestagClient()
+    try:
+        return await client.list_documents(dataset, params)
+    except httpx.TransportError as exc:
+        # Offline: lokal beantworten, sofern der Spiegel die Abfrage abdeckt.
+        if mirror is None or not await asyncio.to_thread(mirror.is_seeded, dataset):
+            raise
+        try:
+            return await asyncio.to_thread(mirror.query, dataset, params)
+        except UnsupportedMirrorQuery:
+            raise exc from None
 
 
 async def fetch_document(dataset: str, document_id: str, params: Dict[str, Any] | None = None) -> Dict[str, Any]:
+    mirror = _mirror_for(dataset)
+    if mirror is not None and load_settings().bundestag.serve_from_mirror and not params:
+        document = await asyncio.to_thread(mirror.get, dataset, document_id)
+        if document is not None:
+            return document
+    client = BundestagClient()
+    try:
+        return await client.get_document(dataset, document_id, params)
+    except httpx.TransportError:
+        document = await asyncio.to_thread(mirror.get, dataset, document_id) if mirror else None
+        if document is None:
+            raise
+        return document
+
+
+async def fetch_documents(documents: Sequence[Tuple[str, str]]) -> AsyncGenerator[Dict[str, Any], None]:
+    """Lädt mehrere Dokumente parallel und liefert sie in der Reihenfolge ihrer Fertigstellung."""
+    limit = asyncio.Semaphore(max(1, load_settings().bundestag.batch_fetch_concurrency))
+
+    async def _one(position: int, dataset: str, document_id: str) -> Dict[str, Any]:
+        entry: Dict[str, Any] = {"position": position, "dataset": dataset, "id": document_id}
+        async with limit:
+            try:
+                return {**entry, "document": await fetch_document(dataset, document_id)}
+            except Exception as exc:  # Fehler einzelner Dokumente brechen den Stapel nicht ab
+                return {**entry, "error": str(exc)}
+
+    tasks = [
+        asyncio.ensure_future(_one(position, dataset, document_id))
+        for position, (dataset, document_id) in enumerate(documents)
+    ]
+    try:
+        for finished in asyncio.as_completed(tasks):
+            yield await finished
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+def _export_limiter(settings: BundestagSettings) -> TokenBucket:
+    global _EXPORT_LIMITER
+    rate = settings.export_requests_per_second / worker_count()
+    if _EXPORT_LIMITER is None or _EXPORT_LIMITER[0] != rate:
+        _EXPORT_LIMITER = (rate, TokenBucket(rate, 1))
+    return _EXPORT_LIMITER[1]
+
+
+async def iter_dataset_pages(
+    dataset: str,
+    params: Dict[str, Any],
+    *,
+    fields: Sequence[str] | None = None,
+    limit: int | None = None,
+) -> AsyncGenerator[Dict[str, Any], None]:
+    """Läuft den DIP-Cursor vollständig ab und liefert Seite für Seite.
+
+    Alle Exporte teilen sich ein eigenes, niedrigeres Ratenlimit, damit interaktive
+    Suchen nicht hinter ihnen warten; die Seiten umgehen den Antwortcache.
+    """
+    client = BundestagClient()
+    limiter = _export_limiter(load_settings().bundestag)
+    base_params = {key: value for key, value in params.items() if key != "cursor"}
+    cursor: str | None = None
+    remaining = limit
+    while True:
+        await limiter.acquire()
+        page_params = {**base_params, "cursor": cursor} if cursor else dict(base_params)
+        data = await client.list_documents(dataset, page_params, use_cache=False)
+        documents = data.get("documents", [])
+        if remaining is not None:
+            documents = documents[:remaining]
+            remaining -= len(documents)
+        page = {**data, "documents": documents}
+        yield project_documents(page, fields) if fields else page
+        next_cursor = data.get("cursor")
+        if not documents or not next_cursor or next_cursor == cursor or remaining == 0:
+            return
+        cursor = next_cursor
+
+
+# Überlappung beim Delta-Sync, damit Zeitzonen- oder Uhrabweichungen nichts verschlucken.
+_SYNC_OVERLAP = timedelta(minutes=10)
+
+
+class SyncStore(Protocol):
+    def state(self, dataset: str) -> Dict[str, Any]: ...
+
+    def save_state(self, dataset: str, **values: Any) -> None: ...
+
+    def apply(self, dataset: str, documents: List[Dict[str, Any]], *, cursor: str | None = None) -> int: ...
+
+
+def get_facet_index() -> FacetIndex:
+    global _FACET_INDEX
+    if _FACET_INDEX is None:
+        _FACET_INDEX = FacetIndex(DATA_DIR / "facets.sqlite3")
+    return _FACET_INDEX
+
+
+def get_mirror_store() -> MirrorStore:
+    global _MIRROR_STORE
+    if _MIRROR_STORE is None:
+        _MIRROR_STORE = MirrorStore(DATA_DIR / "mirror.sqlite3")
+    return _MIRROR_STORE
+
+
+def _facet_snapshot() -> Dict[str, Any] | None:
+    if not load_settings().bundestag.facet_index_enabled or _FACET_INDEX is None:
+        return None
+    return _FACET_INDEX.snapshot()
+
+
+async def _sync_dataset(
+    store: SyncStore, client: BundestagClient, dataset: str, *, min_interval: float = 0.0
+) -> int:
+    """Erstbefüllung per vollständigem Cursor-Crawl (fortsetzbar), danach nur Änderungen seit dem letzten Sync."""
+    state = await asyncio.to_thread(store.state, dataset)
+    params_base: Dict[str, Any] = {}
+    cursor: str | None = None
+    if state["seeded"]:
+        started_at = datetime.utcnow()
+        last_sync = datetime.fromisoformat(state["last_sync"]) - _SYNC_OVERLAP
+        params_base["f.aktualisiert.start"] = last_sync.replace(microsecond=0).isoformat()
+    else:
+        cursor = state["cursor"]
+        if state["started_at"]:
+            started_at = datetime.fromisoformat(state["started_at"])
+        else:
+            started_at = datetime.utcnow()
+            await asyncio.to_thread(store.save_state, dataset, started_at=started_at.isoformat())
+
+    loop = asyncio.get_running_loop()
+    applied = 0
+    while True:
+        page_started = loop.time()
+        params = dict(params_base)
+        if cursor:
+            params["cursor"] = cursor
+        data = await client.list_documents(dataset, params, use_cache=False)
+        documents = data.get("documents", [])
+        next_cursor = data.get("cursor")
+        checkpoint = next_cursor if not state["seeded"] else None
+        applied += await asyncio.to_thread(store.apply, dataset, documents, cursor=checkpoint)
+        if not documents or not next_cursor or next_cursor == cursor:
+            break
+        cursor = next_cursor
+        remaining = min_interval - (loop.time() - page_started)
+        if remaining > 0:
+            await asyncio.sleep(remaining)
+
+    await asyncio.to_thread(
+        store.save_state,
+        dataset,
+        cursor=None,
+        seeded=True,
+        last_sync=started_at.isoformat(),
+        started_at=None,
+    )
+    return applied
+
+
+async def sync_facet_index() -> Dict[str, int]:
+    index = get_facet_index()
     client = BundestagClient()
-    return await client.get_document(dataset, document_id, params)
+    results = await asyncio.gather(*(_sync_dataset(index, client, dataset) for dataset in FACET_DATASETS))
+    await asyncio.to_thread(index.rebuild_snapshot)
+    return dict(zip(FACET_DATASETS, results))
+
+
+async def facet_sync_loop() -> None:
+    index = await asyncio.to_thread(get_facet_index)
+    if await asyncio.to_thread(index.is_seeded):
+        await asyncio.to_thread(index.rebuild_snapshot)
+    while True:
+        try:
+            await sync_facet_index()
+        except Exception:  # pragma: no cover - nächster Versuch folgt
+            logger.warning("Synchronisierung des Facettenindex fehlgeschlagen", exc_info=True)
+        interval = load_settings().bundestag.facet_sync_interval_minutes
+        await asyncio.sleep(max(interval, 1) * 60)
+
+
+async def sync_mirror(datasets: Sequence[str], *, requests_per_second: float | None = None) -> Dict[str, int]:
+    """Gleicht die Datensätze nacheinander ab; abgebrochene Erstbefüllungen setzen am Checkpoint fort."""
+    store = get_mirror_store()
+    client = BundestagClient()
+    rps = requests_per_second or load_settings().bundestag.mirror_requests_per_second
+    min_interval = 1.0 / rps if rps and rps > 0 else 0.0
+    results: Dict[str, int] = {}
+    for dataset in datasets:
+        results[dataset] = await _sync_dataset(store, client, dataset, min_interval=min_interval)
+    return results
+
+
+async def mirror_sync_loop() -> None:
+    while True:
+        settings = load_settings().bundestag
+        try:
+            await sync_mirror(settings.mirror_datasets)
+        except Exception:  # pragma: no cover - nächster Versuch folgt
+            logger.warning("Synchronisierung des DIP-Spiegels fehlgeschlagen", exc_info=True)
+        await asyncio.sleep(max(settings.mirror_sync_interval_minutes, 1) * 60)
+
+
+def _mirror_for(dataset: str) -> MirrorStore | None:
+    settings = load_settings().bundestag
+    if dataset not in settings.mirror_datasets:
+        return None
+    return get_mirror_store()
 
 
 _METADATA_CACHE: Tuple[datetime, Dict[str, Any]] | None = None
 _METADATA_TTL = timedelta(hours=6)
+# Ab diesem Alter wird im Hintergrund neu gecrawlt, bevor der Cache abläuft.
+_METADATA_REFRESH_AFTER = _METADATA_TTL - timedelta(hours=1)
+_METADATA_RETRY_DELAY = timedelta(minutes=5)
+_METADATA_PATH = DATA_DIR / "metadata_options.json"
+_BACKGROUND_TASKS: Set["asyncio.Task[Any]"] = set()
+# Zuletzt übernommener Stand der gemeinsamen Dateien (nur in Follower-Workern genutzt).
+_SHARED_STAMPS: Dict[str, Any] = {}
+_SHARED_STATE_INTERVAL = 30.0
+# So lange wartet ein Follower auf die Metadaten-Datei des Leaders, bevor er Platzhalter liefert.
+_FOLLOWER_METADATA_WAIT = 10.0
 
 
 async def _collect_vorgang_metadata(client: BundestagClient) -> Dict[str, Set[Any]]:
@@ -66,27 +634,10 @@ async def _collect_vorgang_metadata(client: BundestagClient) -> Dict[str, Set[An
         data = await client.list_documents("vorgang", params)
         documents = data.get("documents", [])
         for document in documents:
-            wp = document.get("wahlperiode")
-            if isinstance(wp, list):
-                for entry in wp:
-                    if isinstance(entry, int):
-                        wahlperioden.add(entry)
-                    elif isinstance(entry, str) and entry.isdigit():
-                        wahlperioden.add(int(entry))
-            elif isinstance(wp, int):
-                wahlperioden.add(wp)
-            elif isinstance(wp, str) and wp.isdigit():
-                wahlperioden.add(int(wp))
-
-            vt = document.get("vorgangstyp")
-            if isinstance(vt, str) and vt.strip():
-                vorgangstypen.add(vt.strip())
-
-            initiative_values = document.get("initiative")
-            if isinstance(initiative_values, list):
-                for initiative in initiative_values:
-                    if isinstance(initiative, str) and initiative.strip():
-                        initiativen.add(initiative.strip())
+            facets = vorgang_facets(document)
+            wahlperioden.update(int(value) for value in facets["wahlperioden"])
+            vorgangstypen.update(facets["vorgangstypen"])
+            initiativen.update(facets["initiativen"])
 
         next_cursor = data.get("cursor")
         if not next_cursor or next_cursor == seen_cursor:
@@ -117,9 +668,7 @@ async def _collect_drucksache_metadata(client: BundestagClient) -> Set[str]:
             params["cursor"] = cursor
         data = await client.list_documents("drucksache", params)
         for document in data.get("documents", []):
-            typ = document.get("drucksachetyp")
-            if isinstance(typ, str) and typ.strip():
-                drucksachetypen.add(typ.strip())
+            drucksachetypen.update(drucksache_facets(document)["drucksachetypen"])
 
         next_cursor = data.get("cursor")
         if not next_cursor or next_cursor == seen_cursor:
@@ -134,15 +683,169 @@ async def _collect_drucksache_metadata(client: BundestagClient) -> Set[str]:
     return drucksachetypen
 
 
+def _load_persisted_metadata(*, force: bool = False) -> None:
+    global _METADATA_CACHE
+    if (_METADATA_CACHE is not None and not force) or not _METADATA_PATH.exists():
+        return
+    try:
+        stored = json.loads(_METADATA_PATH.read_text(encoding="utf-8"))
+        _METADATA_CACHE = (datetime.fromisoformat(stored["fetched_at"]), stored["payload"])
+    except (OSError, ValueError, KeyError, TypeError):  # pragma: no cover - defekte Datei ignorieren
+        logger.warning("Gespeicherte Metadaten konnten nicht gelesen werden", exc_info=True)
+
+
+def _persist_metadata(fetched_at: datetime, payload: Dict[str, Any]) -> None:
+    write_atomic(
+        _METADATA_PATH,
+        json.dumps({"fetched_at": fetched_at.isoformat(), "payload": payload}, ensure_ascii=False),
+    )
+
+
+def _spawn_background(coro: Any) -> "asyncio.Task[Any]":
+    task = asyncio.ensure_future(coro)
+    _BACKGROUND_TASKS.add(task)
+    task.add_done_callback(_BACKGROUND_TASKS.discard)
+    return task
+
+
+async def _refresh_metadata_options() -> Dict[str, Any]:
+    return await _IN_FLIGHT.run("metadata_options", _crawl_metadata_options)
+
+
+async def _refresh_metadata_quietly() -> None:
+    try:
+        await _refresh_metadata_options()
+    except Exception:  # pragma: no cover - nächster Versuch folgt
+        logger.warning("Aktualisierung der DIP-Metadaten fehlgeschlagen", exc_info=True)
+
+
 async def fetch_metadata_options() -> Dict[str, Any]:
+    snapshot = _facet_snapshot()
+    if snapshot is not None:
+        return snapshot
+    _load_persisted_metadata()
+    cached = _METADATA_CACHE
+    if not is_leader():
+        # Nur der Leader crawlt; Follower lesen dessen Datei (aktualisiert über ``shared_state_loop``).
+        return cached[1] if cached is not None else await _await_leader_metadata()
+    if cached is None:
+        return await _refresh_metadata_options()
+    # Stale-while-revalidate: vorhandene Daten sofort liefern, Crawl läuft im Hintergrund.
+    if datetime.utcnow() - cached[0] >= _METADATA_REFRESH_AFTER:
+        _spawn_background(_refresh_metadata_quietly())
+    return cached[1]
+
+
+def _placeholder_options() -> Dict[str, Any]:
+    return {
+        "wahlperioden": [],
+        "vorgangstypen": [],
+        "initiativen": [],
+        "drucksachetypen": [],
+        "dokumentarten": ["Drucksache", "Plenarprotokoll"],
+        "zuordnungen": ["BT", "BR", "BV", "EK"],
+        "pending": True,
+    }
+
+
+async def _await_leader_metadata() -> Dict[str, Any]:
+    deadline = time.monotonic() + _FOLLOWER_METADATA_WAIT
+    while time.monotonic() < deadline:
+        await asyncio.sleep(0.5)
+        await asyncio.to_thread(_load_persisted_metadata)
+        if _METADATA_CACHE is not None:
+            return _METADATA_CACHE[1]
+    return _placeholder_options()
+
+
+async def metadata_refresh_loop() -> None:
+    """Hält die Metadaten warm: frischt vor Ablauf der TTL auf und wiederholt bei Fehlern."""
+    await asyncio.to_thread(_load_persisted_metadata)
+    while True:
+        if _facet_snapshot() is not None:
+            # Der Facettenindex liefert die Optionen; der Stichproben-Crawl ist dann überflüssig.
+            await asyncio.sleep(_METADATA_RETRY_DELAY.total_seconds())
+            continue
+        cached = _METADATA_CACHE
+        if cached is not None:
+            wait = _METADATA_REFRESH_AFTER - (datetime.utcnow() - cached[0])
+            if wait.total_seconds() > 0:
+                await asyncio.sleep(wait.total_seconds())
+                continue
+        try:
+            await _refresh_metadata_options()
+        except Exception:  # pragma: no cover - nächster Versuch folgt
+            logger.warning("Aktualisierung der DIP-Metadaten fehlgeschlagen", exc_info=True)
+            await asyncio.sleep(_METADATA_RETRY_DELAY.total_seconds())
+
+
+def start_background_tasks() -> None:
+    _spawn_background(metadata_refresh_loop())
+    settings = load_settings().bundestag
+    if settings.facet_index_enabled:
+        _spawn_background(facet_sync_loop())
+    if settings.mirror_datasets:
+        _spawn_background(mirror_sync_loop())
+    if settings.person_index_enabled:
+        _spawn_background(person_index_loop())
+
+
+def _shared_file_changed(path: Path) -> bool:
+    try:
+        stamp = path.stat().st_mtime_ns
+    except FileNotFoundError:
+        return False
+    if _SHARED_STAMPS.get(str(path)) == stamp:
+        return False
+    _SHARED_STAMPS[str(path)] = stamp
+    return True
+
+
+def _reload_shared_state() -> None:
+    settings = load_settings().bundestag
+    if _shared_file_changed(_METADATA_PATH):
+        _load_persisted_metadata(force=True)
+    if settings.person_index_enabled and _shared_file_changed(_PERSONS_PATH):
+        persisted = _load_persisted_persons()
+        if persisted is not None:
+            _install_person_index(*persisted)
+    if settings.facet_index_enabled:
+        index = get_facet_index()
+        synced = tuple(index.state(dataset)["last_sync"] for dataset in FACET_DATASETS)
+        if all(synced) and _SHARED_STAMPS.get("facets") != synced:
+            index.rebuild_snapshot()
+            _SHARED_STAMPS["facets"] = synced
+
+
+async def shared_state_loop() -> None:
+    """Follower-Worker übernehmen Metadaten, Personen- und Facettenindex aus den Dateien des Leaders."""
+    while not is_leader():
+        try:
+            await asyncio.to_thread(_reload_shared_state)
+        except Exception:  # pragma: no cover - nächster Versuch folgt
+            logger.warning("Gemeinsamer Zustand konnte nicht geladen werden", exc_info=True)
+        await asyncio.sleep(_SHARED_STATE_INTERVAL)
+
+
+def start_follower_tasks() -> None:
+    _spawn_background(shared_state_loop())
+
+
+async def stop_background_tasks() -> None:
+    tasks = list(_BACKGROUND_TASKS)
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def _crawl_metadata_options() -> Dict[str, Any]:
     global _METADATA_CACHE
     now = datetime.utcnow()
-    if _METADATA_CACHE and now - _METADATA_CACHE[0] < _METADATA_TTL:
-        return _METADATA_CACHE[1]
-
     client = BundestagClient()
-    vorgang_metadata = await _collect_vorgang_metadata(client)
-    drucksachetypen = await _collect_drucksache_metadata(client)
+    vorgang_metadata, drucksachetypen = await asyncio.gather(
+        _collect_vorgang_metadata(client),
+        _collect_drucksache_metadata(client),
+    )
 
     payload: Dict[str, Any] = {
         "wahlperioden": sorted(vorgang_metadata["wahlperioden"]),
@@ -154,30 +857,167 @@ async def fetch_metadata_options() -> Dict[str, Any]:
     }
 
     _METADATA_CACHE = (now, payload)
+    await asyncio.to_thread(_persist_metadata, now, payload)
     return payload
 
 
+def in_flight_stats() -> Dict[str, int]:
+    return _IN_FLIGHT.stats()
+
+
+async def search_local_index(
+    query: str,
+    *,
+    dataset: str | None = None,
+    wahlperiode: List[int] | None = None,
+    vorgangstyp: List[str] | None = None,
+    initiative: List[str] | None = None,
+    limit: int = 50,
+    offset: int = 0,
+) -> Dict[str, Any]:
+    index = get_search_index()
+    return await asyncio.to_thread(
+        index.search,
+        query,
+        dataset=dataset,
+        wahlperiode=wahlperiode or [],
+        vorgangstyp=vorgangstyp or [],
+        initiative=initiative or [],
+        limit=limit,
+        offset=offset,
+    )
+
+
+_PERSON_INDEX: Tuple[datetime, PersonIndex] | None = None
+_PERSONS_PATH = DATA_DIR / "persons.json"
+_PERSON_PAGE_SIZE = 50
+# Präfix der Cursor, die der lokale Personenindex ausgibt.
+_PERSON_CURSOR = "persons:"
+_PERSON_RETRY_DELAY = timedelta(minutes=15)
+
+
+def _person_option(document: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "id": document.get("id"),
+        "title": document.get("titel") or " ".join(
+            filter(None, [document.get("vorname"), document.get("nachname")])
+        ).strip(),
+        "vorname": document.get("vorname"),
+        "nachname": document.get("nachname"),
+        "fraktion": document.get("fraktion"),
+        "funktion": document.get("funktion"),
+        "wahlperioden": document.get("wahlperiode", []),
+    }
+
+
+def _load_persisted_persons() -> Tuple[datetime, List[Dict[str, Any]]] | None:
+    if not _PERSONS_PATH.exists():
+        return None
+    try:
+        stored = json.loads(_PERSONS_PATH.read_text(encoding="utf-8"))
+        return datetime.fromisoformat(stored["synced_at"]), stored["persons"]
+    except (OSError, ValueError, KeyError, TypeError):  # pragma: no cover - defekte Datei ignorieren
+        logger.warning("Gespeicherter Personenindex konnte nicht gelesen werden", exc_info=True)
+        return None
+
+
+def _install_person_index(synced_at: datetime, persons: List[Dict[str, Any]]) -> None:
+    global _PERSON_INDEX
+    _PERSON_INDEX = (synced_at, PersonIndex(persons))
+
+
+async def refresh_person_index() -> int:
+    """Erstbefüllung mit allen Personen, danach nur die seit dem letzten Abgleich geänderten."""
+    client = BundestagClient()
+    started_at = datetime.utcnow()
+    persisted = await asyncio.to_thread(_load_persisted_persons)
+    persons: Dict[str, Dict[str, Any]] = {}
+    params_base: Dict[str, Any] = {}
+    if persisted is not None:
+        persons = {str(person["id"]): person for person in persisted[1]}
+        since = persisted[0] - _SYNC_OVERLAP
+        params_base["f.aktualisiert.start"] = since.replace(microsecond=0).isoformat()
+
+    cursor: str | None = None
+    while True:
+        params = {**params_base, "cursor": cursor} if cursor else dict(params_base)
+        data = await client.list_documents("person", params, use_cache=False)
+        documents = data.get("documents", [])
+        for document in documents:
+            if document.get("id") is not None:
+                persons[str(document["id"])] = _person_option(document)
+        next_cursor = data.get("cursor")
+        if not documents or not next_cursor or next_cursor == cursor:
+            break
+        cursor = next_cursor
+
+    entries = list(persons.values())
+    await asyncio.to_thread(_install_person_index, started_at, entries)
+    await asyncio.to_thread(
+        write_atomic,
+        _PERSONS_PATH,
+        json.dumps({"synced_at": started_at.isoformat(), "persons": entries}, ensure_ascii=False),
+    )
+    return len(entries)
+
+
+async def person_index_loop() -> None:
+    persisted = await asyncio.to_thread(_load_persisted_persons)
+    if persisted is not None:
+        await asyncio.to_thread(_install_person_index, *persisted)
+    while True:
+        interval = timedelta(hours=max(load_settings().bundestag.person_index_refresh_hours, 1))
+        if _PERSON_INDEX is not None:
+            wait = interval - (datetime.utcnow() - _PERSON_INDEX[0])
+            if wait.total_seconds() > 0:
+                await asyncio.sleep(wait.total_seconds())
+                continue
+        try:
+            await refresh_person_index()
+        except Exception:  # pragma: no cover - nächster Versuch folgt
+            logger.warning("Aktualisierung des Personenindex fehlgeschlagen", exc_info=True)
+            await asyncio.sleep(_PERSON_RETRY_DELAY.total_seconds())
+
+
+def _person_offset(cursor: str) -> int:
+    value = cursor[len(_PERSON_CURSOR):]
+    if not value.isdigit():
+        raise InvalidCursor(f"Ungültiger Cursor für die Personensuche: {cursor}")
+    return int(value)
+
+
+def _search_person_index(query: str, cursor: str | None) -> Dict[str, Any] | None:
+    if _PERSON_INDEX is None or not load_settings().bundestag.person_index_enabled:
+        return None
+    if cursor and not cursor.startswith(_PERSON_CURSOR):
+        return None
+    offset = _person_offset(cursor) if cursor else 0
+    options, total = _PERSON_INDEX[1].search(query, limit=_PERSON_PAGE_SIZE, offset=offset)
+    next_offset = offset + len(options)
+    return {
+        "options": options,
+        "cursor": f"{_PERSON_CURSOR}{next_offset}" if next_offset < total else None,
+        "numFound": total,
+    }
+
+
 async def search_persons(query: str, cursor: str | None = None) -> Dict[str, Any]:
+    # Lokal beantworten, sobald der Index geladen ist; sonst wie bisher beim DIP nachfragen.
+    local = _search_person_index(query, cursor)
+    if local is not None:
+        return local
     client = BundestagClient()
     params: Dict[str, Any] = {}
     if query.strip():
         params["f.person"] = [query.strip()]
+    if cursor and cursor.startswith(_PERSON_CURSOR):
+        # Index-Cursor kennt das DIP nicht (Index nicht mehr geladen): von vorn beginnen.
+        cursor = None
     if cursor:
         params["cursor"] = cursor
 
     data = await client.list_documents("person", params)
-    options: List[Dict[str, Any]] = []
-    for document in data.get("documents", []):
-        entry = {
-            "id": document.get("id"),
-            "title": document.get("titel") or " ".join(
-                filter(None, [document.get("vorname"), document.get("nachname")])
-            ).strip(),
-            "fraktion": document.get("fraktion"),
-            "funktion": document.get("funktion"),
-            "wahlperioden": document.get("wahlperiode", []),
-        }
-        options.append(entry)
+    options = [_person_option(document) for document in data.get("documents", [])]
 
     return {
         "options": options,
@@ -0,0 +1,316 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Optional, TypeVar
+
+
+T = TypeVar("T")
+
+# Zugriffszeiten auf der Platte werden gesammelt geschrieben, spätestens nach
+# ``_FLUSH_BATCH`` Einträgen oder ``_FLUSH_INTERVAL`` Sekunden.
+_FLUSH_BATCH = 256
+_FLUSH_INTERVAL = 30.0
+# Die Verdrängung nach ``max_rows`` läuft nur bei jedem ``_EVICT_EVERY``-ten Schreibvorgang.
+_EVICT_EVERY = 100
+
+
+@dataclass
+class CacheEntry:
+    value: Any
+    expires_at: float
+    size: int
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+    @property
+    def fresh(self) -> bool:
+        return time.time() < self.expires_at
+
+
+def make_cache_key(endpoint: str, params: Dict[str, Any] | None = None) -> str:
+    normalized: Dict[str, Any] = {}
+    for key, value in (params or {}).items():
+        if value in (None, "", []):
+            continue
+        if isinstance(value, (list, tuple, set)):
+            value = sorted(value, key=str)
+        normalized[key] = value
+    return f"{endpoint.strip('/')}?{json.dumps(normalized, sort_keys=True, ensure_ascii=False, default=str)}"
+
+
+class ResponseCache:
+    """LRU-Cache mit Speicherbudget und optionaler SQLite-Persistenz.
+
+    Einträge bleiben nach Ablauf erhalten, damit sie per ETag/Last-Modified
+    revalidiert werden können; erst das Speicherbudget verdrängt sie.
+    Aus der Event-Loop ``aget``/``aset`` verwenden: SQLite-Zugriffe laufen dann in einem Thread.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_bytes: int,
+        db_path: Path | None = None,
+        table: str = "responses",
+        max_rows: int | None = None,
+    ) -> None:
+        self.max_bytes = max_bytes
+        self.max_rows = max_rows
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self._table = table
+        self._db: sqlite3.Connection | None = None
+        # Noch nicht geschriebene Zugriffszeiten und per ``touch`` verlängerte Ablaufzeiten.
+        self._accessed: Dict[str, float] = {}
+        self._extended: Dict[str, float] = {}
+        self._flushed_at = time.monotonic()
+        self._writes = 0
+        self.hits = 0
+        self.misses = 0
+        self.revalidations = 0
+        self.evictions = 0
+        if db_path is not None:
+            self._open_db(db_path)
+
+    def _open_db(self, db_path: Path) -> None:
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(db_path), check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            f"CREATE TABLE IF NOT EXISTS {self._table} ("
+            "key TEXT PRIMARY KEY, body BLOB NOT NULL, expires_at REAL NOT NULL, "
+            "etag TEXT, last_modified TEXT, accessed_at REAL)"
+        )
+        try:
+            self._db.execute(f"ALTER TABLE {self._table} ADD COLUMN accessed_at REAL")
+        except sqlite3.OperationalError:
+            pass
+        # Lange abgelaufene Einträge ohne Nutzen für Revalidierung entfernen.
+        self._db.execute(f"DELETE FROM {self._table} WHERE expires_at < ?", (time.time() - 7 * 86400,))
+
+    @property
+    def persistent(self) -> bool:
+        return self._db is not None
+
+    def get(self, key: str) -> CacheEntry | None:
+        """Liefert den Eintrag auch dann, wenn er abgelaufen ist; ``entry.fresh`` prüfen."""
+        entry = self._memory_get(key)
+        if entry is not None and entry.fresh:
+            return entry
+        return self._merge(key, entry, self._load(key))
+
+    async def aget(self, key: str) -> CacheEntry | None:
+        """Wie ``get``; nur Speichertreffer werden direkt in der Event-Loop beantwortet."""
+        entry = self._memory_get(key)
+        if (entry is not None and entry.fresh) or self._db is None:
+            return entry
+        return self._merge(key, entry, await asyncio.to_thread(self._load, key))
+
+    def _memory_get(self, key: str) -> CacheEntry | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def _merge(self, key: str, entry: CacheEntry | None, stored: CacheEntry | None) -> CacheEntry | None:
+        # Abgelaufen oder unbekannt: ein anderer Worker hat den Eintrag evtl. schon erneuert.
+        if stored is not None and (entry is None or stored.expires_at > entry.expires_at):
+            with self._lock:
+                self._insert(key, stored)
+            return stored
+        return entry
+
+    def record_hit(self) -> None:
+        self.hits += 1
+
+    def record_miss(self) -> None:
+        self.misses += 1
+
+    def set(
+        self,
+        key: str,
+        value: Any,
+        *,
+        ttl: float,
+        size: int | None = None,
+        etag: str | None = None,
+        last_modified: str | None = None,
+        body: bytes | None = None,
+    ) -> CacheEntry:
+        if body is None:
+            body = json.dumps(value, ensure_ascii=False).encode("utf-8")
+        entry = CacheEntry(
+            value=value,
+            expires_at=time.time() + ttl,
+            size=size if size is not None else len(body),
+            etag=etag,
+            last_modified=last_modified,
+        )
+        with self._lock:
+            self._insert(key, entry)
+        self._store(key, entry, body)
+        return entry
+
+    async def aset(self, key: str, value: Any, **kwargs: Any) -> CacheEntry:
+        """Wie ``set``; Serialisierung und Schreibzugriff laufen in einem Thread."""
+        if self._db is None:
+            return self.set(key, value, **kwargs)
+        return await asyncio.to_thread(self.set, key, value, **kwargs)
+
+    def touch(self, key: str, *, ttl: float) -> CacheEntry | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            entry.expires_at = time.time() + ttl
+            self._entries.move_to_end(key)
+            self.revalidations += 1
+            if self._db is not None:
+                # Wird mit den Zugriffszeiten gesammelt geschrieben.
+                self._extended[key] = entry.expires_at
+        return entry
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+            self._accessed.clear()
+            self._extended.clear()
+            if self._db is not None:
+                self._db.execute(f"DELETE FROM {self._table}")
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self._size,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "revalidations": self.revalidations,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+            "persistent": self.persistent,
+        }
+
+    def _insert(self, key: str, entry: CacheEntry) -> None:
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self._size -= previous.size
+        if entry.size > self.max_bytes:
+            return
+        self._entries[key] = entry
+        self._size += entry.size
+        while self._size > self.max_bytes and self._entries:
+            _, evicted = self._entries.popitem(last=False)
+            self._size -= evicted.size
+            self.evictions += 1
+
+    def _load(self, key: str) -> CacheEntry | None:
+        if self._db is None:
+            return None
+        with self._lock:
+            row = self._db.execute(
+                f"SELECT body, expires_at, etag, last_modified FROM {self._table} WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None:
+                self._accessed[key] = time.time()
+                self._flush()
+        if row is None:
+            return None
+        body, expires_at, etag, last_modified = row
+        try:
+            value = json.loads(body)
+        except ValueError:
+            return None
+        return CacheEntry(value=value, expires_at=expires_at, size=len(body), etag=etag, last_modified=last_modified)
+
+    def _store(self, key: str, entry: CacheEntry, body: bytes) -> None:
+        if self._db is None:
+            return
+        with self._lock:
+            self._db.execute(
+                f"INSERT OR REPLACE INTO {self._table} (key, body, expires_at, etag, last_modified, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, body, entry.expires_at, entry.etag, entry.last_modified, time.time()),
+            )
+            self._accessed.pop(key, None)
+            self._extended.pop(key, None)
+            self._writes += 1
+            if self.max_rows is not None and self._writes % _EVICT_EVERY == 0:
+                # Auf der Platte nach letztem Zugriff verdrängen (Speicher-LRU arbeitet unabhängig davon);
+                # bis zum nächsten Lauf darf die Tabelle um bis zu ``_EVICT_EVERY`` Zeilen überlaufen.
+                self._flush(force=True)
+                self._db.execute(
+                    f"DELETE FROM {self._table} WHERE key IN (SELECT key FROM {self._table} "
+                    "ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                    (self.max_rows,),
+                )
+            else:
+                self._flush()
+
+    def _flush(self, *, force: bool = False) -> None:
+        """Schreibt gesammelte Zugriffs- und Ablaufzeiten in einer Transaktion; Aufrufer hält ``_lock``."""
+        if self._db is None or not (self._accessed or self._extended):
+            return
+        pending = len(self._accessed) + len(self._extended)
+        if not force and pending < _FLUSH_BATCH and time.monotonic() - self._flushed_at < _FLUSH_INTERVAL:
+            return
+        accessed, self._accessed = self._accessed, {}
+        extended, self._extended = self._extended, {}
+        self._flushed_at = time.monotonic()
+        # Die Verbindung läuft im Autocommit-Modus; der Stapel braucht eine eigene Transaktion.
+        self._db.execute("BEGIN")
+        try:
+            self._db.executemany(
+                f"UPDATE {self._table} SET accessed_at = ? WHERE key = ?", [(at, key) for key, at in accessed.items()]
+            )
+            self._db.executemany(
+                f"UPDATE {self._table} SET expires_at = ? WHERE key = ?", [(at, key) for key, at in extended.items()]
+            )
+        except BaseException:
+            self._db.execute("ROLLBACK")
+            raise
+        self._db.execute("COMMIT")
+
+
+class SingleFlight:
+    """Bündelt gleichzeitige Aufrufe mit gleichem Schlüssel auf eine gemeinsame Ausführung."""
+
+    def __init__(self) -> None:
+        self._calls: Dict[str, "asyncio.Future[Any]"] = {}
+        self.started = 0
+        self.coalesced = 0
+
+    async def run(self, key: str, factory: Callable[[], Awaitable[T]]) -> T:
+        task = self._calls.get(key)
+        if task is None or task.get_loop() is not asyncio.get_running_loop():
+            task = asyncio.ensure_future(factory())
+            self._calls[key] = task
+            task.add_done_callback(lambda done, key=key: self._finish(key, done))
+            self.started += 1
+        else:
+            self.coalesced += 1
+        # shield: bricht ein Aufrufer ab, laufen die übrigen weiter.
+        return await asyncio.shield(task)
+
+    def in_flight(self) -> int:
+        return len(self._calls)
+
+    def stats(self) -> Dict[str, int]:
+        return {"in_flight": len(self._calls), "started": self.started, "coalesced": self.coalesced}
+
+    def _finish(self, key: str, task: "asyncio.Future[Any]") -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if not task.cancelled():
+            task.exception()
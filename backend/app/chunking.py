@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import math
+import re
+from typing import List
+
+
+# Grobe Schätzung für deutschsprachige Texte; reicht für die Budgetierung der Abschnitte.
+CHARS_PER_TOKEN = 4
+
+_PARAGRAPH_RE = re.compile(r"\n\s*\n")
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s+(?=[A-ZÄÖÜ0-9„\"(])")
+# Überschriften in Drucksachen und Plenarprotokollen: "I.", "1.", "A.", "§ 3", "Artikel 2", "Anlage", "Tagesordnungspunkt 4" …
+_HEADING_RE = re.compile(
+    r"^\s*(?:[IVXLC]+\.|\d+(?:\.\d+)*\.?|[A-Z]\.|§\s*\d+|Artikel\s+\d+|Anlage\b|Tagesordnungspunkt\b|Zusatzpunkt\b)",
+)
+
+
+def estimate_tokens(text: str) -> int:
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def _split_oversized(paragraph: str, max_chars: int) -> List[str]:
+    pieces: List[str] = []
+    current = ""
+    for sentence in _SENTENCE_RE.split(paragraph):
+        while len(sentence) > max_chars:
+            if current:
+                pieces.append(current)
+                current = ""
+            pieces.append(sentence[:max_chars])
+            sentence = sentence[max_chars:]
+        if current and len(current) + len(sentence) + 1 > max_chars:
+            pieces.append(current)
+            current = sentence
+        else:
+            current = f"{current} {sentence}" if current else sentence
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def split_text(text: str, max_tokens: int) -> List[str]:
+    """Teilt Text an Absatz- bzw. Abschnittsgrenzen in Stücke von höchstens ``max_tokens``.
+
+    Beginnt ein Absatz mit einer Überschrift und ist das aktuelle Stück bereits zur
+    Hälfte gefüllt, wird dort ein neues Stück begonnen, damit Abschnitte zusammenbleiben.
+    """
+    max_chars = max(1, max_tokens) * CHARS_PER_TOKEN
+    paragraphs = [part.strip() for part in _PARAGRAPH_RE.split(text) if part.strip()]
+    chunks: List[str] = []
+    current: List[str] = []
+    size = 0
+
+    def _flush() -> None:
+        nonlocal current, size
+        if current:
+            chunks.append("\n\n".join(current))
+        current, size = [], 0
+
+    for paragraph in paragraphs:
+        pieces = [paragraph] if len(paragraph) <= max_chars else _split_oversized(paragraph, max_chars)
+        for piece in pieces:
+            if size and (size + len(piece) + 2 > max_chars or (_HEADING_RE.match(piece) and size >= max_chars // 2)):
+                _flush()
+            current.append(piece)
+            size += len(piece) + 2
+    _flush()
+    return chunks
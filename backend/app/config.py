@@ -1,14 +1,20 @@
 from __future__ import annotations
 
 import json
+import os
+import tempfile
+import threading
+import time
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 from pydantic import BaseModel, Field
 
 
-CONFIG_DIR = Path(__file__).resolve().parent.parent / "config"
+# Beide Verzeichnisse lassen sich per Umgebungsvariable verlegen (z. B. für Benchmarks).
+CONFIG_DIR = Path(os.environ.get("TAG2_CONFIG_DIR") or Path(__file__).resolve().parent.parent / "config")
 CONFIG_PATH = CONFIG_DIR / "app_config.json"
+DATA_DIR = Path(os.environ.get("TAG2_DATA_DIR") or Path(__file__).resolve().parent.parent / "data")
 
 
 class GeminiSettings(BaseModel):
@@ -20,6 +26,22 @@ class GeminiSettings(BaseModel):
         "und weise auf fehlende Informationen hin."
     )
     temperature: float = 0.3
+    max_concurrency: int = 8
+    request_timeout: float = 120.0
+    max_retries: int = 3
+    retry_base_delay: float = 1.0
+    cache_enabled: bool = True
+    cache_max_bytes: int = 32 * 1024 * 1024
+    cache_max_entries: int = 5000
+    cache_ttl_hours: int = 720
+    chunk_threshold_tokens: int = 60000
+    chunk_max_tokens: int = 12000
+    chunk_concurrency: int = 4
+    batch_concurrency: int = 4
+    context_cache_enabled: bool = True
+    context_cache_min_tokens: int = 4096
+    context_cache_ttl_minutes: int = 60
+    prewarm_sdk: bool = True
 
 
 class BundestagSettings(BaseModel):
@@ -33,6 +55,44 @@ class BundestagSettings(BaseModel):
         }
     )
     default_dataset: str = "vorgang"
+    timeout: float = 30.0
+    connect_timeout: float = 10.0
+    http2: bool = True
+    max_connections: int = 20
+    max_keepalive_connections: int = 10
+    keepalive_expiry: float = 30.0
+    requests_per_second: float = 10.0
+    burst: int = 20
+    max_retries: int = 3
+    retry_base_delay: float = 0.5
+    retry_max_delay: float = 30.0
+    breaker_failure_threshold: int = 5
+    breaker_reset_seconds: float = 30.0
+    prefetch_pages: int = 2
+    prefetch_max_sessions: int = 8
+    batch_fetch_concurrency: int = 8
+    export_requests_per_second: float = 2.0
+    cache_enabled: bool = True
+    cache_max_bytes: int = 64 * 1024 * 1024
+    cache_persist: bool = False
+    cache_ttl_seconds: Dict[str, int] = Field(
+        default_factory=lambda: {
+            "default": 300,
+            "person": 3600,
+            "plenarprotokoll": 3600,
+        }
+    )
+    facet_index_enabled: bool = True
+    facet_sync_interval_minutes: int = 60
+    search_index_enabled: bool = True
+    mirror_datasets: List[str] = Field(default_factory=list)
+    mirror_sync_interval_minutes: int = 360
+    mirror_requests_per_second: float = 2.0
+    serve_from_mirror: bool = False
+    fulltext_workers: int = 2
+    fulltext_max_download_bytes: int = 200 * 1024 * 1024
+    person_index_enabled: bool = True
+    person_index_refresh_hours: int = 24
 
 
 class UISettings(BaseModel):
@@ -40,13 +100,36 @@ class UISettings(BaseModel):
     default_gemini_task: str = "summary"
 
 
+class MetricsSettings(BaseModel):
+    enabled: bool = True
+    server_timing: bool = False
+
+
 class Settings(BaseModel):
     gemini: GeminiSettings = Field(default_factory=GeminiSettings)
     bundestag: BundestagSettings = Field(default_factory=BundestagSettings)
     ui: UISettings = Field(default_factory=UISettings)
+    metrics: MetricsSettings = Field(default_factory=MetricsSettings)
 
 
-def load_settings() -> Settings:
+_SettingsStamp = Tuple[int, int, int] | None
+
+_SETTINGS_LOCK = threading.Lock()
+_SETTINGS_CACHE: Tuple[_SettingsStamp, Settings] | None = None
+_SETTINGS_CHECKED_AT = 0.0
+# Externe Änderungen an der Datei werden spätestens nach dieser Zeit bemerkt.
+_STAT_INTERVAL = 1.0
+
+
+def _file_stamp() -> _SettingsStamp:
+    try:
+        stat = CONFIG_PATH.stat()
+    except FileNotFoundError:
+        return None
+    return (stat.st_mtime_ns, stat.st_ino, stat.st_size)
+
+
+def _read_settings() -> Settings:
     if not CONFIG_PATH.exists():
         return Settings()
     data = CONFIG_PATH.read_text(encoding="utf-8")
@@ -59,17 +142,64 @@ def load_settings() -> Settings:
     return payload
 
 
+def load_settings() -> Settings:
+    """Liefert die prozessweit zwischengespeicherten Einstellungen.
+
+    Die Datei wird nur neu gelesen, wenn sich mtime, Inode oder Größe geändert haben;
+    geprüft wird höchstens einmal pro ``_STAT_INTERVAL``. Das zurückgegebene Objekt
+    wird geteilt und darf nicht verändert werden.
+    """
+    global _SETTINGS_CACHE, _SETTINGS_CHECKED_AT
+    cached = _SETTINGS_CACHE
+    now = time.monotonic()
+    if cached is not None and now - _SETTINGS_CHECKED_AT < _STAT_INTERVAL:
+        return cached[1]
+    with _SETTINGS_LOCK:
+        stamp = _file_stamp()
+        _SETTINGS_CHECKED_AT = now
+        if _SETTINGS_CACHE is not None and _SETTINGS_CACHE[0] == stamp:
+            return _SETTINGS_CACHE[1]
+        settings = _read_settings()
+        _SETTINGS_CACHE = (stamp, settings)
+        return settings
+
+
+def invalidate_settings_cache() -> None:
+    global _SETTINGS_CACHE
+    with _SETTINGS_LOCK:
+        _SETTINGS_CACHE = None
+
+
+def write_atomic(path: Path, text: str) -> None:
+    """Schreibt über Temp-Datei + Rename: Leser sehen nie eine halb geschriebene Datei."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.stem}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as handle:
+            handle.write(text)
+            handle.flush()
+            os.fsync(handle.fileno())
+        os.replace(tmp_name, path)
+    except BaseException:
+        Path(tmp_name).unlink(missing_ok=True)
+        raise
+
+
 def save_settings(settings: Settings) -> None:
+    global _SETTINGS_CACHE
     CONFIG_DIR.mkdir(parents=True, exist_ok=True)
     serialized = json.dumps(
         settings.model_dump(),
         ensure_ascii=False,
         indent=2,
     )
-    CONFIG_PATH.write_text(serialized, encoding="utf-8")
+    write_atomic(CONFIG_PATH, serialized)
+    with _SETTINGS_LOCK:
+        _SETTINGS_CACHE = (_file_stamp(), settings)
 
 
 def update_settings(partial: Dict[str, Any]) -> Settings:
+    invalidate_settings_cache()
     current = load_settings()
     updated_data = current.model_dump()
     for namespace, values in partial.items():
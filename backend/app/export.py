@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+import csv
+import io
+import json
+import logging
+from typing import Any, AsyncGenerator, Awaitable, Callable, Dict, List, Sequence
+
+from .bundestag import iter_dataset_pages
+
+
+logger = logging.getLogger(__name__)
+
+EXPORT_FORMATS = {"ndjson": "application/x-ndjson", "csv": "text/csv; charset=utf-8"}
+
+
+def _values(value: Any, path: Sequence[str]) -> List[Any]:
+    if isinstance(value, list):
+        return [found for item in value for found in _values(item, path)]
+    if not path:
+        return [] if value is None else [value]
+    if not isinstance(value, dict) or path[0] not in value:
+        return []
+    return _values(value[path[0]], path[1:])
+
+
+def csv_cell(document: Dict[str, Any], field: str) -> str:
+    """Wert eines Feldes (Punktnotation) als Zelle; Listen werden mit ``; `` verbunden, Objekte als JSON."""
+    values = _values(document, field.split("."))
+    return "; ".join(
+        json.dumps(value, ensure_ascii=False) if isinstance(value, (dict, list)) else str(value) for value in values
+    )
+
+
+def _columns(fields: Sequence[str] | None, document: Dict[str, Any] | None) -> List[str]:
+    if fields:
+        return ["id", *(field for field in fields if field != "id")]
+    # Ohne Feldauswahl bestimmen die Schlüssel des ersten Dokuments die Spalten.
+    return list(document) if document else ["id"]
+
+
+async def export_dataset(
+    dataset: str,
+    params: Dict[str, Any],
+    export_format: str,
+    *,
+    fields: Sequence[str] | None = None,
+    limit: int | None = None,
+    is_disconnected: Callable[[], Awaitable[bool]] | None = None,
+) -> AsyncGenerator[str, None]:
+    """Liefert den Export seitenweise als Text; es liegt nie mehr als eine DIP-Seite im Speicher.
+
+    Die erste Seite wird beim ersten ``anext`` geladen, damit der Aufrufer Fehler noch
+    vor dem Antwortkopf in einen HTTP-Status übersetzen kann; spätere Fehler werden weitergereicht.
+    """
+    pages = iter_dataset_pages(dataset, params, fields=fields, limit=limit)
+    columns: List[str] | None = None
+    started = False
+    try:
+        async for page in pages:
+            documents = page.get("documents", [])
+            if export_format == "csv":
+                buffer = io.StringIO()
+                writer = csv.writer(buffer)
+                if columns is None:
+                    columns = _columns(fields, documents[0] if documents else None)
+                    writer.writerow(columns)
+                for document in documents:
+                    writer.writerow([csv_cell(document, column) for column in columns])
+                chunk = buffer.getvalue()
+            else:
+                chunk = "".join(json.dumps(document, ensure_ascii=False) + "\n" for document in documents)
+            started = True
+            yield chunk
+            if is_disconnected is not None and await is_disconnected():
+                return
+    except Exception as exc:
+        if not started:
+            raise
+        # Der Antwortkopf ist schon gesendet: NDJSON erhält eine Fehlerzeile; danach wird die
+        # Übertragung in jedem Format abgebrochen, damit kein gekürzter Export vollständig wirkt.
+        logger.warning("Export von %s abgebrochen", dataset, exc_info=True)
+        if export_format == "ndjson":
+            yield json.dumps({"error": str(exc)}, ensure_ascii=False) + "\n"
+        raise
+    finally:
+        await pages.aclose()
@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+import os
+from pathlib import Path
+from typing import Iterator, TextIO
+from xml.etree import ElementTree
+
+
+# Die Funktionen laufen in einem separaten Prozess und importieren daher nichts aus dem Rest der App.
+
+# Absatzartige Elemente in Plenarprotokoll-XML (dbtplenarprotokoll.dtd).
+_XML_BLOCKS = {"p", "kommentar", "name", "zitat"}
+# Inhaltsverzeichnis und Rednerliste wiederholen nur den Sitzungsverlauf.
+_XML_SKIPPED = {"vorspann", "rednerliste", "inhaltsverzeichnis"}
+
+
+class ExtractionUnavailable(RuntimeError):
+    pass
+
+
+def _normalize(text: str) -> str:
+    return " ".join(text.split())
+
+
+def _pdf_pages(source: Path) -> Iterator[str]:
+    try:
+        from pypdf import PdfReader
+    except ImportError as exc:  # pragma: no cover - optionale Abhängigkeit
+        raise ExtractionUnavailable("Für PDF-Volltexte wird das Paket 'pypdf' benötigt.") from exc
+    reader = PdfReader(str(source))
+    for page in reader.pages:
+        text = (page.extract_text() or "").strip()
+        if text:
+            yield text
+
+
+def _block_text(element: ElementTree.Element) -> str:
+    redner = element.find("redner")
+    if redner is not None:
+        # Der Rednername steht strukturiert und als Fließtext im Element; der Fließtext genügt.
+        return _normalize(redner.tail or "") or _normalize("".join(redner.itertext()))
+    return _normalize("".join(element.itertext()))
+
+
+def _xml_blocks(source: Path) -> Iterator[str]:
+    skipped = 0
+    block_depth = 0
+    for event, element in ElementTree.iterparse(str(source), events=("start", "end")):
+        if element.tag in _XML_SKIPPED:
+            skipped += 1 if event == "start" else -1
+            if event == "end":
+                element.clear()
+            continue
+        if skipped or element.tag not in _XML_BLOCKS:
+            continue
+        if event == "start":
+            block_depth += 1
+            continue
+        block_depth -= 1
+        if block_depth == 0:
+            text = _block_text(element)
+            element.clear()
+            if text:
+                yield text
+
+
+def _write_blocks(blocks: Iterator[str], target: TextIO) -> int:
+    written = 0
+    for block in blocks:
+        if written:
+            target.write("\n\n")
+        target.write(block)
+        written += len(block)
+    return written
+
+
+def extract_to_file(source: str, target: str, kind: str) -> int:
+    """Extrahiert Text aus ``source`` nach ``target`` und liefert die Zeichenanzahl.
+
+    Geschrieben wird blockweise in eine temporäre Datei, die erst am Ende an ihren
+    Platz wandert; auch große Plenarprotokolle liegen so nie vollständig im Speicher.
+    """
+    source_path, target_path = Path(source), Path(target)
+    partial = target_path.with_suffix(f".{os.getpid()}.part")
+    try:
+        with partial.open("w", encoding="utf-8") as handle:
+            if kind == "pdf":
+                written = _write_blocks(_pdf_pages(source_path), handle)
+            else:
+                written = _write_blocks(_xml_blocks(source_path), handle)
+                if not written:
+                    # Kein Plenarprotokoll-Format: gesamten Textinhalt übernehmen.
+                    root = ElementTree.parse(str(source_path)).getroot()
+                    written = _write_blocks(iter([_normalize("".join(root.itertext()))]), handle)
+        os.replace(partial, target_path)
+    finally:
+        partial.unlink(missing_ok=True)
+    return written
@@ -0,0 +1,185 @@
+from __future__ import annotations
+
+import sqlite3
+import threading
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Set, Tuple
+
+
+FacetValues = Dict[str, Set[str]]
+
+# Facetten, die aus dem jeweiligen Datensatz in den Index übernommen werden.
+FACET_DATASETS = ("vorgang", "drucksache")
+
+
+def _wahlperioden(value: Any) -> Set[str]:
+    entries = value if isinstance(value, list) else [value]
+    result: Set[str] = set()
+    for entry in entries:
+        if isinstance(entry, int):
+            result.add(str(entry))
+        elif isinstance(entry, str) and entry.isdigit():
+            result.add(str(int(entry)))
+    return result
+
+
+def _strings(value: Any) -> Set[str]:
+    entries = value if isinstance(value, list) else [value]
+    return {entry.strip() for entry in entries if isinstance(entry, str) and entry.strip()}
+
+
+def vorgang_facets(document: Dict[str, Any]) -> FacetValues:
+    return {
+        "wahlperioden": _wahlperioden(document.get("wahlperiode")),
+        "vorgangstypen": _strings(document.get("vorgangstyp")),
+        "initiativen": _strings(document.get("initiative")),
+    }
+
+
+def drucksache_facets(document: Dict[str, Any]) -> FacetValues:
+    return {"drucksachetypen": _strings(document.get("drucksachetyp"))}
+
+
+_EXTRACTORS = {
+    "vorgang": vorgang_facets,
+    "drucksache": drucksache_facets,
+}
+
+
+class FacetIndex:
+    """Persistenter Facettenindex mit Zählern je Wert.
+
+    Pro Dokument werden die zuletzt gesehenen Facettenwerte gespeichert, damit
+    inkrementelle Updates alte Werte korrekt herunterzählen können.
+    """
+
+    def __init__(self, db_path: Path) -> None:
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(db_path), check_same_thread=False)
+        self._lock = threading.Lock()
+        self._snapshot: Dict[str, Any] | None = None
+        with self._lock, self._db:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS document_facets (
+                    dataset TEXT NOT NULL,
+                    id TEXT NOT NULL,
+                    facet TEXT NOT NULL,
+                    value TEXT NOT NULL,
+                    PRIMARY KEY (dataset, id, facet, value)
+                );
+                CREATE TABLE IF NOT EXISTS facet_counts (
+                    facet TEXT NOT NULL,
+                    value TEXT NOT NULL,
+                    count INTEGER NOT NULL,
+                    PRIMARY KEY (facet, value)
+                );
+                CREATE TABLE IF NOT EXISTS sync_state (
+                    dataset TEXT PRIMARY KEY,
+                    cursor TEXT,
+                    seeded INTEGER NOT NULL DEFAULT 0,
+                    last_sync TEXT,
+                    started_at TEXT
+                );
+                """
+            )
+
+    def state(self, dataset: str) -> Dict[str, Any]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT cursor, seeded, last_sync, started_at FROM sync_state WHERE dataset = ?", (dataset,)
+            ).fetchone()
+        if row is None:
+            return {"cursor": None, "seeded": False, "last_sync": None, "started_at": None}
+        return {"cursor": row[0], "seeded": bool(row[1]), "last_sync": row[2], "started_at": row[3]}
+
+    def save_state(self, dataset: str, **values: Any) -> None:
+        state = {**self.state(dataset), **values}
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO sync_state (dataset, cursor, seeded, last_sync, started_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (dataset, state["cursor"], int(state["seeded"]), state["last_sync"], state["started_at"]),
+            )
+
+    def is_seeded(self) -> bool:
+        return all(self.state(dataset)["seeded"] for dataset in FACET_DATASETS)
+
+    def apply(self, dataset: str, documents: Iterable[Dict[str, Any]], *, cursor: str | None = None) -> int:
+        """Übernimmt eine Seite Dokumente und speichert optional den Cursor in derselben Transaktion."""
+        extractor = _EXTRACTORS[dataset]
+        delta: Counter[Tuple[str, str]] = Counter()
+        applied = 0
+        with self._lock, self._db:
+            for document in documents:
+                doc_id = document.get("id")
+                if doc_id is None:
+                    continue
+                doc_id = str(doc_id)
+                new_pairs = {(facet, value) for facet, values in extractor(document).items() for value in values}
+                old_pairs = set(
+                    self._db.execute(
+                        "SELECT facet, value FROM document_facets WHERE dataset = ? AND id = ?", (dataset, doc_id)
+                    ).fetchall()
+                )
+                for pair in old_pairs - new_pairs:
+                    delta[pair] -= 1
+                for pair in new_pairs - old_pairs:
+                    delta[pair] += 1
+                if old_pairs != new_pairs:
+                    self._db.execute("DELETE FROM document_facets WHERE dataset = ? AND id = ?", (dataset, doc_id))
+                    self._db.executemany(
+                        "INSERT INTO document_facets (dataset, id, facet, value) VALUES (?, ?, ?, ?)",
+                        [(dataset, doc_id, facet, value) for facet, value in new_pairs],
+                    )
+                applied += 1
+            for (facet, value), change in delta.items():
+                if change:
+                    self._db.execute(
+                        "INSERT INTO facet_counts (facet, value, count) VALUES (?, ?, ?) "
+                        "ON CONFLICT (facet, value) DO UPDATE SET count = count + excluded.count",
+                        (facet, value, change),
+                    )
+            self._db.execute("DELETE FROM facet_counts WHERE count <= 0")
+            if cursor is not None:
+                self._db.execute(
+                    "INSERT INTO sync_state (dataset, cursor) VALUES (?, ?) "
+                    "ON CONFLICT (dataset) DO UPDATE SET cursor = excluded.cursor",
+                    (dataset, cursor),
+                )
+        return applied
+
+    def counts(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            rows = self._db.execute("SELECT facet, value, count FROM facet_counts").fetchall()
+        result: Dict[str, Dict[str, int]] = {}
+        for facet, value, count in rows:
+            result.setdefault(facet, {})[value] = count
+        return result
+
+    def rebuild_snapshot(self) -> Dict[str, Any]:
+        counts = self.counts()
+
+        def _sorted(facet: str, numeric: bool = False) -> List[Any]:
+            values = counts.get(facet, {})
+            if numeric:
+                return sorted(int(value) for value in values)
+            return sorted(values)
+
+        synced = [self.state(dataset)["last_sync"] for dataset in FACET_DATASETS]
+        self._snapshot = {
+            "wahlperioden": _sorted("wahlperioden", numeric=True),
+            "vorgangstypen": _sorted("vorgangstypen"),
+            "initiativen": _sorted("initiativen"),
+            "drucksachetypen": _sorted("drucksachetypen"),
+            "dokumentarten": ["Drucksache", "Plenarprotokoll"],
+            "zuordnungen": ["BT", "BR", "BV", "EK"],
+            "counts": counts,
+            "synced_at": min((value for value in synced if value), default=None),
+        }
+        return self._snapshot
+
+    def snapshot(self) -> Dict[str, Any] | None:
+        return self._snapshot
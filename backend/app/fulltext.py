@@ -0,0 +1,188 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import multiprocessing
+import sqlite3
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, Tuple
+
+from .bundestag import fetch_document, get_http_client
+from .cache import SingleFlight
+from .config import DATA_DIR, load_settings
+from .extraction import extract_to_file
+
+
+# Innerhalb dieses Zeitraums wird ein gecachter Volltext ohne Rückfrage beim Server ausgeliefert.
+_REVALIDATE_AFTER = timedelta(hours=24)
+
+_FULLTEXT_CACHE: "FulltextCache | None" = None
+_EXTRACTION_POOL: Tuple[int, ProcessPoolExecutor] | None = None
+_IN_FLIGHT = SingleFlight()
+
+
+class FulltextTooLarge(ValueError):
+    pass
+
+
+class FulltextCache:
+    """Extrahierte Volltexte auf der Platte, adressiert über Quell-URL und Prüfsumme der Quelldatei."""
+
+    def __init__(self, directory: Path) -> None:
+        directory.mkdir(parents=True, exist_ok=True)
+        self.directory = directory
+        self._db = sqlite3.connect(str(directory / "index.sqlite3"), check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._db:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                """
+                CREATE TABLE IF NOT EXISTS sources (
+                    url TEXT PRIMARY KEY,
+                    checksum TEXT NOT NULL,
+                    etag TEXT,
+                    last_modified TEXT,
+                    checked_at TEXT NOT NULL
+                )
+                """
+            )
+
+    def text_path(self, url: str, checksum: str) -> Path:
+        digest = hashlib.sha256(f"{url}\0{checksum}".encode("utf-8")).hexdigest()
+        return self.directory / f"{digest}.txt"
+
+    def lookup(self, url: str) -> Dict[str, Any] | None:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT checksum, etag, last_modified, checked_at FROM sources WHERE url = ?", (url,)
+            ).fetchone()
+        if row is None or not self.text_path(url, row[0]).exists():
+            return None
+        return {
+            "checksum": row[0],
+            "etag": row[1],
+            "last_modified": row[2],
+            "checked_at": datetime.fromisoformat(row[3]),
+        }
+
+    def record(self, url: str, checksum: str, etag: str | None, last_modified: str | None) -> None:
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO sources (url, checksum, etag, last_modified, checked_at) VALUES (?, ?, ?, ?, ?)",
+                (url, checksum, etag, last_modified, datetime.utcnow().isoformat()),
+            )
+
+    def touch(self, url: str) -> None:
+        with self._lock, self._db:
+            self._db.execute("UPDATE sources SET checked_at = ? WHERE url = ?", (datetime.utcnow().isoformat(), url))
+
+
+def get_fulltext_cache() -> FulltextCache:
+    global _FULLTEXT_CACHE
+    if _FULLTEXT_CACHE is None:
+        _FULLTEXT_CACHE = FulltextCache(DATA_DIR / "fulltext")
+    return _FULLTEXT_CACHE
+
+
+def _extraction_pool() -> ProcessPoolExecutor:
+    global _EXTRACTION_POOL
+    workers = max(1, load_settings().bundestag.fulltext_workers)
+    if _EXTRACTION_POOL is None or _EXTRACTION_POOL[0] != workers:
+        if _EXTRACTION_POOL is not None:
+            _EXTRACTION_POOL[1].shutdown(wait=False)
+        # spawn statt fork: der Elternprozess hat bereits Threads (Executor, SQLite).
+        context = multiprocessing.get_context("spawn")
+        _EXTRACTION_POOL = (workers, ProcessPoolExecutor(max_workers=workers, mp_context=context))
+    return _EXTRACTION_POOL[1]
+
+
+def shutdown_extraction_pool() -> None:
+    global _EXTRACTION_POOL
+    pool, _EXTRACTION_POOL = _EXTRACTION_POOL, None
+    if pool is not None:
+        pool[1].shutdown(wait=False, cancel_futures=True)
+
+
+def _source_urls(document: Dict[str, Any]) -> Dict[str, str]:
+    fundstelle = document.get("fundstelle") if isinstance(document.get("fundstelle"), dict) else {}
+    urls: Dict[str, str] = {}
+    for kind in ("xml", "pdf"):
+        url = fundstelle.get(f"{kind}_url") or document.get(f"{kind}_url")
+        if isinstance(url, str) and url:
+            urls[kind] = url
+    return urls
+
+
+async def _download(url: str, target: Path, cached: Dict[str, Any] | None) -> Tuple[str, str | None, str | None] | None:
+    """Lädt die Quelle gestreamt herunter; ``None`` bedeutet, dass die gecachte Fassung aktuell ist."""
+    headers: Dict[str, str] = {}
+    if cached is not None:
+        if cached["etag"]:
+            headers["If-None-Match"] = cached["etag"]
+        if cached["last_modified"]:
+            headers["If-Modified-Since"] = cached["last_modified"]
+    max_bytes = load_settings().bundestag.fulltext_max_download_bytes
+    digest = hashlib.sha256()
+    size = 0
+    async with get_http_client().stream("GET", url, headers=headers, follow_redirects=True) as response:
+        if response.status_code == 304 and cached is not None:
+            return None
+        response.raise_for_status()
+        with target.open("wb") as handle:
+            async for block in response.aiter_bytes(1 << 16):
+                size += len(block)
+                if size > max_bytes:
+                    raise FulltextTooLarge(f"Quelldatei überschreitet {max_bytes // (1024 * 1024)} MB")
+                digest.update(block)
+                handle.write(block)
+        return digest.hexdigest(), response.headers.get("etag"), response.headers.get("last-modified")
+
+
+async def _resolve_text(url: str, kind: str) -> Tuple[Path, bool]:
+    cache = get_fulltext_cache()
+    cached = await asyncio.to_thread(cache.lookup, url)
+    if cached is not None and datetime.utcnow() - cached["checked_at"] < _REVALIDATE_AFTER:
+        return cache.text_path(url, cached["checksum"]), True
+
+    with tempfile.TemporaryDirectory(dir=cache.directory) as scratch:
+        source = Path(scratch) / f"source.{kind}"
+        downloaded = await _download(url, source, cached)
+        if downloaded is None:
+            assert cached is not None
+            await asyncio.to_thread(cache.touch, url)
+            return cache.text_path(url, cached["checksum"]), True
+        checksum, etag, last_modified = downloaded
+        target = cache.text_path(url, checksum)
+        reused = target.exists()
+        if not reused:
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(_extraction_pool(), extract_to_file, str(source), str(target), kind)
+    await asyncio.to_thread(cache.record, url, checksum, etag, last_modified)
+    return target, reused
+
+
+async def fetch_fulltext(dataset: str, document_id: str, source: str | None = None) -> Dict[str, Any]:
+    """Volltext eines Dokuments aus seiner PDF- bzw. XML-Fundstelle; XML wird bevorzugt."""
+    document = await fetch_document(dataset, document_id)
+    urls = _source_urls(document)
+    if source:
+        urls = {kind: url for kind, url in urls.items() if kind == source}
+    if not urls:
+        raise LookupError("Für dieses Dokument ist keine PDF- oder XML-Fundstelle hinterlegt.")
+    kind, url = next(iter(urls.items()))
+    path, cached = await _IN_FLIGHT.run(url, lambda: _resolve_text(url, kind))
+    text = await asyncio.to_thread(path.read_text, encoding="utf-8")
+    return {
+        "id": document.get("id", document_id),
+        "dataset": dataset,
+        "titel": document.get("titel"),
+        "source": kind,
+        "url": url,
+        "text": text,
+        "chars": len(text),
+        "cached": cached,
+    }
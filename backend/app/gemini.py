@@ -1,15 +1,43 @@
 from __future__ import annotations
 
 import asyncio
+import hashlib
+import importlib
+import json
+import logging
+import random
+import threading
+import time
+from contextlib import aclosing
 from functools import lru_cache
-from typing import Any, Dict
+from typing import TYPE_CHECKING, Any, AsyncGenerator, Awaitable, Callable, Dict, List, Tuple, TypeVar
 
-from google import genai
-from google.genai import types
+from . import metrics, startup
+from .cache import ResponseCache, SingleFlight
+from .chunking import estimate_tokens, split_text
+from .config import DATA_DIR, GeminiSettings, load_settings
 
-from .config import load_settings
+if TYPE_CHECKING:
+    from google import genai
+    from google.genai import types
 
 
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+_RETRYABLE_STATUS = {408, 429, 500, 502, 503, 504}
+_LIMITER: Tuple[int, asyncio.Semaphore] | None = None
+_RESULT_CACHE: ResponseCache | None = None
+_IN_FLIGHT = SingleFlight()
+# Dokument-Hash -> (Name des Gemini-Kontextcaches, Ablaufzeitpunkt).
+_CONTEXT_CACHES: Dict[str, Tuple[str, float]] = {}
+# Kurz vor Ablauf wird ein Handle nicht mehr verwendet, sondern neu angelegt.
+_CONTEXT_CACHE_MARGIN = 60.0
+# Das SDK wird erst beim ersten Gemini-Aufruf (oder per ``prewarm_sdk``) importiert.
+_SDK: Any = None
+_SDK_LOCK = threading.Lock()
+
 TASK_PROMPTS = {
     "summary": "Erstelle eine kurze, gut strukturierte Zusammenfassung in {language}.",
     "bullet_points": "Fasse die wichtigsten Inhalte in prägnanten Stichpunkten in {language} zusammen.",
@@ -17,13 +45,41 @@ TASK_PROMPTS = {
     "translation": "Übersetze den folgenden Inhalt präzise in {language}.",
 }
 
+MAP_PROMPT = (
+    "Fasse den folgenden Abschnitt {index}/{total} eines längeren Dokuments vollständig und "
+    "faktengetreu in {language} zusammen. Erhalte Zahlen, Namen, Daten, Beschlüsse und offene "
+    "Punkte; die Teilergebnisse werden anschließend zu einer Gesamtantwort zusammengeführt."
+)
+
+
+def _genai() -> Any:
+    """Importiert ``google.genai`` beim ersten Bedarf; der Import kostet rund eine Sekunde Startzeit."""
+    global _SDK
+    if _SDK is None:
+        with _SDK_LOCK:
+            if _SDK is None:
+                started = time.perf_counter()
+                module = importlib.import_module("google.genai")
+                importlib.import_module("google.genai.types")
+                startup.record_phase("gemini_sdk", time.perf_counter() - started)
+                _SDK = module
+    return _SDK
+
+
+async def prewarm_sdk() -> None:
+    """Lädt das SDK nach dem Start im Hintergrund, damit der erste Gemini-Aufruf nicht darauf wartet."""
+    try:
+        await asyncio.to_thread(_genai)
+    except Exception:  # pragma: no cover - der erste echte Aufruf meldet den Fehler erneut
+        logger.warning("Gemini-SDK konnte nicht vorgeladen werden", exc_info=True)
+
 
 @lru_cache
 def _gemini_client(api_key: str) -> genai.Client:
-    return genai.Client(api_key=api_key)
+    return _genai().Client(api_key=api_key)
 
 
-def _prepare_prompt(task: str, text: str, options: Dict[str, Any]) -> str:
+def _prepare_instruction(task: str, options: Dict[str, Any]) -> str:
     language = options.get("language") or load_settings().ui.preferred_language
     custom_instruction = options.get("custom_instruction")
     if task == "custom" and custom_instruction:
@@ -44,28 +100,463 @@ def _prepare_prompt(task: str, text: str, options: Dict[str, Any]) -> str:
     if tone:
         instruction += f"\nTonfall: {tone}."
 
-    return f"{instruction}\n\nText:\n{text}".strip()
+    return instruction
+
+
+def _prepare_prompt(task: str, text: str, options: Dict[str, Any]) -> str:
+    return f"{_prepare_instruction(task, options)}\n\nText:\n{text}".strip()
 
 
-def _run_generate(*, task: str, text: str, options: Dict[str, Any]) -> Dict[str, Any]:
+def _gemini_settings() -> GeminiSettings:
     settings = load_settings().gemini
     if not settings.api_key:
         raise RuntimeError("Es ist kein Gemini API-Key hinterlegt.")
-    prompt = _prepare_prompt(task, text, options)
-    config = types.GenerateContentConfig(
+    return settings
+
+
+def _build_config(settings: GeminiSettings, options: Dict[str, Any]) -> types.GenerateContentConfig:
+    return _genai().types.GenerateContentConfig(
         system_instruction=settings.system_prompt,
         temperature=options.get("temperature", settings.temperature),
     )
-    response = _gemini_client(settings.api_key).models.generate_content(
-        model=settings.model,
-        contents=prompt,
-        config=config,
+
+
+def _needs_chunking(settings: GeminiSettings, text: str) -> bool:
+    return estimate_tokens(text) > settings.chunk_threshold_tokens
+
+
+def _map_prompt(task: str, chunk: str, index: int, total: int, options: Dict[str, Any]) -> str:
+    if task == "translation":
+        return _prepare_prompt(task, chunk, options)
+    language = options.get("language") or load_settings().ui.preferred_language
+    instruction = MAP_PROMPT.format(index=index + 1, total=total, language=language)
+    custom_instruction = options.get("custom_instruction")
+    if task == "custom" and custom_instruction:
+        instruction += f"\nAchte besonders auf Inhalte, die für diese Aufgabe relevant sind: {custom_instruction}"
+    return f"{instruction}\n\nText:\n{chunk}"
+
+
+def _reduce_text(partials: List[str]) -> str:
+    total = len(partials)
+    sections = "\n\n".join(f"[Abschnitt {index}/{total}]\n{partial}" for index, partial in enumerate(partials, 1))
+    return f"Die folgenden Teilergebnisse decken das gesamte Dokument in Reihenfolge ab.\n\n{sections}"
+
+
+def get_result_cache() -> ResponseCache:
+    global _RESULT_CACHE
+    if _RESULT_CACHE is None:
+        settings = load_settings().gemini
+        _RESULT_CACHE = ResponseCache(
+            max_bytes=settings.cache_max_bytes,
+            db_path=DATA_DIR / "gemini_cache.sqlite3",
+            table="results",
+            max_rows=settings.cache_max_entries,
+        )
+    return _RESULT_CACHE
+
+
+def _result_key(settings: GeminiSettings, prompt: str, config: types.GenerateContentConfig) -> str:
+    material = json.dumps(
+        [settings.model, settings.system_prompt, config.temperature, prompt],
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+def _cache_for(settings: GeminiSettings, options: Dict[str, Any]) -> ResponseCache | None:
+    if not settings.cache_enabled or options.get("bypass_cache"):
+        return None
+    return get_result_cache()
+
+
+def _limiter(settings: GeminiSettings) -> asyncio.Semaphore:
+    global _LIMITER
+    limit = max(1, settings.max_concurrency)
+    if _LIMITER is None or _LIMITER[0] != limit:
+        _LIMITER = (limit, asyncio.Semaphore(limit))
+    return _LIMITER[1]
+
+
+def _is_retryable(exc: BaseException) -> bool:
+    if isinstance(exc, (asyncio.TimeoutError, OSError)):
+        return True
+    return getattr(exc, "code", None) in _RETRYABLE_STATUS
+
+
+async def _call_with_retry(settings: GeminiSettings, factory: Callable[[], Awaitable[T]]) -> T:
+    """Begrenzte Parallelität, Timeout je Versuch und exponentielles Backoff mit Jitter bei 429/5xx."""
+    attempt = 0
+    while True:
+        try:
+            async with _limiter(settings):
+                return await asyncio.wait_for(factory(), timeout=settings.request_timeout)
+        except Exception as exc:
+            if attempt >= settings.max_retries or not _is_retryable(exc):
+                raise
+            await asyncio.sleep(_retry_delay(settings, attempt))
+            attempt += 1
+
+
+def _retry_delay(settings: GeminiSettings, attempt: int) -> float:
+    return settings.retry_base_delay * (2**attempt) * random.uniform(0.5, 1.5)
+
+
+def _context_key(settings: GeminiSettings, document: str) -> str:
+    material = json.dumps([settings.model, settings.system_prompt, document], ensure_ascii=False)
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+def _prune_context_caches() -> None:
+    # Gemini löscht abgelaufene Inhalte selbst; lokal werden nur die Handles verworfen.
+    now = time.time()
+    for key, (_, expires_at) in list(_CONTEXT_CACHES.items()):
+        if expires_at <= now:
+            del _CONTEXT_CACHES[key]
+
+
+async def _create_context_cache(settings: GeminiSettings, key: str, document: str) -> str:
+    client = _gemini_client(settings.api_key)
+    ttl = max(1, settings.context_cache_ttl_minutes) * 60
+    cached = await _call_with_retry(
+        settings,
+        lambda: client.aio.caches.create(
+            model=settings.model,
+            config=_genai().types.CreateCachedContentConfig(
+                contents=[f"Text:\n{document}"],
+                system_instruction=settings.system_prompt,
+                ttl=f"{ttl}s",
+                display_name=f"tag2-{key[:16]}",
+            ),
+        ),
     )
+    _CONTEXT_CACHES[key] = (cached.name, time.time() + ttl)
+    return cached.name
+
+
+async def _context_cache_name(settings: GeminiSettings, document: str) -> str | None:
+    """Liefert einen Kontextcache für große Dokumente; mehrere Aufgaben zum selben Text teilen ihn."""
+    if not settings.context_cache_enabled or estimate_tokens(document) < settings.context_cache_min_tokens:
+        return None
+    _prune_context_caches()
+    key = _context_key(settings, document)
+    entry = _CONTEXT_CACHES.get(key)
+    if entry is not None and entry[1] - time.time() > _CONTEXT_CACHE_MARGIN:
+        return entry[0]
+    try:
+        return await _IN_FLIGHT.run(f"context:{key}", lambda: _create_context_cache(settings, key, document))
+    except Exception:
+        # Ohne Cache funktioniert die Anfrage weiterhin, nur teurer.
+        logger.warning("Gemini-Kontextcache konnte nicht angelegt werden", exc_info=True)
+        return None
+
+
+def _forget_context_cache(name: str) -> None:
+    for key, (cached_name, _) in list(_CONTEXT_CACHES.items()):
+        if cached_name == name:
+            del _CONTEXT_CACHES[key]
+
+
+async def _with_context(
+    settings: GeminiSettings,
+    prompt: str,
+    config: types.GenerateContentConfig,
+    context: Tuple[str, str] | None,
+) -> Tuple[str, types.GenerateContentConfig]:
+    """Ersetzt bei großen Dokumenten den Text im Prompt durch einen Verweis auf den Kontextcache."""
+    if context is None:
+        return prompt, config
+    instruction, document = context
+    name = await _context_cache_name(settings, document)
+    if name is None:
+        return prompt, config
+    # Systemprompt und Dokument stecken bereits im Cache.
+    return instruction, config.model_copy(update={"system_instruction": None, "cached_content": name})
+
+
+async def close_context_caches() -> None:
+    """Gibt beim Herunterfahren alle noch gültigen Kontextcaches frei, statt bis zum Ablauf Speicher zu bezahlen."""
+    settings = load_settings().gemini
+    entries = list(_CONTEXT_CACHES.values())
+    _CONTEXT_CACHES.clear()
+    if not entries or not settings.api_key:
+        return
+    client = _gemini_client(settings.api_key)
+    results = await asyncio.gather(
+        *(client.aio.caches.delete(name=name) for name, _ in entries), return_exceptions=True
+    )
+    for result in results:
+        if isinstance(result, Exception):
+            logger.debug("Gemini-Kontextcache konnte nicht gelöscht werden: %s", result)
+
+
+def _task_label(task: str) -> str:
+    # Unbekannte Aufgaben laufen als Zusammenfassung und bekommen keine eigene Zeitreihe.
+    return task if task in TASK_PROMPTS or task == "custom" else "summary"
+
+
+def _record_call(model: str, task: str, seconds: float, usage: Any, outcome: str = "ok") -> None:
+    task = _task_label(task)
+    metrics.GEMINI_REQUESTS.inc(model=model, task=task, outcome=outcome)
+    metrics.GEMINI_DURATION.observe(seconds, model=model, task=task)
+    metrics.record_timing("gemini", seconds)
+    if usage is None:
+        return
+    for kind, field in (
+        ("prompt", "prompt_token_count"),
+        ("output", "candidates_token_count"),
+        ("cached", "cached_content_token_count"),
+    ):
+        count = getattr(usage, field, None)
+        if count:
+            metrics.GEMINI_TOKENS.inc(count, model=model, task=task, kind=kind)
+
+
+def _format_response(response: Any) -> Dict[str, Any]:
     return {
         "text": response.text,
         "candidates": [cand.text for cand in response.candidates or [] if getattr(cand, "text", None)],
     }
 
 
+async def _generate(
+    settings: GeminiSettings,
+    task: str,
+    prompt: str,
+    config: types.GenerateContentConfig,
+    context: Tuple[str, str] | None = None,
+) -> Dict[str, Any]:
+    client = _gemini_client(settings.api_key)
+    contents, request_config = await _with_context(settings, prompt, config, context)
+
+    async def _call(contents: str, request_config: types.GenerateContentConfig) -> Any:
+        started = time.perf_counter()
+        try:
+            with metrics.UPSTREAM_IN_FLIGHT.track(upstream="gemini"):
+                response = await client.aio.models.generate_content(
+                    model=settings.model, contents=contents, config=request_config
+                )
+        except BaseException:
+            _record_call(settings.model, task, time.perf_counter() - started, None, "error")
+            raise
+        _record_call(settings.model, task, time.perf_counter() - started, getattr(response, "usage_metadata", None))
+        return response
+
+    try:
+        response = await _call_with_retry(settings, lambda: _call(contents, request_config))
+    except Exception as exc:
+        # Vorzeitig gelöschter oder abgelaufener Cache: einmalig ohne Cache wiederholen.
+        if request_config.cached_content is None or getattr(exc, "code", None) not in (403, 404):
+            raise
+        _forget_context_cache(request_config.cached_content)
+        response = await _call_with_retry(settings, lambda: _call(prompt, config))
+    return _format_response(response)
+
+
+async def _cached_generate(
+    settings: GeminiSettings,
+    task: str,
+    prompt: str,
+    config: types.GenerateContentConfig,
+    cache: ResponseCache | None,
+    context: Tuple[str, str] | None = None,
+) -> Dict[str, Any]:
+    if cache is None:
+        return await _generate(settings, task, prompt, config, context)
+
+    key = _result_key(settings, prompt, config)
+    entry = await cache.aget(key)
+    if entry is not None and entry.fresh:
+        cache.record_hit()
+        return {**entry.value, "cached": True}
+    cache.record_miss()
+
+    async def _generate_and_store() -> Dict[str, Any]:
+        result = await _generate(settings, task, prompt, config, context)
+        await cache.aset(key, result, ttl=settings.cache_ttl_hours * 3600)
+        return result
+
+    return await _IN_FLIGHT.run(key, _generate_and_store)
+
+
+async def _map_chunks(
+    task: str,
+    text: str,
+    options: Dict[str, Any],
+    settings: GeminiSettings,
+    config: types.GenerateContentConfig,
+    cache: ResponseCache | None,
+) -> List[str]:
+    """Verarbeitet die Abschnitte parallel; über den Cache werden bei Wiederholung nur geänderte Abschnitte neu berechnet."""
+    chunks = split_text(text, settings.chunk_max_tokens)
+    limit = asyncio.Semaphore(max(1, settings.chunk_concurrency))
+
+    async def _one(index: int, chunk: str) -> str:
+        prompt = _map_prompt(task, chunk, index, len(chunks), options)
+        async with limit:
+            result = await _cached_generate(settings, task, prompt, config, cache)
+        return result.get("text") or ""
+
+    return list(await asyncio.gather(*(_one(index, chunk) for index, chunk in enumerate(chunks))))
+
+
 async def generate_with_gemini(task: str, text: str, options: Dict[str, Any]) -> Dict[str, Any]:
-    return await asyncio.to_thread(_run_generate, task=task, text=text, options=options)
+    settings = _gemini_settings()
+    config = _build_config(settings, options)
+    cache = _cache_for(settings, options)
+    if not _needs_chunking(settings, text):
+        instruction = _prepare_instruction(task, options)
+        prompt = _prepare_prompt(task, text, options)
+        return await _cached_generate(settings, task, prompt, config, cache, (instruction, text))
+
+    partials = await _map_chunks(task, text, options, settings, config, cache)
+    if task == "translation":
+        return {"text": "\n\n".join(partials), "candidates": [], "chunks": len(partials)}
+    result = await _cached_generate(
+        settings, task, _prepare_prompt(task, _reduce_text(partials), options), config, cache
+    )
+    return {**result, "chunks": len(partials)}
+
+
+def gemini_cache_stats() -> Dict[str, Any]:
+    _prune_context_caches()
+    return {
+        **get_result_cache().stats(),
+        "single_flight": _IN_FLIGHT.stats(),
+        "context_caches": len(_CONTEXT_CACHES),
+    }
+
+
+_STREAM_END = object()
+
+
+def open_gemini_stream(task: str, text: str, options: Dict[str, Any]) -> AsyncGenerator[str, None]:
+    """Prüft die Konfiguration sofort und liefert einen asynchronen Iterator über Textfragmente.
+
+    Lange Texte durchlaufen zuerst die Map-Phase; gestreamt wird dann die Zusammenführung.
+    """
+    settings = _gemini_settings()
+    config = _build_config(settings, options)
+    cache = _cache_for(settings, options)
+    if not _needs_chunking(settings, text):
+        context = (_prepare_instruction(task, options), text)
+        return _stream_prompt(settings, task, _prepare_prompt(task, text, options), config, cache, context)
+
+    async def _chunked() -> AsyncGenerator[str, None]:
+        partials = await _map_chunks(task, text, options, settings, config, cache)
+        if task == "translation":
+            for index, partial in enumerate(partials):
+                yield f"\n\n{partial}" if index else partial
+            return
+        reduce_prompt = _prepare_prompt(task, _reduce_text(partials), options)
+        async with aclosing(_stream_prompt(settings, task, reduce_prompt, config, cache)) as fragments:
+            async for fragment in fragments:
+                yield fragment
+
+    return _chunked()
+
+
+async def _stream_prompt(
+    settings: GeminiSettings,
+    task: str,
+    prompt: str,
+    config: types.GenerateContentConfig,
+    cache: ResponseCache | None,
+    context: Tuple[str, str] | None = None,
+) -> AsyncGenerator[str, None]:
+    """Streamt die Antwort auf einen einzelnen Prompt.
+
+    Der Streaming-Iterator des SDK blockiert beim Lesen; er läuft deshalb in einem
+    eigenen Thread und reicht Fragmente über eine Queue an die Event-Loop weiter.
+    Wird der Iterator geschlossen (z. B. Client-Abbruch), endet der Thread beim
+    nächsten Fragment. Es gelten dasselbe Parallelitätslimit und dieselben
+    Wiederholungen wie bei ``_call_with_retry``, Letztere nur vor dem ersten Fragment.
+    """
+    key = _result_key(settings, prompt, config)
+    entry = await cache.aget(key) if cache else None
+    if cache and entry is not None and entry.fresh:
+        cache.record_hit()
+        yield entry.value.get("text") or ""
+        return
+    if cache:
+        cache.record_miss()
+
+    client = _gemini_client(settings.api_key)
+    loop = asyncio.get_running_loop()
+    contents, request_config = await _with_context(settings, prompt, config, context)
+    # Die Token-Zählung steht im letzten Fragment des Streams.
+    usage: List[Any] = [None]
+
+    def _start() -> Tuple["asyncio.Queue[Any]", threading.Event]:
+        queue: asyncio.Queue[Any] = asyncio.Queue()
+        stop = threading.Event()
+
+        def _emit(item: Any) -> None:
+            try:
+                loop.call_soon_threadsafe(queue.put_nowait, item)
+            except RuntimeError:  # pragma: no cover - Loop bereits beendet
+                stop.set()
+
+        def _produce() -> None:
+            try:
+                stream = client.models.generate_content_stream(
+                    model=settings.model, contents=contents, config=request_config
+                )
+            except Exception as exc:
+                _emit(exc)
+                return
+            try:
+                for chunk in stream:
+                    if stop.is_set():
+                        break
+                    usage[0] = getattr(chunk, "usage_metadata", None) or usage[0]
+                    fragment = getattr(chunk, "text", None)
+                    if fragment:
+                        _emit(fragment)
+            except Exception as exc:
+                _emit(exc)
+            finally:
+                stream.close()
+                _emit(_STREAM_END)
+
+        # Eigener Thread statt Default-Executor: Das SDK kennt keinen Timeout, ein hängender
+        # Stream belegt so keinen Platz im gemeinsamen Pool, bis die Verbindung abbricht.
+        threading.Thread(target=_produce, name="gemini-stream", daemon=True).start()
+        return queue, stop
+
+    parts: list[str] = []
+    outcome = "error"
+    attempt = 0
+    started = time.perf_counter()
+    try:
+        while True:
+            async with _limiter(settings):
+                queue, stop = _start()
+                try:
+                    with metrics.UPSTREAM_IN_FLIGHT.track(upstream="gemini"):
+                        while True:
+                            # ``request_timeout`` gilt für die Pause zwischen zwei Fragmenten.
+                            item = await asyncio.wait_for(queue.get(), timeout=settings.request_timeout)
+                            if item is _STREAM_END:
+                                break
+                            if isinstance(item, Exception):
+                                raise item
+                            parts.append(item)
+                            yield item
+                    outcome = "ok"
+                    break
+                except Exception as exc:
+                    # Wiederholt wird nur, solange noch kein Fragment beim Client angekommen ist.
+                    if parts or attempt >= settings.max_retries or not _is_retryable(exc):
+                        raise
+                finally:
+                    stop.set()
+            await asyncio.sleep(_retry_delay(settings, attempt))
+            attempt += 1
+    except GeneratorExit:
+        outcome = "cancelled"
+        raise
+    finally:
+        _record_call(settings.model, task, time.perf_counter() - started, usage[0], outcome)
+    # Nur vollständig empfangene Antworten landen im Cache.
+    if cache and parts:
+        await cache.aset(key, {"text": "".join(parts), "candidates": []}, ttl=settings.cache_ttl_hours * 3600)
@@ -0,0 +1,424 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import sqlite3
+import threading
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Any, AsyncGenerator, Dict, Iterable, List, Set, Tuple
+
+from .bundestag import BundestagClient, fetch_document
+from .config import DATA_DIR, load_settings
+from .gemini import generate_with_gemini
+
+
+logger = logging.getLogger(__name__)
+
+# Für diese Datensätze liefert der DIP den Volltext über einen eigenen Endpunkt.
+_TEXT_DATASETS = {"drucksache": "drucksache-text", "plenarprotokoll": "plenarprotokoll-text"}
+_FINAL_STATES = {"completed", "failed", "cancelled"}
+# Aufträge, Abbrüche und Fortschritt aus anderen Worker-Prozessen werden spätestens nach dieser Zeit bemerkt.
+_POLL_SECONDS = 2.0
+
+_JOB_STORE: "JobStore | None" = None
+_RUNNER: "asyncio.Task[None] | None" = None
+_WAKEUP: asyncio.Event | None = None
+_CURRENT: Tuple[str, "asyncio.Task[None]"] | None = None
+_SUBSCRIBERS: Dict[str, Set["asyncio.Queue[Tuple[str, Dict[str, Any]]]"]] = {}
+
+
+class JobStore:
+    """Persistente Warteschlange für Batch-Aufträge; übersteht Neustarts des Backends."""
+
+    def __init__(self, db_path: Path) -> None:
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(db_path), check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._db:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    task TEXT NOT NULL,
+                    options TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    error TEXT,
+                    created_at TEXT NOT NULL,
+                    updated_at TEXT NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at);
+                CREATE TABLE IF NOT EXISTS job_items (
+                    job_id TEXT NOT NULL,
+                    position INTEGER NOT NULL,
+                    dataset TEXT NOT NULL,
+                    document_id TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    titel TEXT,
+                    result TEXT,
+                    error TEXT,
+                    PRIMARY KEY (job_id, position)
+                );
+                """
+            )
+
+    def create(self, task: str, options: Dict[str, Any], documents: Iterable[Tuple[str, str]]) -> str:
+        job_id = uuid.uuid4().hex
+        now = datetime.utcnow().isoformat()
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT INTO jobs (id, task, options, status, created_at, updated_at) VALUES (?, ?, ?, 'queued', ?, ?)",
+                (job_id, task, json.dumps(options, ensure_ascii=False), now, now),
+            )
+            self._db.executemany(
+                "INSERT INTO job_items (job_id, position, dataset, document_id, status) VALUES (?, ?, ?, ?, 'pending')",
+                [(job_id, position, dataset, str(document_id)) for position, (dataset, document_id) in enumerate(documents)],
+            )
+        return job_id
+
+    def recover(self) -> None:
+        """Setzt nach einem Neustart unterbrochene Aufträge und Dokumente zurück in die Warteschlange."""
+        with self._lock, self._db:
+            self._db.execute("UPDATE jobs SET status = 'queued' WHERE status = 'running'")
+            self._db.execute("UPDATE job_items SET status = 'pending' WHERE status = 'running'")
+
+    def reset_running(self, job_id: str) -> None:
+        with self._lock, self._db:
+            self._db.execute("UPDATE job_items SET status = 'pending' WHERE job_id = ? AND status = 'running'", (job_id,))
+
+    def next_queued(self) -> str | None:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT id FROM jobs WHERE status = 'queued' ORDER BY created_at LIMIT 1"
+            ).fetchone()
+        return row[0] if row else None
+
+    def set_status(self, job_id: str, status: str, error: str | None = None) -> None:
+        # Abgebrochene Aufträge bleiben abgebrochen, auch wenn ein Lauf gerade noch endet.
+        with self._lock, self._db:
+            self._db.execute(
+                "UPDATE jobs SET status = ?, error = ?, updated_at = ? WHERE id = ? AND status != 'cancelled'",
+                (status, error, datetime.utcnow().isoformat(), job_id),
+            )
+
+    def status(self, job_id: str) -> str | None:
+        with self._lock:
+            row = self._db.execute("SELECT status FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return row[0] if row else None
+
+    def pending_items(self, job_id: str) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT position, dataset, document_id FROM job_items "
+                "WHERE job_id = ? AND status = 'pending' ORDER BY position",
+                (job_id,),
+            ).fetchall()
+        return [{"position": row[0], "dataset": row[1], "document_id": row[2]} for row in rows]
+
+    def update_item(self, job_id: str, position: int, **values: Any) -> None:
+        if "result" in values and values["result"] is not None:
+            values["result"] = json.dumps(values["result"], ensure_ascii=False)
+        columns = ", ".join(f"{column} = ?" for column in values)
+        with self._lock, self._db:
+            self._db.execute(
+                f"UPDATE job_items SET {columns} WHERE job_id = ? AND position = ?",
+                (*values.values(), job_id, position),
+            )
+            self._db.execute("UPDATE jobs SET updated_at = ? WHERE id = ?", (datetime.utcnow().isoformat(), job_id))
+
+    def job(self, job_id: str) -> Dict[str, Any] | None:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT id, task, options, status, error, created_at, updated_at FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            counts = dict(
+                self._db.execute(
+                    "SELECT status, COUNT(*) FROM job_items WHERE job_id = ? GROUP BY status", (job_id,)
+                ).fetchall()
+            )
+        return {
+            "id": row[0],
+            "task": row[1],
+            "options": json.loads(row[2]),
+            "status": row[3],
+            "error": row[4],
+            "created_at": row[5],
+            "updated_at": row[6],
+            "progress": {
+                "total": sum(counts.values()),
+                "completed": counts.get("completed", 0),
+                "failed": counts.get("failed", 0),
+                "pending": counts.get("pending", 0) + counts.get("running", 0),
+            },
+        }
+
+    def items(self, job_id: str) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT position, dataset, document_id, status, titel, result, error FROM job_items "
+                "WHERE job_id = ? ORDER BY position",
+                (job_id,),
+            ).fetchall()
+        return [
+            {
+                "position": row[0],
+                "dataset": row[1],
+                "document_id": row[2],
+                "status": row[3],
+                "titel": row[4],
+                "result": json.loads(row[5]) if row[5] else None,
+                "error": row[6],
+            }
+            for row in rows
+        ]
+
+    def list_jobs(self, limit: int = 50) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._db.execute("SELECT id FROM jobs ORDER BY created_at DESC LIMIT ?", (limit,)).fetchall()
+        ids = [row[0] for row in rows]
+        return [job for job in (self.job(job_id) for job_id in ids) if job is not None]
+
+
+def get_job_store() -> JobStore:
+    global _JOB_STORE
+    if _JOB_STORE is None:
+        _JOB_STORE = JobStore(DATA_DIR / "jobs.sqlite3")
+    return _JOB_STORE
+
+
+async def resolve_query(dataset: str, params: Dict[str, Any], limit: int) -> List[Tuple[str, str]]:
+    """Läuft per Cursor durch eine DIP-Suche und sammelt bis zu ``limit`` Dokument-IDs."""
+    client = BundestagClient()
+    documents: List[Tuple[str, str]] = []
+    cursor: str | None = None
+    while len(documents) < limit:
+        page_params = {**params, "cursor": cursor} if cursor else dict(params)
+        data = await client.list_documents(dataset, page_params)
+        page = [str(document["id"]) for document in data.get("documents", []) if document.get("id") is not None]
+        documents.extend((dataset, document_id) for document_id in page)
+        next_cursor = data.get("cursor")
+        if not page or not next_cursor or next_cursor == cursor:
+            break
+        cursor = next_cursor
+    return documents[:limit]
+
+
+def _names(values: Any, key: str) -> List[str]:
+    entries = values if isinstance(values, list) else []
+    return [str(entry.get(key)) for entry in entries if isinstance(entry, dict) and entry.get(key)]
+
+
+async def _document_text(dataset: str, document_id: str) -> Tuple[str | None, str]:
+    """Lädt den Volltext, sofern der DIP einen liefert, sonst die beschreibenden Metadaten."""
+    document = await fetch_document(_TEXT_DATASETS.get(dataset, dataset), document_id)
+    titel = document.get("titel")
+    text = document.get("text")
+    if isinstance(text, str) and text.strip():
+        return titel, text
+    typ = document.get("vorgangstyp") or document.get("drucksachetyp")
+    parts = [
+        f"Titel: {titel}" if titel else "",
+        f"Typ: {typ}" if typ else "",
+        f"Beratungsstand: {document['beratungsstand']}" if document.get("beratungsstand") else "",
+        f"Sachgebiete: {', '.join(_names(document.get('sachgebiet'), 'name'))}" if document.get("sachgebiet") else "",
+        f"Schlagworte: {', '.join(_names(document.get('deskriptor'), 'name'))}" if document.get("deskriptor") else "",
+        document.get("abstract") or "",
+    ]
+    return titel, "\n".join(part for part in parts if part)
+
+
+def _publish(job_id: str, event: str, data: Dict[str, Any]) -> None:
+    for queue in _SUBSCRIBERS.get(job_id, ()):
+        queue.put_nowait((event, data))
+
+
+async def _process_item(store: JobStore, job: Dict[str, Any], item: Dict[str, Any]) -> None:
+    job_id, position = job["id"], item["position"]
+    await asyncio.to_thread(store.update_item, job_id, position, status="running")
+    try:
+        titel, text = await _document_text(item["dataset"], item["document_id"])
+        if not text.strip():
+            raise ValueError("Dokument enthält keinen verwertbaren Text.")
+        result = await generate_with_gemini(job["task"], text, job["options"])
+    except RuntimeError:
+        # Fehlende Konfiguration betrifft alle Dokumente gleichermaßen.
+        await asyncio.to_thread(store.update_item, job_id, position, status="pending")
+        raise
+    except Exception as exc:
+        await asyncio.to_thread(store.update_item, job_id, position, status="failed", error=str(exc))
+        update = {**item, "status": "failed", "error": str(exc)}
+    else:
+        values = {"status": "completed", "titel": titel, "result": result, "error": None}
+        await asyncio.to_thread(store.update_item, job_id, position, **values)
+        update = {**item, **values}
+    _publish(job_id, "item", update)
+    snapshot = await asyncio.to_thread(store.job, job_id)
+    if snapshot is not None:
+        _publish(job_id, "progress", snapshot)
+
+
+async def _run_job(store: JobStore, job_id: str) -> None:
+    job = await asyncio.to_thread(store.job, job_id)
+    if job is None:
+        return
+    await asyncio.to_thread(store.set_status, job_id, "running")
+    limit = asyncio.Semaphore(max(1, load_settings().gemini.batch_concurrency))
+
+    async def _bounded(item: Dict[str, Any]) -> None:
+        async with limit:
+            # Ein Abbruch kann auch aus einem anderen Worker kommen und steht dann nur in der Datenbank.
+            if await asyncio.to_thread(store.status, job_id) == "cancelled":
+                return
+            await _process_item(store, job, item)
+
+    status, error = "completed", None
+    pending = await asyncio.to_thread(store.pending_items, job_id)
+    try:
+        async with asyncio.TaskGroup() as group:
+            for item in pending:
+                group.create_task(_bounded(item))
+    except* RuntimeError as exc:
+        status, error = "failed", str(exc.exceptions[0])
+        await asyncio.to_thread(store.reset_running, job_id)
+    await asyncio.to_thread(store.set_status, job_id, status, error)
+    _publish(job_id, "done", await asyncio.to_thread(store.job, job_id) or {})
+
+
+async def job_runner_loop() -> None:
+    """Arbeitet die Warteschlange nacheinander ab; innerhalb eines Auftrags laufen Dokumente parallel."""
+    global _CURRENT
+    store = await asyncio.to_thread(get_job_store)
+    await asyncio.to_thread(store.recover)
+    assert _WAKEUP is not None
+    while True:
+        job_id = await asyncio.to_thread(store.next_queued)
+        if job_id is None:
+            try:
+                await asyncio.wait_for(_WAKEUP.wait(), timeout=_POLL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            _WAKEUP.clear()
+            continue
+        task = asyncio.ensure_future(_run_job(store, job_id))
+        _CURRENT = (job_id, task)
+        try:
+            # wait() statt await: ein Abbruch des Auftrags beendet nicht die Schleife.
+            await asyncio.wait({task})
+        finally:
+            _CURRENT = None
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning("Batch-Auftrag %s fehlgeschlagen", job_id, exc_info=task.exception())
+            await asyncio.to_thread(store.set_status, job_id, "failed", str(task.exception()))
+
+
+def start_job_runner() -> None:
+    global _RUNNER, _WAKEUP
+    _WAKEUP = asyncio.Event()
+    _RUNNER = asyncio.ensure_future(job_runner_loop())
+
+
+async def stop_job_runner() -> None:
+    global _RUNNER
+    runner, _RUNNER = _RUNNER, None
+    tasks = [task for task in (runner, _CURRENT[1] if _CURRENT else None) if task is not None]
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def submit_job(task: str, options: Dict[str, Any], documents: List[Tuple[str, str]]) -> Dict[str, Any]:
+    store = get_job_store()
+    job_id = await asyncio.to_thread(store.create, task, options, documents)
+    if _WAKEUP is not None:
+        _WAKEUP.set()
+    job = await asyncio.to_thread(store.job, job_id)
+    assert job is not None
+    return job
+
+
+async def get_job(job_id: str, *, include_items: bool = True) -> Dict[str, Any] | None:
+    store = get_job_store()
+    job = await asyncio.to_thread(store.job, job_id)
+    if job is not None and include_items:
+        job["items"] = await asyncio.to_thread(store.items, job_id)
+    return job
+
+
+async def list_jobs(limit: int = 50) -> List[Dict[str, Any]]:
+    return await asyncio.to_thread(get_job_store().list_jobs, limit)
+
+
+async def cancel_job(job_id: str) -> Dict[str, Any] | None:
+    store = get_job_store()
+    job = await asyncio.to_thread(store.job, job_id)
+    if job is None or job["status"] in _FINAL_STATES:
+        return job
+    await asyncio.to_thread(store.set_status, job_id, "cancelled")
+    if _CURRENT is not None and _CURRENT[0] == job_id:
+        running = _CURRENT[1]
+        running.cancel()
+        await asyncio.wait({running})
+        await asyncio.to_thread(store.reset_running, job_id)
+    job = await asyncio.to_thread(store.job, job_id)
+    _publish(job_id, "done", job or {})
+    return job
+
+
+async def job_events(job_id: str) -> AsyncGenerator[Tuple[str, Dict[str, Any]], None]:
+    """Liefert bereits fertige Dokumente und danach Live-Updates bis zum Ende des Auftrags."""
+    store = get_job_store()
+    queue: "asyncio.Queue[Tuple[str, Dict[str, Any]]]" = asyncio.Queue()
+    _SUBSCRIBERS.setdefault(job_id, set()).add(queue)
+    try:
+        job = await asyncio.to_thread(store.job, job_id)
+        if job is None:
+            return
+        seen: Set[int] = set()
+        for item in await asyncio.to_thread(store.items, job_id):
+            if item["status"] in ("completed", "failed"):
+                seen.add(item["position"])
+                yield "item", item
+        yield "progress", job
+        if job["status"] in _FINAL_STATES:
+            yield "done", job
+            return
+        while True:
+            try:
+                event, data = await asyncio.wait_for(queue.get(), timeout=_POLL_SECONDS)
+            except asyncio.TimeoutError:
+                # Läuft der Auftrag in einem anderen Worker, kommt der Stand nur über die Datenbank.
+                job = await asyncio.to_thread(store.job, job_id)
+                if job is None:
+                    return
+                finished = [
+                    item
+                    for item in await asyncio.to_thread(store.items, job_id)
+                    if item["status"] in ("completed", "failed") and item["position"] not in seen
+                ]
+                for item in finished:
+                    seen.add(item["position"])
+                    yield "item", item
+                if finished:
+                    yield "progress", job
+                if job["status"] in _FINAL_STATES:
+                    yield "done", job
+                    return
+                continue
+            if event == "item":
+                if data["position"] in seen:
+                    continue
+                seen.add(data["position"])
+            yield event, data
+            if event == "done":
+                return
+    finally:
+        subscribers = _SUBSCRIBERS.get(job_id)
+        if subscribers is not None:
+            subscribers.discard(queue)
+            if not subscribers:
+                del _SUBSCRIBERS[job_id]
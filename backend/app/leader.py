@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Callable, TextIO, Tuple
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows: nur ein Worker, der immer Leader ist
+    fcntl = None  # type: ignore[assignment]
+
+
+logger = logging.getLogger(__name__)
+
+# So oft prüfen Follower, ob der Leader-Worker noch lebt.
+_RETRY_SECONDS = 10.0
+
+# Die Zahl der lebenden Worker wird höchstens so oft neu bestimmt.
+_WORKER_COUNT_TTL = 5.0
+
+_LOCK_HANDLE: TextIO | None = None
+# Erst mit dem ersten Bewerbungsversuch gibt es einen Wettbewerb um die Leader-Rolle.
+_CONTESTED = False
+_WORKER_HANDLE: Tuple[Path, TextIO] | None = None
+_WORKER_COUNT: Tuple[float, int] | None = None
+
+
+def try_acquire_leadership(path: Path) -> bool:
+    """Nicht blockierende Dateisperre; der Kernel gibt sie frei, sobald der Prozess endet."""
+    global _LOCK_HANDLE, _CONTESTED
+    _CONTESTED = True
+    if _LOCK_HANDLE is not None:
+        return True
+    if fcntl is None:
+        return True
+    path.parent.mkdir(parents=True, exist_ok=True)
+    handle = path.open("a+", encoding="utf-8")
+    try:
+        fcntl.flock(handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        handle.close()
+        return False
+    handle.seek(0)
+    handle.truncate()
+    handle.write(str(os.getpid()))
+    handle.flush()
+    _LOCK_HANDLE = handle
+    return True
+
+
+def is_leader() -> bool:
+    """Ohne Bewerbung (Skripte, einzelne Aufrufe ohne Lifespan) gilt der Prozess als Leader."""
+    return fcntl is None or not _CONTESTED or _LOCK_HANDLE is not None
+
+
+def release_leadership() -> None:
+    global _LOCK_HANDLE
+    handle, _LOCK_HANDLE = _LOCK_HANDLE, None
+    if handle is not None:
+        handle.close()
+
+
+async def leadership_loop(path: Path, on_elected: Callable[[], None]) -> None:
+    """Bewirbt sich, bis die Sperre frei ist, und startet dann die Aufgaben des Leaders.
+
+    Stirbt der bisherige Leader, übernimmt spätestens nach ``_RETRY_SECONDS`` ein anderer Worker.
+    """
+    while not await asyncio.to_thread(try_acquire_leadership, path):
+        await asyncio.sleep(_RETRY_SECONDS)
+    logger.info("Worker %s übernimmt die Hintergrundaufgaben", os.getpid())
+    on_elected()
+
+
+def register_worker(directory: Path) -> None:
+    """Meldet den Prozess als Worker an; er hält dazu bis zum Ende eine Sperre auf ``<pid>.lock``.
+
+    So zählt ``worker_count`` die tatsächlich laufenden Worker, egal ob uvicorn, gunicorn
+    oder ein anderer Prozessmanager sie gestartet hat.
+    """
+    global _WORKER_HANDLE, _WORKER_COUNT
+    if fcntl is None or _WORKER_HANDLE is not None:
+        return
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f"{os.getpid()}.lock"
+    # Erst sperren, dann umbenennen: sonst hielte ein zählender Worker die Datei für verwaist.
+    pending = directory / f"{os.getpid()}.pending"
+    handle = pending.open("w", encoding="utf-8")
+    fcntl.flock(handle.fileno(), fcntl.LOCK_EX)
+    os.replace(pending, path)
+    _WORKER_HANDLE = (path, handle)
+    _WORKER_COUNT = None
+
+
+def unregister_worker() -> None:
+    global _WORKER_HANDLE, _WORKER_COUNT
+    registered, _WORKER_HANDLE = _WORKER_HANDLE, None
+    _WORKER_COUNT = None
+    if registered is not None:
+        path, handle = registered
+        path.unlink(missing_ok=True)
+        handle.close()
+
+
+def _live_workers(directory: Path) -> int:
+    """Zählt gesperrte Worker-Dateien; Dateien ohne Sperre stammen von beendeten Workern."""
+    live = 0
+    for path in directory.glob("*.lock"):
+        if _WORKER_HANDLE is not None and path == _WORKER_HANDLE[0]:
+            live += 1
+            continue
+        try:
+            handle = path.open("a+", encoding="utf-8")
+        except OSError:
+            continue
+        try:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            live += 1
+        else:
+            path.unlink(missing_ok=True)
+        finally:
+            handle.close()
+    return live
+
+
+def worker_count() -> int:
+    """Anzahl der Worker-Prozesse auf diesem Host.
+
+    Maßgeblich ist der größere Wert aus ``TAG2_WORKERS`` (von ``devserver.py --prod`` gesetzt)
+    und der Zahl angemeldeter Worker; das Ergebnis wird ``_WORKER_COUNT_TTL`` Sekunden gemerkt.
+    """
+    global _WORKER_COUNT
+    try:
+        configured = max(1, int(os.environ.get("TAG2_WORKERS", "1")))
+    except ValueError:
+        configured = 1
+    if _WORKER_HANDLE is None:
+        return configured
+    now = time.monotonic()
+    if _WORKER_COUNT is None or now - _WORKER_COUNT[0] >= _WORKER_COUNT_TTL:
+        _WORKER_COUNT = (now, _live_workers(_WORKER_HANDLE[0].parent))
+    return max(configured, _WORKER_COUNT[1])
@@ -1,26 +1,135 @@
 from __future__ import annotations
 
-from typing import Any, Dict
+import asyncio
+import importlib.util
+import json
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, ORJSONResponse, PlainTextResponse, StreamingResponse
 
-from . import config
+from . import IMPORT_STARTED, config, metrics, startup
+from .compression import CompressionMiddleware
 from .bundestag import (
+    InvalidCursor,
+    close_http_client,
     fetch_dataset,
     fetch_document,
+    fetch_documents,
     fetch_metadata_options,
+    get_http_client,
+    get_response_cache,
+    in_flight_stats,
+    search_local_index,
     search_persons,
+    start_background_tasks,
+    start_follower_tasks,
+    stop_background_tasks,
+    upstream_stats,
 )
-from .gemini import generate_with_gemini
-from .schemas import ConfigUpdate, DatasetRequest, GeminiTaskRequest
+from .export import EXPORT_FORMATS, export_dataset
+from .extraction import ExtractionUnavailable
+from .fulltext import FulltextTooLarge, fetch_fulltext, shutdown_extraction_pool
+from .gemini import (
+    close_context_caches,
+    gemini_cache_stats,
+    generate_with_gemini,
+    get_result_cache,
+    open_gemini_stream,
+    prewarm_sdk,
+)
+from .jobs import (
+    cancel_job,
+    get_job,
+    job_events,
+    list_jobs,
+    resolve_query,
+    start_job_runner,
+    stop_job_runner,
+    submit_job,
+)
+from .leader import (
+    leadership_loop,
+    register_worker,
+    release_leadership,
+    try_acquire_leadership,
+    unregister_worker,
+)
+from .schemas import (
+    ConfigUpdate,
+    DatasetRequest,
+    DocumentBatchRequest,
+    ExportRequest,
+    GeminiBatchRequest,
+    GeminiTaskRequest,
+    LocalSearchRequest,
+)
+
+
+logger = logging.getLogger(__name__)
+
+
+def _start_leader_tasks() -> None:
+    start_background_tasks()
+    start_job_runner()
+
+
+@asynccontextmanager
+async def lifespan(_: FastAPI) -> AsyncIterator[None]:
+    started = time.perf_counter()
+    # Das Gemini-SDK lagert auch seine aio-Aufrufe in den Default-Executor aus;
+    # er wird daher über das Gemini-Limit hinaus dimensioniert.
+    gemini_limit = config.load_settings().gemini.max_concurrency
+    asyncio.get_running_loop().set_default_executor(
+        ThreadPoolExecutor(max_workers=max(32, gemini_limit + 16), thread_name_prefix="tag2")
+    )
+    # Ein gemeinsamer Connection-Pool für alle DIP-Aufrufe über die gesamte Laufzeit.
+    get_http_client()
+    # Angemeldete Worker teilen sich das DIP-Limit und nutzen den DIP-Cache gemeinsam.
+    register_worker(config.DATA_DIR / "workers")
+    # Bei mehreren Workern laufen Synchronisierung und Batch-Aufträge nur im Leader;
+    # die übrigen lesen dessen Ergebnisse aus den gemeinsamen Dateien.
+    # Der erste Versuch läuft sofort, damit frühe Anfragen die Rolle schon kennen.
+    leader_lock = config.DATA_DIR / "leader.lock"
+    try_acquire_leadership(leader_lock)
+    start_follower_tasks()
+    election = asyncio.ensure_future(leadership_loop(leader_lock, _start_leader_tasks))
+    # Das Gemini-SDK wird erst nach dem Start geladen, damit es den Kaltstart nicht verzögert.
+    prewarm = asyncio.ensure_future(prewarm_sdk()) if config.load_settings().gemini.prewarm_sdk else None
+    startup.record_phase("lifespan", time.perf_counter() - started)
+    logger.info("Backend bereit nach %.2f s", time.perf_counter() - IMPORT_STARTED)
+    try:
+        yield
+    finally:
+        election.cancel()
+        await asyncio.gather(election, *([prewarm] if prewarm else []), return_exceptions=True)
+        await stop_job_runner()
+        await stop_background_tasks()
+        await close_context_caches()
+        await close_http_client()
+        shutdown_extraction_pool()
+        release_leadership()
+        unregister_worker()
+
+
+# orjson serialisiert große DIP-Seiten deutlich schneller; ohne das Paket bleibt es beim Standard.
+_JSONResponse = ORJSONResponse if importlib.util.find_spec("orjson") else JSONResponse
 
 app = FastAPI(
     title="Bundestag Explorer",
     description="Private UI zur Recherche im DIP und zur Auswertung mit Gemini",
     version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=_JSONResponse,
 )
 
+app.add_middleware(CompressionMiddleware, minimum_size=1024)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=[
@@ -34,6 +143,36 @@ app.add_middleware(
     allow_credentials=True,
 )
 
+# Zuletzt registriert und damit außen: misst auch Komprimierung und CORS mit.
+app.add_middleware(metrics.MetricsMiddleware)
+
+
+def _cache_stats() -> Dict[str, Dict[str, Any]]:
+    return {"dip": get_response_cache().stats(), "gemini": get_result_cache().stats()}
+
+
+metrics.Collected(
+    "tag2_cache_hits_total",
+    "Treffer im DIP- bzw. Gemini-Cache",
+    "counter",
+    ("cache",),
+    lambda: {(name,): stats["hits"] for name, stats in _cache_stats().items()},
+)
+metrics.Collected(
+    "tag2_cache_misses_total",
+    "Fehlgriffe im DIP- bzw. Gemini-Cache",
+    "counter",
+    ("cache",),
+    lambda: {(name,): stats["misses"] for name, stats in _cache_stats().items()},
+)
+metrics.Collected(
+    "tag2_cache_hit_ratio",
+    "Trefferquote seit Prozessstart",
+    "gauge",
+    ("cache",),
+    lambda: {(name,): stats["hit_rate"] for name, stats in _cache_stats().items()},
+)
+
 
 def _mask_key(value: str | None) -> str | None:
     if not value:
@@ -58,6 +197,11 @@ async def health() -> Dict[str, str]:
     return {"status": "ok"}
 
 
+@app.get("/api/startup")
+async def startup_timings() -> Dict[str, Any]:
+    return startup.startup_report()
+
+
 @app.get("/api/config")
 async def get_config() -> Dict[str, Any]:
     settings = config.load_settings()
@@ -88,6 +232,11 @@ async def update_config(payload: ConfigUpdate) -> Dict[str, Any]:
         if ui_data:
             update_data["ui"] = ui_data
 
+    if payload.metrics is not None:
+        metrics_data = {k: v for k, v in payload.metrics.model_dump().items() if v is not None}
+        if metrics_data:
+            update_data["metrics"] = metrics_data
+
     if not update_data:
         raise HTTPException(status_code=400, detail="Keine Änderungen übermittelt.")
 
@@ -96,11 +245,87 @@ async def update_config(payload: ConfigUpdate) -> Dict[str, Any]:
 
 
 @app.post("/api/bundestag/search")
-async def bundestag_search(request: DatasetRequest) -> Dict[str, Any]:
+async def bundestag_search(request: DatasetRequest) -> JSONResponse:
     try:
-        return await fetch_dataset(request.dataset, request.params)
+        data = await fetch_dataset(request.dataset, request.params, prefetch=request.prefetch, fields=request.fields)
     except Exception as exc:  # pragma: no cover - Laufzeit-Feedback für UI
         raise HTTPException(status_code=502, detail=str(exc)) from exc
+    # Direkt serialisieren: DIP-Daten sind bereits JSON, jsonable_encoder wäre reine Zusatzarbeit.
+    return _JSONResponse(data)
+
+
+@app.post("/api/bundestag/local-search")
+async def bundestag_local_search(request: LocalSearchRequest) -> Dict[str, Any]:
+    return await search_local_index(
+        request.query,
+        dataset=request.dataset,
+        wahlperiode=request.wahlperiode,
+        vorgangstyp=request.vorgangstyp,
+        initiative=request.initiative,
+        limit=request.limit,
+        offset=request.offset,
+    )
+
+
+@app.get("/api/bundestag/cache")
+async def bundestag_cache_stats() -> Dict[str, Any]:
+    return {**get_response_cache().stats(), "single_flight": in_flight_stats(), "upstream": upstream_stats()}
+
+
+@app.delete("/api/bundestag/cache")
+async def bundestag_cache_clear() -> Dict[str, Any]:
+    cache = get_response_cache()
+    cache.clear()
+    return cache.stats()
+
+
+@app.post("/api/bundestag/documents")
+async def bundestag_documents(request: DocumentBatchRequest, http_request: Request) -> StreamingResponse:
+    results = fetch_documents([(document.dataset, document.id) for document in request.documents])
+
+    async def lines() -> AsyncIterator[str]:
+        try:
+            async for result in results:
+                if await http_request.is_disconnected():
+                    break
+                yield json.dumps(result, ensure_ascii=False) + "\n"
+        finally:
+            await results.aclose()
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+@app.post("/api/bundestag/export")
+async def bundestag_export(request: ExportRequest, http_request: Request) -> StreamingResponse:
+    chunks = export_dataset(
+        request.dataset,
+        request.params,
+        request.format,
+        fields=request.fields,
+        limit=request.limit,
+        is_disconnected=http_request.is_disconnected,
+    )
+    try:
+        first = await anext(chunks)
+    except StopAsyncIteration:
+        first = ""
+    except Exception as exc:  # pragma: no cover
+        raise HTTPException(status_code=502, detail=str(exc)) from exc
+
+    async def body() -> AsyncIterator[str]:
+        try:
+            yield first
+            async for chunk in chunks:
+                yield chunk
+        finally:
+            await chunks.aclose()
+
+    filename = f"{request.dataset}.{request.format}"
+    return StreamingResponse(
+        body(),
+        media_type=EXPORT_FORMATS[request.format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
 
 
 @app.get("/api/bundestag/{dataset}/{document_id}")
@@ -111,6 +336,20 @@ async def bundestag_document(dataset: str, document_id: str) -> Dict[str, Any]:
         raise HTTPException(status_code=502, detail=str(exc)) from exc
 
 
+@app.get("/api/bundestag/{dataset}/{document_id}/fulltext")
+async def bundestag_fulltext(dataset: str, document_id: str, source: str | None = None) -> Dict[str, Any]:
+    try:
+        return await fetch_fulltext(dataset, document_id, source)
+    except LookupError as exc:
+        raise HTTPException(status_code=404, detail=str(exc)) from exc
+    except FulltextTooLarge as exc:
+        raise HTTPException(status_code=413, detail=str(exc)) from exc
+    except ExtractionUnavailable as exc:
+        raise HTTPException(status_code=501, detail=str(exc)) from exc
+    except Exception as exc:  # pragma: no cover
+        raise HTTPException(status_code=502, detail=str(exc)) from exc
+
+
 @app.post("/api/gemini")
 async def gemini_task(request: GeminiTaskRequest) -> Dict[str, Any]:
     if not request.text.strip():
@@ -123,6 +362,110 @@ async def gemini_task(request: GeminiTaskRequest) -> Dict[str, Any]:
         raise HTTPException(status_code=502, detail=str(exc)) from exc
 
 
+@app.get("/api/gemini/cache")
+async def gemini_cache() -> Dict[str, Any]:
+    return gemini_cache_stats()
+
+
+def _sse(data: Dict[str, Any], event: str | None = None) -> str:
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@app.post("/api/gemini/stream")
+async def gemini_task_stream(request: GeminiTaskRequest, http_request: Request) -> StreamingResponse:
+    if not request.text.strip():
+        raise HTTPException(status_code=400, detail="Kein Text zur Verarbeitung übermittelt.")
+    try:
+        chunks = open_gemini_stream(request.task, request.text, request.options)
+    except RuntimeError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+
+    async def events() -> AsyncIterator[str]:
+        parts: list[str] = []
+        try:
+            async for fragment in chunks:
+                if await http_request.is_disconnected():
+                    break
+                parts.append(fragment)
+                yield _sse({"text": fragment})
+            else:
+                yield _sse({"text": "".join(parts)}, event="done")
+        except Exception as exc:  # pragma: no cover - Fehler erst während des Streams
+            yield _sse({"detail": str(exc)}, event="error")
+        finally:
+            await chunks.aclose()
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.post("/api/gemini/jobs")
+async def gemini_job_submit(request: GeminiBatchRequest) -> Dict[str, Any]:
+    documents = [(document.dataset, document.id) for document in request.documents]
+    if request.query is not None:
+        try:
+            documents += await resolve_query(request.query.dataset, request.query.params, request.limit)
+        except Exception as exc:  # pragma: no cover - API Feedback
+            raise HTTPException(status_code=502, detail=str(exc)) from exc
+    if not documents:
+        raise HTTPException(status_code=400, detail="Keine Dokumente für den Auftrag gefunden.")
+    return await submit_job(request.task, request.options, documents)
+
+
+@app.get("/api/gemini/jobs")
+async def gemini_job_list(limit: int = 50) -> Dict[str, Any]:
+    return {"jobs": await list_jobs(limit)}
+
+
+@app.get("/api/gemini/jobs/{job_id}")
+async def gemini_job_status(job_id: str, items: bool = True) -> Dict[str, Any]:
+    job = await get_job(job_id, include_items=items)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Auftrag nicht gefunden.")
+    return job
+
+
+@app.delete("/api/gemini/jobs/{job_id}")
+async def gemini_job_cancel(job_id: str) -> Dict[str, Any]:
+    job = await cancel_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Auftrag nicht gefunden.")
+    return job
+
+
+@app.get("/api/gemini/jobs/{job_id}/events")
+async def gemini_job_stream(job_id: str, http_request: Request) -> StreamingResponse:
+    if await get_job(job_id, include_items=False) is None:
+        raise HTTPException(status_code=404, detail="Auftrag nicht gefunden.")
+    updates = job_events(job_id)
+
+    async def events() -> AsyncIterator[str]:
+        try:
+            async for event, data in updates:
+                if await http_request.is_disconnected():
+                    break
+                yield _sse(data, event=event)
+        finally:
+            await updates.aclose()
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.get("/api/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics() -> PlainTextResponse:
+    if not config.load_settings().metrics.enabled:
+        raise HTTPException(status_code=404, detail="Metriken sind deaktiviert.")
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
 @app.get("/api/bundestag/options")
 async def bundestag_options() -> Dict[str, Any]:
     try:
@@ -135,5 +478,10 @@ async def bundestag_options() -> Dict[str, Any]:
 async def bundestag_persons(q: str = "", cursor: str | None = None) -> Dict[str, Any]:
     try:
         return await search_persons(q, cursor)
+    except InvalidCursor as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
     except Exception as exc:  # pragma: no cover - API Feedback
         raise HTTPException(status_code=502, detail=str(exc)) from exc
+
+
+startup.mark_imported()
@@ -0,0 +1,234 @@
+from __future__ import annotations
+
+import bisect
+import math
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, List, Sequence, Tuple
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from .config import load_settings
+
+
+# Sekunden; deckt Cache-Treffer im Millisekundenbereich ebenso ab wie lange Gemini-Antworten.
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+_LabelValues = Tuple[str, ...]
+
+_REGISTRY: List["_Metric"] = []
+# Laufzeiten der aktuellen Anfrage je Bereich (Summe, Anzahl) für den Server-Timing-Header.
+_TIMINGS: ContextVar[Dict[str, List[float]] | None] = ContextVar("server_timings", default=None)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: Sequence[Tuple[str, str]] = ()) -> str:
+    pairs = [*zip(names, values), *extra]
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        _REGISTRY.append(self)
+
+    def _key(self, labels: Dict[str, Any]) -> _LabelValues:
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}", *self._samples()]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[_LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}" for key, value in values]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, amount: float = 1.0, **labels: Any) -> None:
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels: Any) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    @contextmanager
+    def track(self, **labels: Any) -> Iterator[None]:
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Je Labelkombination: Anzahl je Bucket (nicht kumuliert), Summe, Anzahl.
+        self._values: Dict[_LabelValues, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = self._key(labels)
+        position = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts, totals = self._values.setdefault(key, ([0] * (len(self.buckets) + 1), [0.0, 0.0]))
+            counts[position] += 1
+            totals[0] += value
+            totals[1] += 1
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            values = sorted((key, (list(counts), list(totals))) for key, (counts, totals) in self._values.items())
+        lines: List[str] = []
+        for key, (counts, totals) in values:
+            cumulative = 0
+            for bound, count in zip((*self.buckets, math.inf), counts):
+                cumulative += count
+                labels = _format_labels(self.labelnames, key, [("le", _format_value(bound))])
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(totals[0])}")
+            lines.append(f"{self.name}_count{labels} {_format_value(totals[1])}")
+        return lines
+
+
+class Collected(_Metric):
+    """Wert, der erst beim Abruf aus einer bestehenden Statistik gelesen wird (z. B. Cache-Zähler)."""
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        kind: str,
+        labelnames: Sequence[str],
+        collect: Callable[[], Dict[_LabelValues, float | None]],
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.kind = kind
+        self._collect = collect
+
+    def _samples(self) -> List[str]:
+        values = sorted((key, value) for key, value in self._collect().items() if value is not None)
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}" for key, value in values]
+
+
+HTTP_REQUEST_DURATION = Histogram(
+    "tag2_http_request_duration_seconds", "Bearbeitungszeit je Route bis zum letzten Byte", ("method", "route", "status")
+)
+HTTP_IN_FLIGHT = Gauge("tag2_http_requests_in_flight", "Aktuell bearbeitete HTTP-Anfragen")
+UPSTREAM_IN_FLIGHT = Gauge("tag2_upstream_requests_in_flight", "Laufende Aufrufe an DIP bzw. Gemini", ("upstream",))
+DIP_REQUESTS = Counter("tag2_dip_requests_total", "Aufrufe an die DIP-API je Datensatz und Status", ("dataset", "status"))
+DIP_DURATION = Histogram("tag2_dip_request_duration_seconds", "Antwortzeit der DIP-API je Datensatz", ("dataset",))
+GEMINI_REQUESTS = Counter("tag2_gemini_requests_total", "Aufrufe an Gemini", ("model", "task", "outcome"))
+GEMINI_DURATION = Histogram("tag2_gemini_request_duration_seconds", "Antwortzeit von Gemini", ("model", "task"))
+GEMINI_TOKENS = Counter("tag2_gemini_tokens_total", "Von Gemini gemeldete Tokens", ("model", "task", "kind"))
+
+
+def render() -> str:
+    lines: List[str] = []
+    for metric in _REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+def record_timing(name: str, seconds: float) -> None:
+    timings = _TIMINGS.get()
+    if timings is not None:
+        entry = timings.setdefault(name, [0.0, 0])
+        entry[0] += seconds
+        entry[1] += 1
+
+
+def _server_timing(timings: Dict[str, List[float]], total: float) -> str:
+    entries = [f'{name};dur={seconds * 1000:.1f};desc="{int(count)}x"' for name, (seconds, count) in sorted(timings.items())]
+    entries.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(entries)
+
+
+def _route_label(scope: Scope) -> str:
+    # Die Routenvorlage statt des Pfads, damit Dokument-IDs keine eigenen Zeitreihen erzeugen.
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+class MetricsMiddleware:
+    """Misst Latenz und Parallelität je Route und setzt auf Wunsch einen ``Server-Timing``-Header."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        settings = load_settings().metrics
+        if not settings.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        timings: Dict[str, List[float]] = {}
+        token = _TIMINGS.set(timings)
+        status = 500
+
+        async def send_with_timing(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if settings.server_timing:
+                    headers = MutableHeaders(scope=message)
+                    headers.append("Server-Timing", _server_timing(timings, time.perf_counter() - started))
+            await send(message)
+
+        try:
+            with HTTP_IN_FLIGHT.track():
+                await self.app(scope, receive, send_with_timing)
+        finally:
+            _TIMINGS.reset(token)
+            HTTP_REQUEST_DURATION.observe(
+                time.perf_counter() - started, method=scope["method"], route=_route_label(scope), status=status
+            )
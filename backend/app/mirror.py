@@ -0,0 +1,299 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import base64
+import json
+import sqlite3
+import sys
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Tuple
+
+
+MIRROR_DATASETS = (
+    "vorgang",
+    "vorgangsposition",
+    "drucksache",
+    "drucksache-text",
+    "plenarprotokoll",
+    "plenarprotokoll-text",
+    "person",
+    "aktivitaet",
+)
+
+MIRROR_PAGE_SIZE = 100
+
+# Filter, die lokal ausgewertet werden können, und die zugehörigen Ausdrücke.
+_LIST_FILTERS = {
+    "f.id": "id",
+    "f.vorgangstyp": "json_extract(payload, '$.vorgangstyp')",
+    "f.drucksachetyp": "json_extract(payload, '$.drucksachetyp')",
+    "f.dokumentnummer": "json_extract(payload, '$.dokumentnummer')",
+    "f.dokumentart": "json_extract(payload, '$.dokumentart')",
+}
+_RANGE_FILTERS = {
+    "f.datum.start": ("datum", ">="),
+    "f.datum.end": ("datum", "<="),
+    "f.aktualisiert.start": ("aktualisiert", ">="),
+    "f.aktualisiert.end": ("aktualisiert", "<="),
+}
+
+
+class UnsupportedMirrorQuery(ValueError):
+    pass
+
+
+def _as_list(value: Any) -> List[Any]:
+    if isinstance(value, (list, tuple, set)):
+        return [entry for entry in value if entry not in (None, "")]
+    return [] if value in (None, "") else [value]
+
+
+def _wahlperioden(document: Dict[str, Any]) -> List[int]:
+    """Alle Wahlperioden eines Dokuments; Vorgänge können sich über mehrere erstrecken."""
+    values = []
+    for value in _as_list(document.get("wahlperiode")):
+        if isinstance(value, str) and value.isdigit():
+            value = int(value)
+        if isinstance(value, int) and not isinstance(value, bool):
+            values.append(value)
+    return values
+
+
+def _wahlperiode_filter(value: Any) -> List[int]:
+    values = []
+    for entry in _as_list(value):
+        try:
+            values.append(int(entry))
+        except (TypeError, ValueError):
+            raise UnsupportedMirrorQuery(f"Ungültige Wahlperiode: {entry!r}") from None
+    return values
+
+
+def _encode_cursor(offset: int) -> str:
+    return "mirror:" + base64.urlsafe_b64encode(str(offset).encode()).decode()
+
+
+def is_mirror_cursor(cursor: Any) -> bool:
+    """Cursor, den nur der lokale Spiegel versteht; das DIP lehnt ihn ab."""
+    return isinstance(cursor, str) and cursor.startswith("mirror:")
+
+
+def _decode_cursor(cursor: str | None) -> int:
+    if not cursor:
+        return 0
+    if not is_mirror_cursor(cursor):
+        raise UnsupportedMirrorQuery("Cursor stammt nicht aus dem lokalen Spiegel")
+    return int(base64.urlsafe_b64decode(cursor[len("mirror:"):]).decode())
+
+
+class MirrorStore:
+    """Lokaler Spiegel kompletter DIP-Datensätze inklusive Sync-Checkpoints."""
+
+    def __init__(self, db_path: Path) -> None:
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(db_path), check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._db:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS documents (
+                    dataset TEXT NOT NULL,
+                    id TEXT NOT NULL,
+                    wahlperiode INTEGER,
+                    datum TEXT,
+                    aktualisiert TEXT,
+                    titel TEXT,
+                    payload TEXT NOT NULL,
+                    PRIMARY KEY (dataset, id)
+                );
+                CREATE INDEX IF NOT EXISTS documents_order ON documents (dataset, datum DESC, id DESC);
+                CREATE INDEX IF NOT EXISTS documents_wahlperiode ON documents (dataset, wahlperiode);
+                CREATE TABLE IF NOT EXISTS document_wahlperioden (
+                    dataset TEXT NOT NULL,
+                    id TEXT NOT NULL,
+                    wahlperiode INTEGER NOT NULL,
+                    PRIMARY KEY (dataset, wahlperiode, id)
+                );
+                CREATE TABLE IF NOT EXISTS sync_state (
+                    dataset TEXT PRIMARY KEY,
+                    cursor TEXT,
+                    seeded INTEGER NOT NULL DEFAULT 0,
+                    last_sync TEXT,
+                    started_at TEXT
+                );
+                """
+            )
+            if self._db.execute("PRAGMA user_version").fetchone()[0] < 1:
+                # Ältere Spiegel kannten nur die letzte Wahlperiode: aus den gespeicherten Dokumenten nachtragen.
+                self._db.execute(
+                    "INSERT OR IGNORE INTO document_wahlperioden (dataset, id, wahlperiode) "
+                    "SELECT d.dataset, d.id, CAST(w.value AS INTEGER) "
+                    "FROM documents AS d, json_each(d.payload, '$.wahlperiode') AS w "
+                    "WHERE w.type = 'integer' OR (w.type = 'text' AND w.value GLOB '[0-9]*' "
+                    "AND w.value NOT GLOB '*[^0-9]*')"
+                )
+                self._db.execute("PRAGMA user_version = 1")
+
+    def state(self, dataset: str) -> Dict[str, Any]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT cursor, seeded, last_sync, started_at FROM sync_state WHERE dataset = ?", (dataset,)
+            ).fetchone()
+        if row is None:
+            return {"cursor": None, "seeded": False, "last_sync": None, "started_at": None}
+        return {"cursor": row[0], "seeded": bool(row[1]), "last_sync": row[2], "started_at": row[3]}
+
+    def save_state(self, dataset: str, **values: Any) -> None:
+        state = {**self.state(dataset), **values}
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO sync_state (dataset, cursor, seeded, last_sync, started_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (dataset, state["cursor"], int(state["seeded"]), state["last_sync"], state["started_at"]),
+            )
+
+    def is_seeded(self, dataset: str) -> bool:
+        return self.state(dataset)["seeded"]
+
+    def apply(self, dataset: str, documents: Iterable[Dict[str, Any]], *, cursor: str | None = None) -> int:
+        documents = [document for document in documents if document.get("id") is not None]
+        wahlperioden = {str(document["id"]): _wahlperioden(document) for document in documents}
+        rows = [
+            (
+                dataset,
+                str(document["id"]),
+                # Die Spalte behält die jüngste Wahlperiode; gefiltert wird über ``document_wahlperioden``.
+                (wahlperioden[str(document["id"])] or [None])[-1],
+                document.get("datum"),
+                document.get("aktualisiert"),
+                document.get("titel"),
+                json.dumps(document, ensure_ascii=False),
+            )
+            for document in documents
+        ]
+        with self._lock, self._db:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO documents (dataset, id, wahlperiode, datum, aktualisiert, titel, payload) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            self._db.executemany(
+                "DELETE FROM document_wahlperioden WHERE dataset = ? AND id = ?",
+                [(dataset, document_id) for document_id in wahlperioden],
+            )
+            self._db.executemany(
+                "INSERT OR IGNORE INTO document_wahlperioden (dataset, id, wahlperiode) VALUES (?, ?, ?)",
+                [(dataset, document_id, value) for document_id, values in wahlperioden.items() for value in values],
+            )
+            if cursor is not None:
+                self._db.execute(
+                    "INSERT INTO sync_state (dataset, cursor) VALUES (?, ?) "
+                    "ON CONFLICT (dataset) DO UPDATE SET cursor = excluded.cursor",
+                    (dataset, cursor),
+                )
+        return len(rows)
+
+    def get(self, dataset: str, document_id: str) -> Dict[str, Any] | None:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT payload FROM documents WHERE dataset = ? AND id = ?", (dataset, str(document_id))
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def query(self, dataset: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Beantwortet eine DIP-Listenabfrage lokal; unbekannte Filter lösen ``UnsupportedMirrorQuery`` aus."""
+        where = ["dataset = ?"]
+        args: List[Any] = [dataset]
+        offset = 0
+        for key, value in params.items():
+            if key in ("format", "apikey") or value in (None, "", []):
+                continue
+            if key == "cursor":
+                offset = _decode_cursor(value)
+            elif key == "f.wahlperiode":
+                # Wie beim DIP trifft jede der Wahlperioden eines Dokuments.
+                values = _wahlperiode_filter(value)
+                where.append(
+                    "id IN (SELECT id FROM document_wahlperioden WHERE dataset = ? "
+                    f"AND wahlperiode IN ({', '.join('?' for _ in values)}))"
+                )
+                args.extend([dataset, *values])
+            elif key in _LIST_FILTERS:
+                values = _as_list(value)
+                where.append(f"{_LIST_FILTERS[key]} IN ({', '.join('?' for _ in values)})")
+                args.extend(values)
+            elif key in _RANGE_FILTERS:
+                column, operator = _RANGE_FILTERS[key]
+                where.append(f"{column} {operator} ?")
+                args.append(str(value))
+            elif key == "f.titel":
+                for term in _as_list(value):
+                    where.append("titel LIKE ?")
+                    args.append(f"%{term}%")
+            else:
+                raise UnsupportedMirrorQuery(f"Filter {key} wird lokal nicht unterstützt")
+
+        clause = " AND ".join(where)
+        with self._lock:
+            total = self._db.execute(f"SELECT COUNT(*) FROM documents WHERE {clause}", args).fetchone()[0]
+            rows = self._db.execute(
+                f"SELECT payload FROM documents WHERE {clause} ORDER BY datum DESC, id DESC LIMIT ? OFFSET ?",
+                [*args, MIRROR_PAGE_SIZE, offset],
+            ).fetchall()
+        next_offset = offset + len(rows)
+        return {
+            "numFound": total,
+            "documents": [json.loads(row[0]) for row in rows],
+            # Wie beim DIP: am Ende bleibt der Cursor stehen.
+            "cursor": _encode_cursor(next_offset if rows else offset),
+        }
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            counts: List[Tuple[str, int]] = self._db.execute(
+                "SELECT dataset, COUNT(*) FROM documents GROUP BY dataset"
+            ).fetchall()
+        per_dataset = dict(counts)
+        return {
+            dataset: {**self.state(dataset), "documents": per_dataset.get(dataset, 0)}
+            for dataset in sorted(set(per_dataset) | set(MIRROR_DATASETS))
+        }
+
+
+async def _run_cli(args: argparse.Namespace) -> int:
+    from . import bundestag
+
+    try:
+        if args.command == "status":
+            print(json.dumps(bundestag.get_mirror_store().stats(), ensure_ascii=False, indent=2))
+            return 0
+        datasets = args.datasets or list(MIRROR_DATASETS)
+        results = await bundestag.sync_mirror(datasets, requests_per_second=args.rps)
+        print(json.dumps(results, ensure_ascii=False, indent=2))
+        return 0
+    finally:
+        await bundestag.close_http_client()
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="DIP-Datensätze lokal spiegeln (fortsetzbar).")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    sync_parser = subparsers.add_parser("sync", help="Datensätze vollständig bzw. inkrementell abgleichen")
+    sync_parser.add_argument("datasets", nargs="*", metavar="dataset", help=", ".join(MIRROR_DATASETS))
+    sync_parser.add_argument("--rps", type=float, default=None, help="Maximale DIP-Anfragen pro Sekunde")
+    subparsers.add_parser("status", help="Stand des Spiegels anzeigen")
+    args = parser.parse_args(argv)
+    unknown = sorted(set(getattr(args, "datasets", None) or []) - set(MIRROR_DATASETS))
+    if unknown:
+        parser.error(f"Unbekannte Datensätze: {', '.join(unknown)}")
+    try:
+        return asyncio.run(_run_cli(args))
+    except KeyboardInterrupt:  # pragma: no cover - CLI Komfort, Checkpoint bleibt erhalten
+        return 130
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import bisect
+import re
+from typing import Any, Dict, Iterable, List, Set, Tuple
+
+from .search_index import _fold
+
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def _tokens(text: str) -> List[str]:
+    return _TOKEN_RE.findall(_fold(text))
+
+
+def _trigrams(token: str) -> Set[str]:
+    return {token[index : index + 3] for index in range(len(token) - 2)}
+
+
+def _latest_wahlperiode(value: Any) -> int:
+    entries = value if isinstance(value, list) else [value]
+    numbers = [int(entry) for entry in entries if isinstance(entry, int) or (isinstance(entry, str) and entry.isdigit())]
+    return max(numbers, default=0)
+
+
+class PersonIndex:
+    """Unveränderlicher In-Memory-Index für die Personen-Autovervollständigung.
+
+    Suchbegriffe werden wie Namen gefaltet (Groß-/Kleinschreibung, Akzente, ß) und
+    per Präfix auf sortierten Namensbestandteilen gesucht; findet ein Begriff kein
+    Präfix, greifen Trigramme für Treffer mitten im Namen.
+    """
+
+    def __init__(self, options: Iterable[Dict[str, Any]]) -> None:
+        self.options: List[Dict[str, Any]] = []
+        self._names: List[str] = []
+        self._sort_keys: List[str] = []
+        self._surnames: List[Set[str]] = []
+        self._rank: List[int] = []
+        prefixes: List[Tuple[str, int]] = []
+        self._trigrams: Dict[str, Set[int]] = {}
+        for position, option in enumerate(options):
+            self.options.append(option)
+            name = " ".join(filter(None, [option.get("vorname"), option.get("nachname"), option.get("title")]))
+            name_tokens = set(_tokens(name))
+            self._names.append(" ".join(sorted(name_tokens)))
+            self._sort_keys.append(_fold(f"{option.get('nachname') or ''} {option.get('vorname') or ''} {option.get('title') or ''}"))
+            self._surnames.append(set(_tokens(option.get("nachname") or "")))
+            self._rank.append(_latest_wahlperiode(option.get("wahlperioden")))
+            for token in name_tokens:
+                prefixes.append((token, position))
+                for trigram in _trigrams(token):
+                    self._trigrams.setdefault(trigram, set()).add(position)
+        prefixes.sort()
+        self._prefix_tokens = [token for token, _ in prefixes]
+        self._prefix_positions = [position for _, position in prefixes]
+
+    def __len__(self) -> int:
+        return len(self.options)
+
+    def _prefix_matches(self, term: str) -> Set[int]:
+        start = bisect.bisect_left(self._prefix_tokens, term)
+        end = bisect.bisect_left(self._prefix_tokens, term + "\uffff", lo=start)
+        return set(self._prefix_positions[start:end])
+
+    def _infix_matches(self, term: str) -> Set[int]:
+        grams = _trigrams(term)
+        if not grams:
+            return set()
+        candidates = set.intersection(*(self._trigrams.get(gram, set()) for gram in grams))
+        return {position for position in candidates if term in self._names[position]}
+
+    def search(self, query: str, *, limit: int = 50, offset: int = 0) -> Tuple[List[Dict[str, Any]], int]:
+        terms = _tokens(query)
+        if terms:
+            matches: Set[int] | None = None
+            for term in terms:
+                found = self._prefix_matches(term) or self._infix_matches(term)
+                matches = found if matches is None else matches & found
+                if not matches:
+                    return [], 0
+            positions = list(matches or ())
+        else:
+            positions = list(range(len(self.options)))
+
+        def _order(position: int) -> Tuple[int, int, str]:
+            # Aktuelle Abgeordnete zuerst, dann Treffer im Nachnamen, dann alphabetisch.
+            surname_hit = any(surname.startswith(term) for term in terms for surname in self._surnames[position])
+            return (-self._rank[position], 0 if surname_hit else 1, self._sort_keys[position])
+
+        positions.sort(key=_order)
+        return [self.options[position] for position in positions[offset : offset + limit]], len(positions)
@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Literal, Optional
 
 from pydantic import BaseModel, Field
 
@@ -10,6 +10,22 @@ class GeminiConfigUpdate(BaseModel):
     model: Optional[str] = None
     system_prompt: Optional[str] = None
     temperature: Optional[float] = None
+    max_concurrency: Optional[int] = None
+    request_timeout: Optional[float] = None
+    max_retries: Optional[int] = None
+    retry_base_delay: Optional[float] = None
+    cache_enabled: Optional[bool] = None
+    cache_max_bytes: Optional[int] = None
+    cache_max_entries: Optional[int] = None
+    cache_ttl_hours: Optional[int] = None
+    chunk_threshold_tokens: Optional[int] = None
+    chunk_max_tokens: Optional[int] = None
+    chunk_concurrency: Optional[int] = None
+    batch_concurrency: Optional[int] = None
+    context_cache_enabled: Optional[bool] = None
+    context_cache_min_tokens: Optional[int] = None
+    context_cache_ttl_minutes: Optional[int] = None
+    prewarm_sdk: Optional[bool] = None
 
 
 class BundestagConfigUpdate(BaseModel):
@@ -17,6 +33,38 @@ class BundestagConfigUpdate(BaseModel):
     base_url: Optional[str] = None
     default_filters: Optional[Dict[str, Any]] = None
     default_dataset: Optional[str] = None
+    timeout: Optional[float] = None
+    connect_timeout: Optional[float] = None
+    http2: Optional[bool] = None
+    max_connections: Optional[int] = None
+    max_keepalive_connections: Optional[int] = None
+    keepalive_expiry: Optional[float] = None
+    requests_per_second: Optional[float] = None
+    burst: Optional[int] = None
+    max_retries: Optional[int] = None
+    retry_base_delay: Optional[float] = None
+    retry_max_delay: Optional[float] = None
+    breaker_failure_threshold: Optional[int] = None
+    breaker_reset_seconds: Optional[float] = None
+    prefetch_pages: Optional[int] = None
+    prefetch_max_sessions: Optional[int] = None
+    batch_fetch_concurrency: Optional[int] = None
+    export_requests_per_second: Optional[float] = None
+    cache_enabled: Optional[bool] = None
+    cache_max_bytes: Optional[int] = None
+    cache_persist: Optional[bool] = None
+    cache_ttl_seconds: Optional[Dict[str, int]] = None
+    facet_index_enabled: Optional[bool] = None
+    facet_sync_interval_minutes: Optional[int] = None
+    search_index_enabled: Optional[bool] = None
+    mirror_datasets: Optional[List[str]] = None
+    mirror_sync_interval_minutes: Optional[int] = None
+    mirror_requests_per_second: Optional[float] = None
+    serve_from_mirror: Optional[bool] = None
+    fulltext_workers: Optional[int] = None
+    fulltext_max_download_bytes: Optional[int] = None
+    person_index_enabled: Optional[bool] = None
+    person_index_refresh_hours: Optional[int] = None
 
 
 class UIConfigUpdate(BaseModel):
@@ -24,18 +72,70 @@ class UIConfigUpdate(BaseModel):
     default_gemini_task: Optional[str] = None
 
 
+class MetricsConfigUpdate(BaseModel):
+    enabled: Optional[bool] = None
+    server_timing: Optional[bool] = None
+
+
 class ConfigUpdate(BaseModel):
     gemini: Optional[GeminiConfigUpdate] = None
     bundestag: Optional[BundestagConfigUpdate] = None
     ui: Optional[UIConfigUpdate] = None
+    metrics: Optional[MetricsConfigUpdate] = None
 
 
 class GeminiTaskRequest(BaseModel):
     text: str = Field(..., description="Textinhalt, der von Gemini verarbeitet werden soll")
     task: str = Field(..., description="Aktion, die Gemini ausführen soll")
-    options: Dict[str, Any] = Field(default_factory=dict)
+    options: Dict[str, Any] = Field(
+        default_factory=dict,
+        description="Aufgabenoptionen; bypass_cache=true erzwingt eine neue Antwort statt des Caches",
+    )
 
 
 class DatasetRequest(BaseModel):
     dataset: str = Field(..., description="Zieldatensatz der Bundestags-API, z. B. vorgang oder drucksache")
     params: Dict[str, Any] = Field(default_factory=dict)
+    prefetch: Optional[int] = Field(
+        None, ge=0, le=10, description="Anzahl Folgeseiten, die vorab geladen werden; Standard aus der Konfiguration"
+    )
+    fields: Optional[List[str]] = Field(
+        None, description="Nur diese Felder je Dokument zurückgeben, z. B. titel oder fundstelle.pdf_url"
+    )
+
+
+class ExportRequest(BaseModel):
+    dataset: str = Field(..., description="Zieldatensatz der Bundestags-API, z. B. vorgang oder drucksache")
+    params: Dict[str, Any] = Field(default_factory=dict, description="DIP-Filter wie bei der Suche, ohne Cursor")
+    format: Literal["ndjson", "csv"] = "ndjson"
+    fields: Optional[List[str]] = Field(
+        None, description="Nur diese Felder exportieren (Punktnotation); bei CSV zugleich die Spalten"
+    )
+    limit: Optional[int] = Field(None, ge=1, description="Höchstens so viele Dokumente exportieren")
+
+
+class BatchDocument(BaseModel):
+    dataset: str = Field(..., description="Datensatz des Dokuments, z. B. vorgang oder drucksache")
+    id: str = Field(..., description="Dokument-ID im DIP")
+
+
+class DocumentBatchRequest(BaseModel):
+    documents: List[BatchDocument] = Field(..., min_length=1, max_length=200)
+
+
+class GeminiBatchRequest(BaseModel):
+    task: str = Field(..., description="Aktion, die Gemini für jedes Dokument ausführen soll")
+    options: Dict[str, Any] = Field(default_factory=dict)
+    documents: List[BatchDocument] = Field(default_factory=list, description="Explizit ausgewählte Dokumente")
+    query: Optional[DatasetRequest] = Field(None, description="Alternativ: DIP-Suche, deren Treffer verarbeitet werden")
+    limit: int = Field(200, ge=1, le=1000, description="Maximale Anzahl an Treffern aus der Suche")
+
+
+class LocalSearchRequest(BaseModel):
+    query: str = Field("", description="Suchbegriffe für den lokalen Volltextindex")
+    dataset: Optional[str] = Field(None, description="Optional auf vorgang oder drucksache beschränken")
+    wahlperiode: List[int] = Field(default_factory=list)
+    vorgangstyp: List[str] = Field(default_factory=list)
+    initiative: List[str] = Field(default_factory=list)
+    limit: int = Field(50, ge=1, le=500)
+    offset: int = Field(0, ge=0)
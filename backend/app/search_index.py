@@ -0,0 +1,228 @@
+from __future__ import annotations
+
+import json
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Sequence
+
+
+INDEXED_DATASETS = ("vorgang", "drucksache")
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def _fold(text: str) -> str:
+    text = text.lower().replace("ß", "ss")
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def german_stem(word: str) -> str:
+    """Leichtgewichtiger deutscher Stemmer nach CISTEM (Weissweiler & Fraser, 2017)."""
+    word = _fold(word)
+    if len(word) <= 3:
+        return word
+    word = re.sub(r"^ge(.{4,})", r"\1", word)
+    word = word.replace("sch", "$").replace("ei", "%").replace("ie", "&")
+    word = re.sub(r"(.)\1", r"\1*", word)
+    while len(word) > 3:
+        if len(word) > 5:
+            word, count = re.subn(r"e[mr]$", "", word)
+            if count:
+                continue
+            word, count = re.subn(r"nd$", "", word)
+            if count:
+                continue
+        word, count = re.subn(r"t$", "", word)
+        if count:
+            continue
+        word, count = re.subn(r"[esn]$", "", word)
+        if not count:
+            break
+    word = re.sub(r"(.)\*", r"\1\1", word)
+    return word.replace("&", "ie").replace("%", "ei").replace("$", "sch")
+
+
+def stem_text(text: str) -> str:
+    return " ".join(german_stem(token) for token in _TOKEN_RE.findall(text))
+
+
+def _named(values: Any, *keys: str) -> List[str]:
+    result: List[str] = []
+    for value in values if isinstance(values, list) else []:
+        if isinstance(value, str):
+            result.append(value)
+        elif isinstance(value, dict):
+            result.extend(str(value[key]) for key in keys if value.get(key))
+    return result
+
+
+def _document_text(document: Dict[str, Any]) -> str:
+    parts: List[str] = []
+    for key in ("abstract", "vorgangstyp", "drucksachetyp", "dokumentnummer", "gesta"):
+        value = document.get(key)
+        if isinstance(value, str):
+            parts.append(value)
+    parts.extend(_named(document.get("sachgebiet"), "name"))
+    parts.extend(_named(document.get("deskriptor"), "name"))
+    parts.extend(_named(document.get("initiative")))
+    parts.extend(_named(document.get("urheber"), "titel", "bezeichnung"))
+    parts.extend(_named(document.get("autoren_anzeige"), "autor_titel"))
+    parts.extend(_named(document.get("vorgangsbezug"), "titel"))
+    return "\n".join(parts)
+
+
+def _wahlperiode(document: Dict[str, Any]) -> int | None:
+    value = document.get("wahlperiode")
+    if isinstance(value, list):
+        value = value[0] if value else None
+    if isinstance(value, str) and value.isdigit():
+        return int(value)
+    return value if isinstance(value, int) else None
+
+
+class SearchIndex:
+    """Lokaler Volltextindex (SQLite FTS5) über bereits abgerufene DIP-Dokumente.
+
+    Titel und Text werden vor der Indexierung gestemmt, Suchbegriffe genauso;
+    FTS5 selbst bringt keinen deutschen Stemmer mit.
+    """
+
+    def __init__(self, db_path: Path) -> None:
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(db_path), check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._db:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS documents (
+                    rowid INTEGER PRIMARY KEY,
+                    dataset TEXT NOT NULL,
+                    id TEXT NOT NULL,
+                    wahlperiode INTEGER,
+                    vorgangstyp TEXT,
+                    aktualisiert TEXT,
+                    payload TEXT NOT NULL,
+                    UNIQUE (dataset, id)
+                );
+                CREATE INDEX IF NOT EXISTS documents_filter ON documents (dataset, wahlperiode, vorgangstyp);
+                CREATE TABLE IF NOT EXISTS document_initiative (
+                    doc_rowid INTEGER NOT NULL,
+                    initiative TEXT NOT NULL,
+                    PRIMARY KEY (initiative, doc_rowid)
+                );
+                CREATE VIRTUAL TABLE IF NOT EXISTS documents_fts USING fts5(
+                    titel, text, tokenize = 'unicode61 remove_diacritics 2'
+                );
+                """
+            )
+
+    def add(self, dataset: str, documents: Iterable[Dict[str, Any]]) -> int:
+        added = 0
+        with self._lock, self._db:
+            for document in documents:
+                doc_id = document.get("id")
+                if doc_id is None:
+                    continue
+                doc_id = str(doc_id)
+                aktualisiert = document.get("aktualisiert")
+                existing = self._db.execute(
+                    "SELECT rowid, aktualisiert FROM documents WHERE dataset = ? AND id = ?", (dataset, doc_id)
+                ).fetchone()
+                if existing is not None and aktualisiert and existing[1] == aktualisiert:
+                    continue
+                vorgangstyp = document.get("vorgangstyp") if isinstance(document.get("vorgangstyp"), str) else None
+                values = (
+                    dataset,
+                    doc_id,
+                    _wahlperiode(document),
+                    vorgangstyp,
+                    aktualisiert,
+                    json.dumps(document, ensure_ascii=False),
+                )
+                if existing is None:
+                    rowid = self._db.execute(
+                        "INSERT INTO documents (dataset, id, wahlperiode, vorgangstyp, aktualisiert, payload) "
+                        "VALUES (?, ?, ?, ?, ?, ?)",
+                        values,
+                    ).lastrowid
+                else:
+                    rowid = existing[0]
+                    self._db.execute(
+                        "UPDATE documents SET dataset = ?, id = ?, wahlperiode = ?, vorgangstyp = ?, "
+                        "aktualisiert = ?, payload = ? WHERE rowid = ?",
+                        (*values, rowid),
+                    )
+                    self._db.execute("DELETE FROM documents_fts WHERE rowid = ?", (rowid,))
+                    self._db.execute("DELETE FROM document_initiative WHERE doc_rowid = ?", (rowid,))
+                self._db.execute(
+                    "INSERT INTO documents_fts (rowid, titel, text) VALUES (?, ?, ?)",
+                    (rowid, stem_text(str(document.get("titel") or "")), stem_text(_document_text(document))),
+                )
+                initiativen = {value.strip() for value in _named(document.get("initiative")) if value.strip()}
+                self._db.executemany(
+                    "INSERT OR IGNORE INTO document_initiative (doc_rowid, initiative) VALUES (?, ?)",
+                    [(rowid, initiative) for initiative in initiativen],
+                )
+                added += 1
+        return added
+
+    def search(
+        self,
+        query: str,
+        *,
+        dataset: str | None = None,
+        wahlperiode: Sequence[int] = (),
+        vorgangstyp: Sequence[str] = (),
+        initiative: Sequence[str] = (),
+        limit: int = 50,
+        offset: int = 0,
+    ) -> Dict[str, Any]:
+        started = time.perf_counter()
+        terms = [german_stem(token) for token in _TOKEN_RE.findall(query)]
+        where: List[str] = []
+        args: List[Any] = []
+        if terms:
+            where.append("documents_fts MATCH ?")
+            args.append(" AND ".join(f'"{term}"*' for term in terms))
+        if dataset:
+            where.append("d.dataset = ?")
+            args.append(dataset)
+        if wahlperiode:
+            where.append(f"d.wahlperiode IN ({', '.join('?' for _ in wahlperiode)})")
+            args.extend(wahlperiode)
+        if vorgangstyp:
+            where.append(f"d.vorgangstyp IN ({', '.join('?' for _ in vorgangstyp)})")
+            args.extend(vorgangstyp)
+        if initiative:
+            where.append(
+                "d.rowid IN (SELECT doc_rowid FROM document_initiative "
+                f"WHERE initiative IN ({', '.join('?' for _ in initiative)}))"
+            )
+            args.extend(initiative)
+
+        source = "documents d JOIN documents_fts ON documents_fts.rowid = d.rowid" if terms else "documents d"
+        clause = f"WHERE {' AND '.join(where)}" if where else ""
+        order = "ORDER BY bm25(documents_fts, 10.0, 1.0)" if terms else "ORDER BY d.aktualisiert DESC"
+        with self._lock:
+            total = self._db.execute(f"SELECT COUNT(*) FROM {source} {clause}", args).fetchone()[0]
+            rows = self._db.execute(
+                f"SELECT d.dataset, d.payload FROM {source} {clause} {order} LIMIT ? OFFSET ?",
+                [*args, limit, offset],
+            ).fetchall()
+        documents = [{**json.loads(payload), "dataset": row_dataset} for row_dataset, payload in rows]
+        return {
+            "documents": documents,
+            "numFound": total,
+            "tookMs": round((time.perf_counter() - started) * 1000, 2),
+        }
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            rows = self._db.execute("SELECT dataset, COUNT(*) FROM documents GROUP BY dataset").fetchall()
+        return {dataset: count for dataset, count in rows}
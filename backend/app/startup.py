@@ -0,0 +1,81 @@
+"""Startzeitbericht: Dauer von Import, Lifespan und verzögert geladenen Modulen.
+
+``python -m app.startup`` zerlegt zusätzlich den Import von ``app.main`` je Modul
+(über ``python -X importtime`` in einem frischen Interpreter).
+"""
+
+from __future__ import annotations
+
+import argparse
+import re
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+from . import IMPORT_STARTED
+
+
+# Schwere Abhängigkeiten, die erst bei Bedarf geladen werden.
+LAZY_MODULES = ("google.genai",)
+
+_PHASES: Dict[str, float] = {}
+_IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)$")
+
+
+def record_phase(name: str, seconds: float) -> None:
+    _PHASES[name] = round(seconds, 4)
+
+
+def mark_imported() -> None:
+    """Am Ende von ``app.main`` aufrufen: Zeit seit Beginn des App-Imports."""
+    record_phase("imports", time.perf_counter() - IMPORT_STARTED)
+
+
+def startup_report() -> Dict[str, Any]:
+    return {
+        "phases": dict(_PHASES),
+        "lazy_modules": {name: name in sys.modules for name in LAZY_MODULES},
+    }
+
+
+def import_profile(module: str = "app.main", *, limit: int = 25) -> List[Dict[str, Any]]:
+    """Importkosten je Modul (kumuliert und eigen, in Sekunden), teuerste zuerst."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=Path(__file__).resolve().parents[1],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    entries = []
+    for line in result.stderr.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        if match is None:
+            continue
+        own, cumulative, indent, name = match.groups()
+        entries.append(
+            {
+                "module": name,
+                "depth": len(indent) // 2,
+                "self": int(own) / 1e6,
+                "cumulative": int(cumulative) / 1e6,
+            }
+        )
+    entries.sort(key=lambda entry: entry["cumulative"], reverse=True)
+    return entries[:limit]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Importkosten des Backends je Modul")
+    parser.add_argument("--module", default="app.main")
+    parser.add_argument("--limit", type=int, default=25)
+    args = parser.parse_args()
+    print(f"{'kumuliert':>10} {'eigen':>8}  Modul")
+    for entry in import_profile(args.module, limit=args.limit):
+        print(f"{entry['cumulative']:>9.3f}s {entry['self']:>7.3f}s  {'  ' * entry['depth']}{entry['module']}")
+
+
+if __name__ == "__main__":
+    main()
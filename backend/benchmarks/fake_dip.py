@@ -0,0 +1,163 @@
+"""Lokaler Ersatz für die DIP-API: spielt aufgezeichnete oder synthetische Seiten mit Latenz ab."""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import random
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, List
+
+import httpx
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+
+DATASETS = ("vorgang", "drucksache", "plenarprotokoll", "person")
+PAGE_SIZE = 100
+
+# Umfang der synthetischen Datensätze; klein genug für einen Lauf in Sekunden.
+_SYNTHETIC_SIZES = {"vorgang": 1000, "drucksache": 500, "plenarprotokoll": 50, "person": 300}
+_VORGANGSTYPEN = ["Gesetzgebung", "Antrag", "Kleine Anfrage", "Große Anfrage", "Bericht", "Verordnung"]
+_INITIATIVEN = ["Bundesregierung", "Bundesrat", "Fraktion der SPD", "Fraktion der CDU/CSU", "Fraktion BÜNDNIS 90/DIE GRÜNEN"]
+_DRUCKSACHETYPEN = ["Antrag", "Gesetzentwurf", "Kleine Anfrage", "Antwort", "Beschlussempfehlung und Bericht"]
+_VORNAMEN = ["Anna", "Bernd", "Claudia", "Dieter", "Elke", "Friedrich", "Gül", "Hans", "Ines", "Jürgen"]
+_NACHNAMEN = ["Müller", "Schmidt", "Schneider", "Fischer", "Weber", "Meyer", "Wagner", "Becker", "Schulz", "Hoffmann",
+              "Koch", "Richter", "Klein", "Wolf", "Schröder", "Neumann", "Schwarz", "Zimmermann", "Braun", "Krüger"]
+_STAMP = "2024-01-15T10:00:00+01:00"
+
+
+def synthetic_documents(dataset: str, count: int, seed: int = 1) -> List[Dict[str, Any]]:
+    """Deterministische Dokumente mit den Feldern, die Facetten, Suche und Personenindex auswerten."""
+    rng = random.Random(f"{dataset}:{seed}")
+    documents: List[Dict[str, Any]] = []
+    for number in range(1, count + 1):
+        document: Dict[str, Any] = {"id": str(number), "aktualisiert": _STAMP, "datum": "2024-01-15"}
+        if dataset == "person":
+            document.update(
+                vorname=rng.choice(_VORNAMEN),
+                nachname=f"{rng.choice(_NACHNAMEN)}{'-' + rng.choice(_NACHNAMEN) if number % 7 == 0 else ''}",
+                fraktion=[rng.choice(_INITIATIVEN[2:])],
+                wahlperiode=sorted(rng.sample(range(14, 21), 2)),
+            )
+            document["titel"] = f"{document['vorname']} {document['nachname']}, MdB"
+        else:
+            document.update(
+                titel=f"{rng.choice(_VORGANGSTYPEN)} zur Änderung des Gesetzes Nr. {number}",
+                wahlperiode=rng.randint(14, 20),
+                abstract=" ".join(rng.choice(_NACHNAMEN) for _ in range(40)),
+                deskriptor=[{"name": rng.choice(_NACHNAMEN), "typ": "Sachbegriff"} for _ in range(5)],
+                fundstelle={"pdf_url": f"https://dserver.invalid/{dataset}/{number}.pdf", "xml_url": None},
+            )
+            if dataset == "vorgang":
+                document.update(vorgangstyp=rng.choice(_VORGANGSTYPEN), initiative=rng.sample(_INITIATIVEN, 2))
+            elif dataset == "drucksache":
+                document["drucksachetyp"] = rng.choice(_DRUCKSACHETYPEN)
+        documents.append(document)
+    return documents
+
+
+def load_documents(recordings: Path | None, seed: int = 1) -> Dict[str, List[Dict[str, Any]]]:
+    """Aufzeichnungen (``<datensatz>.json``) haben Vorrang; fehlende Datensätze werden synthetisch erzeugt."""
+    documents: Dict[str, List[Dict[str, Any]]] = {}
+    for dataset in DATASETS:
+        path = recordings / f"{dataset}.json" if recordings else None
+        if path is not None and path.exists():
+            documents[dataset] = json.loads(path.read_text(encoding="utf-8"))
+        else:
+            documents[dataset] = synthetic_documents(dataset, _SYNTHETIC_SIZES[dataset], seed)
+    return documents
+
+
+def _matches(document: Dict[str, Any], params: Dict[str, List[str]]) -> bool:
+    since = params.get("f.aktualisiert.start")
+    if since and str(document.get("aktualisiert", ""))[:19] < since[0][:19]:
+        return False
+    for query in params.get("f.person", []):
+        name = f"{document.get('vorname', '')} {document.get('nachname', '')}".lower()
+        if query.lower() not in name:
+            return False
+    return True
+
+
+class FakeDIP:
+    """Starlette-App mit Cursor-Paginierung wie beim DIP; Latenz und Jitter sind per Seed reproduzierbar."""
+
+    def __init__(self, documents: Dict[str, List[Dict[str, Any]]], latency: float, jitter: float, seed: int = 1) -> None:
+        self.documents = documents
+        self.latency = latency
+        self.jitter = jitter
+        self.calls: Counter[str] = Counter()
+        self._rng = random.Random(seed)
+        self._by_id = {dataset: {str(doc["id"]): doc for doc in docs} for dataset, docs in documents.items()}
+        self.app = Starlette(
+            routes=[
+                Route("/{dataset}", self.list_documents),
+                Route("/{dataset}/{document_id}", self.get_document),
+            ]
+        )
+
+    async def _delay(self, dataset: str) -> None:
+        self.calls[dataset] += 1
+        await asyncio.sleep(self.latency + self._rng.uniform(0, self.jitter))
+
+    async def list_documents(self, request: Request) -> JSONResponse:
+        dataset = request.path_params["dataset"]
+        await self._delay(dataset)
+        if dataset not in self.documents:
+            return JSONResponse({"message": "unbekannter Datensatz"}, status_code=404)
+        params = {key: request.query_params.getlist(key) for key in request.query_params.keys()}
+        matching = [document for document in self.documents[dataset] if _matches(document, params)]
+        cursor = request.query_params.get("cursor") or ""
+        offset = int(cursor[1:]) if cursor.startswith("c") and cursor[1:].isdigit() else 0
+        page = matching[offset : offset + PAGE_SIZE]
+        # Wie der DIP: am Ende kommt derselbe Cursor zurück.
+        next_cursor = f"c{offset + PAGE_SIZE}" if offset + PAGE_SIZE < len(matching) else cursor or f"c{offset}"
+        return JSONResponse({"documents": page, "cursor": next_cursor, "numFound": len(matching)})
+
+    async def get_document(self, request: Request) -> JSONResponse:
+        dataset = request.path_params["dataset"]
+        await self._delay(dataset)
+        document = self._by_id.get(dataset, {}).get(request.path_params["document_id"])
+        if document is None:
+            return JSONResponse({"message": "nicht gefunden"}, status_code=404)
+        return JSONResponse(document)
+
+
+async def record(target: Path, api_key: str, pages: int, base_url: str) -> None:
+    """Zeichnet die ersten ``pages`` Seiten je Datensatz aus dem echten DIP auf."""
+    target.mkdir(parents=True, exist_ok=True)
+    headers = {"Authorization": f"ApiKey {api_key}"}
+    async with httpx.AsyncClient(base_url=base_url, headers=headers, timeout=60) as client:
+        for dataset in DATASETS:
+            documents: List[Dict[str, Any]] = []
+            cursor: str | None = None
+            for _ in range(pages):
+                params = {"format": "json", **({"cursor": cursor} if cursor else {})}
+                response = await client.get(f"/{dataset}", params=params)
+                response.raise_for_status()
+                data = response.json()
+                documents.extend(data.get("documents", []))
+                if not data.get("cursor") or data.get("cursor") == cursor:
+                    break
+                cursor = data["cursor"]
+            (target / f"{dataset}.json").write_text(json.dumps(documents, ensure_ascii=False), encoding="utf-8")
+            print(f"{dataset}: {len(documents)} Dokumente")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Echte DIP-Seiten für die Benchmarks aufzeichnen")
+    parser.add_argument("target", type=Path, help="Zielverzeichnis für <datensatz>.json")
+    parser.add_argument("--api-key", required=True)
+    parser.add_argument("--pages", type=int, default=10)
+    parser.add_argument("--base-url", default="https://search.dip.bundestag.de/api/v1")
+    args = parser.parse_args()
+    asyncio.run(record(args.target, args.api_key, args.pages, args.base_url))
+
+
+if __name__ == "__main__":
+    main()
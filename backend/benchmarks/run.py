@@ -0,0 +1,390 @@
+"""Benchmark-Lauf gegen einen lokalen DIP-Ersatz und einen Gemini-Stub.
+
+Aufruf aus ``backend/``::
+
+    python -m benchmarks.run --output vorher.json
+    python -m benchmarks.run --output nachher.json --compare vorher.json
+
+Die App läuft mit Standardeinstellungen in eigenen Temp-Verzeichnissen; Latenzen,
+Jitter und Lastprofile sind per Seed festgelegt, damit Läufe verschiedener Commits
+vergleichbar bleiben.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Sequence
+
+import httpx
+import uvicorn
+
+from .fake_dip import FakeDIP, load_documents
+from .stub_gemini import StubGemini
+
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+WORKLOADS = ("options_cold_start", "search_pagination", "person_autocomplete", "gemini_tasks")
+# Kennzahlen, die ``--compare`` gegenüberstellt; bei allen außer dem Durchsatz ist kleiner besser.
+_COMPARED = ("throughput_rps", "p50", "p95", "p99", "dip_calls", "gemini_calls")
+
+
+class _ServerThread:
+    """Uvicorn in einem eigenen Thread samt Event-Loop, gebunden an einen freien lokalen Port."""
+
+    def __init__(self, app: Any) -> None:
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._socket.bind(("127.0.0.1", 0))
+        self.url = f"http://127.0.0.1:{self._socket.getsockname()[1]}"
+        self._server = uvicorn.Server(uvicorn.Config(app, log_level="warning", loop="asyncio", http="h11"))
+        self._thread = threading.Thread(target=self._server.run, kwargs={"sockets": [self._socket]}, daemon=True)
+
+    def __enter__(self) -> "_ServerThread":
+        self._thread.start()
+        while not self._server.started:
+            if not self._thread.is_alive():
+                raise RuntimeError(f"Server unter {self.url} konnte nicht starten")
+            time.sleep(0.01)
+        return self
+
+    def __exit__(self, *_: Any) -> None:
+        self._server.should_exit = True
+        self._thread.join(timeout=30)
+        self._socket.close()
+
+
+class _Recorder:
+    def __init__(self) -> None:
+        self.latencies: List[float] = []
+        self.errors = 0
+
+    async def request(self, client: httpx.AsyncClient, method: str, url: str, **kwargs: Any) -> httpx.Response | None:
+        started = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+        except httpx.HTTPError:
+            self.latencies.append(time.perf_counter() - started)
+            self.errors += 1
+            return None
+        self.latencies.append(time.perf_counter() - started)
+        if response.status_code >= 400:
+            self.errors += 1
+        return response
+
+
+def _percentile(values: Sequence[float], quantile: float) -> float | None:
+    if not values:
+        return None
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * quantile
+    lower, upper = math.floor(position), math.ceil(position)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def _ms(value: float | None) -> float | None:
+    return round(value * 1000, 2) if value is not None else None
+
+
+def _summary(recorder: _Recorder, duration: float) -> Dict[str, Any]:
+    latencies = recorder.latencies
+    return {
+        "requests": len(latencies),
+        "errors": recorder.errors,
+        "duration_s": round(duration, 3),
+        "throughput_rps": round(len(latencies) / duration, 2) if duration > 0 else None,
+        "latency_ms": {
+            "p50": _ms(_percentile(latencies, 0.50)),
+            "p95": _ms(_percentile(latencies, 0.95)),
+            "p99": _ms(_percentile(latencies, 0.99)),
+            "max": _ms(max(latencies, default=None)),
+            "mean": _ms(statistics.fmean(latencies) if latencies else None),
+        },
+    }
+
+
+async def _options_cold_start(client: httpx.AsyncClient, recorder: _Recorder, rng: random.Random, scale: float) -> Dict[str, Any]:
+    cold = _Recorder()
+    await cold.request(client, "GET", "/api/bundestag/options")
+    for _ in range(max(1, int(20 * scale))):
+        await recorder.request(client, "GET", "/api/bundestag/options")
+    return {"cold_ms": _ms(cold.latencies[0]), "cold_error": bool(cold.errors)}
+
+
+async def _search_pagination(client: httpx.AsyncClient, recorder: _Recorder, rng: random.Random, scale: float) -> Dict[str, Any]:
+    sessions = max(1, int(8 * scale))
+    pages = 5
+
+    async def _session(number: int) -> None:
+        # Unterschiedliche Filter je Sitzung, damit nicht alle denselben Cache-Eintrag teilen.
+        params: Dict[str, Any] = {"f.wahlperiode": 20 - number % 7, "f.titel": f"Gesetz {number}"}
+        for _ in range(pages):
+            response = await recorder.request(
+                client, "POST", "/api/bundestag/search", json={"dataset": "vorgang", "params": params}
+            )
+            if response is None or response.status_code >= 400:
+                return
+            cursor = response.json().get("cursor")
+            if not cursor or cursor == params.get("cursor"):
+                return
+            params = {**params, "cursor": cursor}
+            await asyncio.sleep(rng.uniform(0.05, 0.2))
+
+    await asyncio.gather(*(_session(number) for number in range(sessions)))
+    return {"sessions": sessions, "pages_per_session": pages}
+
+
+async def _person_autocomplete(client: httpx.AsyncClient, recorder: _Recorder, rng: random.Random, scale: float) -> Dict[str, Any]:
+    users = max(1, int(20 * scale))
+    names = ["Schneider", "Zimmermann", "Hoffmann", "Müller", "Krüger", "Schröder", "Neumann", "Becker"]
+
+    async def _user(name: str) -> None:
+        # Tippen ohne Pause: jede Eingabe ab drei Zeichen löst eine Anfrage aus.
+        for length in range(3, len(name) + 1):
+            await recorder.request(client, "GET", "/api/bundestag/persons", params={"q": name[:length]})
+
+    await asyncio.gather(*(_user(rng.choice(names)) for _ in range(users)))
+    return {"users": users}
+
+
+async def _gemini_tasks(client: httpx.AsyncClient, recorder: _Recorder, rng: random.Random, scale: float) -> Dict[str, Any]:
+    total = max(1, int(32 * scale))
+    concurrency = max(1, int(16 * scale))
+    distinct = max(1, total * 3 // 4)
+    texts = [f"Drucksache {number}: " + " ".join(rng.choice(["Haushalt", "Antrag", "Bericht", "Gesetz"]) for _ in range(400))
+             for number in range(distinct)]
+    # Ein Viertel der Aufträge wiederholt bereits gestellte Texte und trifft den Ergebniscache.
+    plan = texts + [rng.choice(texts) for _ in range(total - distinct)]
+    limit = asyncio.Semaphore(concurrency)
+
+    async def _task(text: str) -> None:
+        async with limit:
+            await recorder.request(client, "POST", "/api/gemini", json={"text": text, "task": "summary"})
+
+    await asyncio.gather(*(_task(text) for text in plan))
+    return {"tasks": total, "concurrency": concurrency, "repeated": total - distinct}
+
+
+_WORKLOAD_FUNCTIONS: Dict[str, Callable[[httpx.AsyncClient, _Recorder, random.Random, float], Awaitable[Dict[str, Any]]]] = {
+    "options_cold_start": _options_cold_start,
+    "search_pagination": _search_pagination,
+    "person_autocomplete": _person_autocomplete,
+    "gemini_tasks": _gemini_tasks,
+}
+
+
+async def _wait_for_idle(fake: FakeDIP, quiet: float = 1.0, timeout: float = 120.0) -> None:
+    """Wartet, bis die Hintergrund-Synchronisierung der App den DIP-Ersatz nicht mehr anfragt."""
+    deadline = time.monotonic() + timeout
+    last, since = sum(fake.calls.values()), time.monotonic()
+    while time.monotonic() < deadline:
+        await asyncio.sleep(0.1)
+        current = sum(fake.calls.values())
+        if current != last:
+            last, since = current, time.monotonic()
+        elif time.monotonic() - since >= quiet:
+            return
+
+
+def _git_revision() -> Dict[str, Any]:
+    def _git(*command: str) -> str:
+        return subprocess.run(["git", *command], cwd=BACKEND_DIR, capture_output=True, text=True, check=False).stdout.strip()
+
+    return {"commit": _git("rev-parse", "HEAD") or None, "dirty": bool(_git("status", "--porcelain", "--untracked-files=no"))}
+
+
+async def _drive(app_url: str, fake: FakeDIP, stub: StubGemini, args: argparse.Namespace) -> Dict[str, Any]:
+    results: Dict[str, Any] = {}
+    limits = httpx.Limits(max_connections=200, max_keepalive_connections=200)
+    async with httpx.AsyncClient(base_url=app_url, timeout=300, limits=limits) as client:
+        for name in args.workloads:
+            if name != "options_cold_start":
+                await _wait_for_idle(fake)
+            dip_before, gemini_before = dict(fake.calls), stub.calls
+            recorder = _Recorder()
+            started = time.perf_counter()
+            extra = await _WORKLOAD_FUNCTIONS[name](client, recorder, random.Random(f"{name}:{args.seed}"), args.scale)
+            duration = time.perf_counter() - started
+            dip_calls = {dataset: count - dip_before.get(dataset, 0) for dataset, count in fake.calls.items()}
+            dip_calls = {dataset: count for dataset, count in sorted(dip_calls.items()) if count}
+            results[name] = {
+                **_summary(recorder, duration),
+                **extra,
+                "upstream": {"dip": dip_calls, "dip_calls": sum(dip_calls.values()), "gemini_calls": stub.calls - gemini_before},
+            }
+            print(f"{name}: {results[name]['requests']} Anfragen, p95 {results[name]['latency_ms']['p95']} ms", file=sys.stderr)
+    return results
+
+
+def run_once(args: argparse.Namespace) -> Dict[str, Any]:
+    workdir = Path(tempfile.mkdtemp(prefix="tag2-bench-"))
+    # Vor dem ersten Import der App setzen: Pfade werden beim Import festgelegt.
+    os.environ["TAG2_CONFIG_DIR"] = str(workdir / "config")
+    os.environ["TAG2_DATA_DIR"] = str(workdir / "data")
+    from app import config, gemini
+    from app.main import app
+
+    fake = FakeDIP(load_documents(args.recordings, args.seed), args.dip_latency, args.dip_jitter, args.seed)
+    stub = StubGemini(args.gemini_latency, args.gemini_jitter, args.gemini_per_token, args.seed)
+    gemini._gemini_client = lambda api_key: stub  # type: ignore[assignment]
+
+    with _ServerThread(fake.app) as dip_server:
+        overrides: Dict[str, Dict[str, Any]] = {
+            "bundestag": {"base_url": dip_server.url, "api_key": "benchmark"},
+            "gemini": {"api_key": "benchmark"},
+        }
+        for entry in args.setting:
+            key, _, raw = entry.partition("=")
+            namespace, _, field = key.partition(".")
+            overrides.setdefault(namespace, {})[field] = json.loads(raw)
+        config.update_settings(overrides)
+        with _ServerThread(app) as app_server:
+            workloads = asyncio.run(_drive(app_server.url, fake, stub, args))
+
+    return {
+        "meta": {
+            **_git_revision(),
+            "started_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "parameters": {
+                "seed": args.seed,
+                "scale": args.scale,
+                "dip_latency": args.dip_latency,
+                "dip_jitter": args.dip_jitter,
+                "gemini_latency": args.gemini_latency,
+                "gemini_jitter": args.gemini_jitter,
+                "gemini_per_token": args.gemini_per_token,
+                "recordings": str(args.recordings) if args.recordings else None,
+                "settings": args.setting,
+            },
+            "gemini_peak_concurrency": stub.peak_concurrency,
+        },
+        "workloads": workloads,
+    }
+
+
+def _metric(result: Dict[str, Any], name: str) -> float | None:
+    if name in result.get("latency_ms", {}):
+        return result["latency_ms"][name]
+    if name in result.get("upstream", {}):
+        return result["upstream"][name]
+    return result.get(name)
+
+
+def _median_runs(runs: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Fasst Wiederholungen zusammen: je Kennzahl der Median über alle Läufe."""
+    merged = json.loads(json.dumps(runs[0]))
+    for name, result in merged["workloads"].items():
+        for key in ("throughput_rps", "duration_s", "cold_ms"):
+            values = [run["workloads"][name].get(key) for run in runs if run["workloads"][name].get(key) is not None]
+            if values:
+                result[key] = round(statistics.median(values), 2)
+        for key in result["latency_ms"]:
+            values = [run["workloads"][name]["latency_ms"][key] for run in runs]
+            values = [value for value in values if value is not None]
+            result["latency_ms"][key] = round(statistics.median(values), 2) if values else None
+        for key in ("dip_calls", "gemini_calls"):
+            result["upstream"][key] = statistics.median(run["workloads"][name]["upstream"][key] for run in runs)
+        result["errors"] = sum(run["workloads"][name]["errors"] for run in runs)
+    merged["meta"]["repeat"] = len(runs)
+    return merged
+
+
+def compare(before: Dict[str, Any], after: Dict[str, Any]) -> str:
+    lines = []
+    if before["meta"]["parameters"] != after["meta"]["parameters"]:
+        lines.append("Achtung: Die Läufe verwenden unterschiedliche Parameter und sind nur bedingt vergleichbar.")
+    lines.append(f"{'Workload':<22}{'Kennzahl':<16}{'vorher':>12}{'nachher':>12}{'Änderung':>11}")
+    for name, result in after["workloads"].items():
+        previous = before["workloads"].get(name)
+        if previous is None:
+            continue
+        for metric in _COMPARED:
+            old, new = _metric(previous, metric), _metric(result, metric)
+            if old is None or new is None:
+                continue
+            change = f"{(new - old) / old * 100:+.1f} %" if old else "–"
+            lines.append(f"{name:<22}{metric:<16}{old:>12}{new:>12}{change:>11}")
+    return "\n".join(lines)
+
+
+def _parse_args(argv: Sequence[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Lastprofile gegen DIP-Ersatz und Gemini-Stub messen")
+    parser.add_argument("--output", type=Path, help="Ergebnis als JSON speichern (sonst Ausgabe auf stdout)")
+    parser.add_argument("--compare", type=Path, help="Früheres Ergebnis zum Vergleich")
+    parser.add_argument("--workloads", nargs="+", choices=WORKLOADS, default=list(WORKLOADS))
+    parser.add_argument("--repeat", type=int, default=1, help="Läufe in frischen Prozessen; berichtet wird der Median")
+    parser.add_argument("--scale", type=float, default=1.0, help="Multipliziert Sitzungen, Nutzer und Aufträge")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--recordings", type=Path, help="Verzeichnis mit aufgezeichneten <datensatz>.json")
+    parser.add_argument("--dip-latency", type=float, default=0.08)
+    parser.add_argument("--dip-jitter", type=float, default=0.04)
+    parser.add_argument("--gemini-latency", type=float, default=0.8)
+    parser.add_argument("--gemini-jitter", type=float, default=0.4)
+    parser.add_argument("--gemini-per-token", type=float, default=0.0)
+    parser.add_argument(
+        "--setting", action="append", default=[], metavar="BEREICH.FELD=JSON",
+        help="Einstellung der App überschreiben, z. B. bundestag.requests_per_second=50",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: Sequence[str] | None = None) -> None:
+    args = _parse_args(argv)
+    if args.repeat > 1:
+        runs = []
+        child_args = list(argv if argv is not None else sys.argv[1:])
+        for _ in range(args.repeat):
+            with tempfile.NamedTemporaryFile(suffix=".json") as handle:
+                # Jeder Lauf braucht einen frischen Prozess, sonst wäre der Kaltstart schon warm.
+                subprocess.run(
+                    [sys.executable, "-m", "benchmarks.run", *_strip_options(child_args), "--output", handle.name],
+                    cwd=BACKEND_DIR,
+                    check=True,
+                )
+                runs.append(json.loads(Path(handle.name).read_text(encoding="utf-8")))
+        result = _median_runs(runs)
+    else:
+        result = run_once(args)
+
+    serialized = json.dumps(result, ensure_ascii=False, indent=2)
+    if args.output:
+        args.output.write_text(serialized + "\n", encoding="utf-8")
+    else:
+        print(serialized)
+    if args.compare:
+        print(compare(json.loads(args.compare.read_text(encoding="utf-8")), result), file=sys.stderr)
+
+
+def _strip_options(argv: Sequence[str]) -> List[str]:
+    """Entfernt --output, --compare und --repeat, die nur der aufrufende Prozess auswertet."""
+    stripped: List[str] = []
+    skip = False
+    for arg in argv:
+        if skip:
+            skip = False
+            continue
+        option = arg.split("=", 1)[0]
+        if option in ("--output", "--compare", "--repeat"):
+            skip = "=" not in arg
+            continue
+        stripped.append(arg)
+    return stripped
+
+
+if __name__ == "__main__":
+    main()
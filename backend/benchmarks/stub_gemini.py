@@ -0,0 +1,74 @@
+"""Gemini-Ersatz mit fester Latenz je Token; ersetzt ``app.gemini._gemini_client`` im Benchmark-Prozess."""
+
+from __future__ import annotations
+
+import asyncio
+import random
+import threading
+import time
+from types import SimpleNamespace
+from typing import Any, Iterator
+
+
+def _tokens(contents: Any) -> int:
+    return max(1, len(str(contents)) // 4)
+
+
+class StubGemini:
+    """Antwortet nach ``latency`` Sekunden plus ``per_token`` je Eingabe-Token; zählt Aufrufe und Parallelität."""
+
+    def __init__(self, latency: float, jitter: float, per_token: float = 0.0, seed: int = 1) -> None:
+        self.latency = latency
+        self.jitter = jitter
+        self.per_token = per_token
+        self.calls = 0
+        self.peak_concurrency = 0
+        self._active = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.models = SimpleNamespace(generate_content_stream=self._generate_stream)
+        self.aio = SimpleNamespace(
+            models=SimpleNamespace(generate_content=self._generate),
+            caches=SimpleNamespace(create=self._create_cache, delete=self._delete_cache),
+        )
+
+    def _enter(self, contents: Any) -> float:
+        with self._lock:
+            self.calls += 1
+            self._active += 1
+            self.peak_concurrency = max(self.peak_concurrency, self._active)
+            return self.latency + self._rng.uniform(0, self.jitter) + self.per_token * _tokens(contents)
+
+    def _leave(self) -> None:
+        with self._lock:
+            self._active -= 1
+
+    def _response(self, contents: Any, text: str) -> SimpleNamespace:
+        usage = SimpleNamespace(
+            prompt_token_count=_tokens(contents), candidates_token_count=_tokens(text), cached_content_token_count=None
+        )
+        return SimpleNamespace(text=text, candidates=[], usage_metadata=usage)
+
+    async def _generate(self, model: str, contents: Any, config: Any = None) -> SimpleNamespace:
+        delay = self._enter(contents)
+        try:
+            await asyncio.sleep(delay)
+        finally:
+            self._leave()
+        return self._response(contents, f"Zusammenfassung ({_tokens(contents)} Tokens Eingabe).")
+
+    def _generate_stream(self, model: str, contents: Any, config: Any = None) -> Iterator[SimpleNamespace]:
+        delay = self._enter(contents)
+        try:
+            for index in range(5):
+                time.sleep(delay / 5)
+                yield self._response(contents, f"Teil {index + 1}. ")
+        finally:
+            self._leave()
+
+    async def _create_cache(self, model: str, config: Any = None) -> SimpleNamespace:
+        await asyncio.sleep(self.latency)
+        return SimpleNamespace(name=f"cachedContents/stub-{id(config)}")
+
+    async def _delete_cache(self, name: str) -> None:
+        return None
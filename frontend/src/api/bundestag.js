@@ -1,7 +1,7 @@
 import api from './client';
 
-export const searchDataset = async ({ dataset, params }) => {
-  const { data } = await api.post('/bundestag/search', { dataset, params });
+export const searchDataset = async ({ dataset, params, fields }) => {
+  const { data } = await api.post('/bundestag/search', { dataset, params, fields });
   return data;
 };
 
@@ -10,6 +10,48 @@ export const fetchDocument = async ({ dataset, documentId }) => {
   return data;
 };
 
+export const streamDocuments = async ({ documents, signal, onDocument }) => {
+  const response = await fetch(`${api.defaults.baseURL}/bundestag/documents`, {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json', Accept: 'application/x-ndjson' },
+    body: JSON.stringify({ documents }),
+    signal,
+  });
+  if (!response.ok) {
+    const payload = await response.json().catch(() => null);
+    throw new Error(payload?.detail ?? `Dokumente konnten nicht geladen werden (${response.status})`);
+  }
+
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  const results = [];
+  let buffer = '';
+  for (;;) {
+    const { value, done } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+    let newline = buffer.indexOf('\n');
+    while (newline !== -1) {
+      const line = buffer.slice(0, newline).trim();
+      buffer = buffer.slice(newline + 1);
+      newline = buffer.indexOf('\n');
+      if (line) {
+        const result = JSON.parse(line);
+        results[result.position] = result;
+        onDocument?.(result);
+      }
+    }
+  }
+  return results;
+};
+
+export const fetchFulltext = async ({ dataset, documentId, source }) => {
+  const { data } = await api.get(`/bundestag/${dataset}/${documentId}/fulltext`, {
+    params: { source: source ?? undefined },
+  });
+  return data;
+};
+
 export const fetchMetadataOptions = async () => {
   const { data } = await api.get('/bundestag/options');
   return data;
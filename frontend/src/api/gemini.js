@@ -4,3 +4,64 @@ export const runGeminiTask = async ({ text, task, options }) => {
   const { data } = await api.post('/gemini', { text, task, options });
   return data;
 };
+
+const parseEvent = (raw) => {
+  let event = 'message';
+  const dataLines = [];
+  raw.split('\n').forEach((line) => {
+    if (line.startsWith('event:')) {
+      event = line.slice(6).trim();
+    } else if (line.startsWith('data:')) {
+      dataLines.push(line.slice(5).trimStart());
+    }
+  });
+  return { event, data: dataLines.length ? JSON.parse(dataLines.join('\n')) : null };
+};
+
+export const streamGeminiTask = async ({ text, task, options, signal, onText }) => {
+  const response = await fetch(`${api.defaults.baseURL}/gemini/stream`, {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json', Accept: 'text/event-stream' },
+    body: JSON.stringify({ text, task, options }),
+    signal,
+  });
+  if (!response.ok) {
+    const payload = await response.json().catch(() => null);
+    throw new Error(payload?.detail ?? `Gemini-Stream fehlgeschlagen (${response.status})`);
+  }
+
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = '';
+  let result = '';
+  try {
+    for (;;) {
+      const { value, done } = await reader.read();
+      if (done) break;
+      buffer += decoder.decode(value, { stream: true });
+      let boundary = buffer.indexOf('\n\n');
+      while (boundary !== -1) {
+        const { event, data } = parseEvent(buffer.slice(0, boundary));
+        buffer = buffer.slice(boundary + 2);
+        boundary = buffer.indexOf('\n\n');
+        if (event === 'error') {
+          throw new Error(data?.detail ?? 'Gemini-Stream abgebrochen');
+        }
+        if (event === 'done') {
+          return { text: data?.text ?? result, candidates: [] };
+        }
+        if (data?.text) {
+          result += data.text;
+          onText?.(result);
+        }
+      }
+    }
+  } catch (error) {
+    // Abbruch durch den Nutzer: bisherigen Text behalten.
+    if (error.name === 'AbortError') {
+      return { text: result, candidates: [] };
+    }
+    throw error;
+  }
+  return { text: result, candidates: [] };
+};
@@ -7,6 +7,7 @@ import {
   Autocomplete,
   Box,
   Button,
+  Checkbox,
   Chip,
   CircularProgress,
   LinearProgress,
@@ -22,11 +23,13 @@ import ExpandMoreIcon from '@mui/icons-material/ExpandMore';
 import RefreshIcon from '@mui/icons-material/Refresh';
 import SummarizeIcon from '@mui/icons-material/Summarize';
 import OpenInNewIcon from '@mui/icons-material/OpenInNew';
+import ArticleIcon from '@mui/icons-material/Article';
+import CompareArrowsIcon from '@mui/icons-material/CompareArrows';
 import dayjs from 'dayjs';
 import Grid from '@mui/material/Grid2';
 import { useMutation, useQuery } from '@tanstack/react-query';
 
-import { fetchMetadataOptions, searchDataset, searchPersons } from '../api/bundestag';
+import { fetchFulltext, fetchMetadataOptions, searchDataset, searchPersons, streamDocuments } from '../api/bundestag';
 import { useAppStore } from '../store/appStore';
 
 const datasetOptions = [
@@ -87,6 +90,30 @@ const buildParams = (filters) => {
   return params;
 };
 
+// Felder, die Trefferliste und Detailansicht tatsächlich anzeigen; der Rest bleibt auf dem Server.
+const RESULT_FIELDS = [
+  'titel',
+  'abstract',
+  'text',
+  'datum',
+  'aktualisiert',
+  'wahlperiode',
+  'vorgangstyp',
+  'drucksachetyp',
+  'dokumentart',
+  'dokumentnummer',
+  'herausgeber',
+  'initiative',
+  'aktivitaetsart',
+  'aktivitaet_anzeige',
+  'vorgangsposition',
+  'deskriptor.name',
+  'fundstelle.pdf_url',
+  'fundstelle.xml_url',
+  'pdf_url',
+  'xml_url',
+];
+
 const createMetadataOverview = (document) => {
   const entries = [];
   if (document.titel) entries.push({ label: 'Titel', value: document.titel });
@@ -159,6 +186,42 @@ const SourceLinks = ({ document }) => {
   );
 };
 
+const FulltextButton = ({ dataset, document, onLoaded }) => {
+  const [loading, setLoading] = useState(false);
+  const [error, setError] = useState(null);
+  const fundstelle = document.fundstelle;
+  if (!(fundstelle?.pdf_url ?? document.pdf_url) && !(fundstelle?.xml_url ?? document.xml_url)) {
+    return null;
+  }
+
+  const handleClick = async () => {
+    setLoading(true);
+    setError(null);
+    try {
+      const data = await fetchFulltext({ dataset, documentId: document.id });
+      onLoaded(data.text);
+    } catch (fetchError) {
+      setError(fetchError.message);
+    } finally {
+      setLoading(false);
+    }
+  };
+
+  return (
+    <Stack spacing={1}>
+      <Button
+        variant="outlined"
+        startIcon={loading ? <CircularProgress size={16} /> : <ArticleIcon />}
+        onClick={handleClick}
+        disabled={loading}
+      >
+        Volltext für Gemini übernehmen
+      </Button>
+      {error ? <Alert severity="error">{error}</Alert> : null}
+    </Stack>
+  );
+};
+
 const BundestagSearch = ({ defaultDataset = 'vorgang', defaultFilters }) => {
   const [dataset, setDataset] = useState(defaultDataset);
   const [filters, setFilters] = useState(() => createInitialFilters(defaultFilters));
@@ -166,11 +229,15 @@ const BundestagSearch = ({ defaultDataset = 'vorgang', defaultFilters }) => {
   const [personQuery, setPersonQuery] = useState('');
   const [personOptions, setPersonOptions] = useState([]);
   const [personLoading, setPersonLoading] = useState(false);
+  const [selectedIds, setSelectedIds] = useState([]);
+  const [comparison, setComparison] = useState({ loading: false, loaded: 0, error: null });
 
   const { data: metadata, isLoading: metadataLoading, error: metadataError, refetch: refetchMetadata } = useQuery({
     queryKey: ['bundestag-options'],
     queryFn: fetchMetadataOptions,
     staleTime: 1000 * 60 * 30,
+    // Platzhalter eines Workers, dessen Leader die Optionen noch sammelt: bald erneut fragen.
+    refetchInterval: (query) => (query.state.data?.pending ? 5000 : false),
   });
 
   useEffect(() => {
@@ -228,8 +295,9 @@ const BundestagSearch = ({ defaultDataset = 'vorgang', defaultFilters }) => {
   const handleSearch = async () => {
     const params = buildParams(filters);
     setResults({ documents: [], cursor: null, numFound: 0, queryParams: params });
+    setSelectedIds([]);
     try {
-      const data = await mutation.mutateAsync({ dataset, params });
+      const data = await mutation.mutateAsync({ dataset, params, fields: RESULT_FIELDS });
       setResults({
         documents: data.documents ?? [],
         cursor: data.cursor ?? null,
@@ -247,6 +315,7 @@ const BundestagSearch = ({ defaultDataset = 'vorgang', defaultFilters }) => {
       const data = await mutation.mutateAsync({
         dataset,
         params: { ...results.queryParams, cursor: results.cursor },
+        fields: RESULT_FIELDS,
       });
       setResults((prev) => ({
         documents: [...prev.documents, ...(data.documents ?? [])],
@@ -259,6 +328,39 @@ const BundestagSearch = ({ defaultDataset = 'vorgang', defaultFilters }) => {
     }
   };
 
+  const toggleSelected = (documentId) => {
+    setSelectedIds((prev) =>
+      prev.includes(documentId) ? prev.filter((id) => id !== documentId) : [...prev, documentId],
+    );
+  };
+
+  // Lädt die ausgewählten Treffer vollständig in einem Aufruf; der Server holt sie parallel.
+  const handleLoadSelection = async () => {
+    setComparison({ loading: true, loaded: 0, error: null });
+    try {
+      const loaded = await streamDocuments({
+        documents: selectedIds.map((id) => ({ dataset, id: String(id) })),
+        onDocument: () => setComparison((prev) => ({ ...prev, loaded: prev.loaded + 1 })),
+      });
+      const documents = loaded.filter((entry) => entry?.document).map((entry) => entry.document);
+      const failed = loaded.filter((entry) => entry?.error).length;
+      setSelectedContent({
+        title: `${documents.length} Dokumente im Vergleich`,
+        text: documents
+          .map((document) => `## ${document.titel ?? document.id}\n${resolveTextContent(document)}`)
+          .join('\n\n'),
+        metadata: { documents },
+      });
+      setComparison({
+        loading: false,
+        loaded: loaded.length,
+        error: failed ? `${failed} Dokument(e) konnten nicht geladen werden.` : null,
+      });
+    } catch (loadError) {
+      setComparison({ loading: false, loaded: 0, error: loadError.message });
+    }
+  };
+
   const handleResetFilters = () => {
     setFilters(createInitialFilters(defaultFilters));
     setPersonQuery('');
@@ -462,12 +564,45 @@ const BundestagSearch = ({ defaultDataset = 'vorgang', defaultFilters }) => {
 
       {hasResults ? (
         <Stack spacing={2}>
+          {selectedIds.length ? (
+            <Paper elevation={1} sx={{ p: 2 }}>
+              <Stack spacing={1}>
+                <Stack direction="row" spacing={2} alignItems="center" flexWrap="wrap">
+                  <Typography variant="body2">{selectedIds.length} ausgewählt</Typography>
+                  <Button
+                    variant="contained"
+                    startIcon={comparison.loading ? <CircularProgress size={16} /> : <CompareArrowsIcon />}
+                    onClick={handleLoadSelection}
+                    disabled={comparison.loading}
+                  >
+                    Auswahl vollständig für Gemini übernehmen
+                  </Button>
+                  <Button onClick={() => setSelectedIds([])} disabled={comparison.loading}>
+                    Auswahl aufheben
+                  </Button>
+                </Stack>
+                {comparison.loading ? (
+                  <LinearProgress variant="determinate" value={(comparison.loaded / selectedIds.length) * 100} />
+                ) : null}
+                {comparison.error ? <Alert severity="warning">{comparison.error}</Alert> : null}
+              </Stack>
+            </Paper>
+          ) : null}
           {results.documents.map((document) => {
             const metadata = createMetadataOverview(document);
             const updated = document.aktualisiert ? formatDateTime(document.aktualisiert) : null;
             return (
               <Accordion key={`${document.id}-${document.dokumentnummer ?? ''}`} defaultExpanded={false}>
                 <AccordionSummary expandIcon={<ExpandMoreIcon />}>
+                  <Checkbox
+                    size="small"
+                    checked={selectedIds.includes(document.id)}
+                    onClick={(event) => event.stopPropagation()}
+                    onFocus={(event) => event.stopPropagation()}
+                    onChange={() => toggleSelected(document.id)}
+                    inputProps={{ 'aria-label': 'Für Vergleich auswählen' }}
+                    sx={{ mr: 1, alignSelf: 'flex-start' }}
+                  />
                   <Box sx={{ flexGrow: 1 }}>
                     <Typography variant="subtitle1" fontWeight={600}>
                       {document.titel ?? document.vorgangsposition ?? 'Ohne Titel'}
@@ -514,6 +649,17 @@ const BundestagSearch = ({ defaultDataset = 'vorgang', defaultFilters }) => {
                       >
                         Für Gemini übernehmen
                       </Button>
+                      <FulltextButton
+                        dataset={dataset}
+                        document={document}
+                        onLoaded={(text) =>
+                          setSelectedContent({
+                            title: document.titel ?? 'Ausgewählter Eintrag',
+                            text,
+                            metadata: document,
+                          })
+                        }
+                      />
                     </Stack>
                   </Stack>
                 </AccordionDetails>
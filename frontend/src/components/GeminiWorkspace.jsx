@@ -1,4 +1,4 @@
-import { useEffect, useMemo, useState } from 'react';
+import { useEffect, useMemo, useRef, useState } from 'react';
 import {
   Alert,
   Box,
@@ -15,7 +15,7 @@ import {
   Typography,
 } from '@mui/material';
 import { useMutation } from '@tanstack/react-query';
-import { runGeminiTask } from '../api/gemini';
+import { streamGeminiTask } from '../api/gemini';
 import { useAppStore } from '../store/appStore';
 
 const TASK_OPTIONS = [
@@ -60,9 +60,22 @@ const GeminiWorkspace = ({ config }) => {
     }
   }, [config]);
 
+  const abortRef = useRef(null);
+
   const mutation = useMutation({
-    mutationFn: runGeminiTask,
+    mutationFn: (variables) => {
+      const controller = new AbortController();
+      abortRef.current = controller;
+      return streamGeminiTask({
+        ...variables,
+        signal: controller.signal,
+        onText: (text) => setGeminiResult({ text, candidates: [] }),
+      });
+    },
     onSuccess: (data) => setGeminiResult(data),
+    onSettled: () => {
+      abortRef.current = null;
+    },
   });
 
   const hasText = selectedText && selectedText.trim().length > 0;
@@ -192,6 +205,11 @@ const GeminiWorkspace = ({ config }) => {
             <Button variant="outlined" onClick={handleReset} disabled={mutation.isPending}>
               Zurücksetzen
             </Button>
+            {mutation.isPending ? (
+              <Button variant="outlined" color="warning" onClick={() => abortRef.current?.abort()}>
+                Abbrechen
+              </Button>
+            ) : null}
             <Button
               variant="contained"
               onClick={handleRun}
@@ -201,8 +219,9 @@ const GeminiWorkspace = ({ config }) => {
             </Button>
           </Stack>
           {mutation.isPending ? (
-            <Alert severity="info">Gemini verarbeitet den Text …</Alert>
+            <Alert severity="info">Gemini verarbeitet den Text … Die Antwort erscheint fortlaufend.</Alert>
           ) : null}
+          {mutation.isError ? <Alert severity="error">{mutation.error.message}</Alert> : null}
           {!hasText ? <Alert severity="info">Noch kein Text ausgewählt.</Alert> : null}
         </Stack>
       </Paper>
@@ -54,6 +54,8 @@ const SettingsPanel = ({ config, requiresSetup = false }) => {
     queryFn: fetchMetadataOptions,
     enabled: hasBundestagKey,
     staleTime: 1000 * 60 * 30,
+    // Platzhalter eines Workers, dessen Leader die Optionen noch sammelt: bald erneut fragen.
+    refetchInterval: (query) => (query.state.data?.pending ? 5000 : false),
   });
 
   const wahlperiodeOptions = metadata?.wahlperioden ?? [];
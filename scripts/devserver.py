@@ -1,8 +1,13 @@
 #!/usr/bin/env python3
-"""Starte Backend (uvicorn) und Frontend (Vite) in einem Prozess."""
+"""Starte Backend (uvicorn) und Frontend (Vite) in einem Prozess.
+
+Mit ``--prod`` läuft das Backend ohne Reload mit mehreren Worker-Prozessen und das
+Frontend als gebaute Vorschau (``vite preview``).
+"""
 
 from __future__ import annotations
 
+import argparse
 import asyncio
 import os
 import signal
@@ -35,26 +40,48 @@ async def _create_process(command: list[str], cwd: Path, name: str) -> asyncio.s
     return process
 
 
-async def main() -> int:
-    backend_cmd = [
-        sys.executable,
-        "-m",
-        "uvicorn",
-        "app.main:app",
-        "--reload",
-        "--port",
-        os.environ.get("TAG2_BACKEND_PORT", "8000"),
-    ]
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--prod", action="store_true", help="Produktivmodus: mehrere Worker, kein Reload")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=int(os.environ.get("TAG2_WORKERS", os.cpu_count() or 1)),
+        help="Anzahl der Backend-Worker im Produktivmodus (Standard: alle Kerne)",
+    )
+    return parser.parse_args()
+
+
+async def _build_frontend() -> int:
+    process = await _create_process(["npm", "run", "build"], FRONTEND_DIR, "build")
+    return await process.wait()
+
+
+async def main(args: argparse.Namespace) -> int:
+    backend_cmd = [sys.executable, "-m", "uvicorn", "app.main:app"]
+    if args.prod:
+        workers = max(1, args.workers)
+        # Die Worker teilen sich das DIP-Ratenlimit und wählen per Dateisperre einen Leader.
+        os.environ["TAG2_WORKERS"] = str(workers)
+        backend_cmd += ["--workers", str(workers), "--host", os.environ.get("TAG2_BACKEND_HOST", "127.0.0.1")]
+    else:
+        backend_cmd.append("--reload")
+    backend_cmd += ["--port", os.environ.get("TAG2_BACKEND_PORT", "8000")]
+
     frontend_cmd = [
         "npm",
         "run",
-        "dev",
+        "preview" if args.prod else "dev",
         "--",
         "--host",
         os.environ.get("TAG2_FRONTEND_HOST", "0.0.0.0"),
         "--port",
-        os.environ.get("TAG2_FRONTEND_PORT", "5173"),
+        os.environ.get("TAG2_FRONTEND_PORT", "4173" if args.prod else "5173"),
     ]
+    if args.prod and not (FRONTEND_DIR / "dist").exists():
+        print("[build] Kein Frontend-Build gefunden – starte npm run build")
+        if await _build_frontend() != 0:
+            return 1
 
     backend_process = await _create_process(backend_cmd, BACKEND_DIR, "backend")
     frontend_process = await _create_process(frontend_cmd, FRONTEND_DIR, "frontend")
@@ -103,7 +130,7 @@ async def main() -> int:
 
 if __name__ == "__main__":
     try:
-        exit_code = asyncio.run(main())
+        exit_code = asyncio.run(main(_parse_args()))
     except KeyboardInterrupt:  # pragma: no cover - CLI Komfort
         exit_code = 0
     sys.exit(exit_code)